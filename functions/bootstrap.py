@@ -0,0 +1,170 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from functions.parallel import default_workers, worker_pool
+from functions.shared_frames import publish_frame, attach_frame, release_frame
+from functions.utilities import parse_memory_size
+from functions.memory_budget import MAX_MEMORY_VARIABLE
+
+# Memory of the resampled matrices of all the workers together when no budget is given
+DEFAULT_BOOTSTRAP_MEMORY = '1GB'
+# Peak bytes allocated per resampled value by bootstrap_batch: the uniform draws, the offsets, the indices and the
+# resampled scores (plus the resampled weights and the weighted scores of the weighted average)
+BYTES_PER_VALUE = 32
+WEIGHTED_BYTES_PER_VALUE = 48
+# Maximum number of replicates of one batch; every replicate has its own seed, so that results with a given seed
+# are the same whatever the batch size and the number of workers
+MAX_BATCH_REPLICATES = 250
+
+
+def bootstrap_batch(scores, weights, group_starts, group_sizes, row_groups, seeds):
+    """
+    Compute the country averages of a batch of bootstrap replicates.
+
+    Movies are sorted by country, so resampling within each country is an index matrix of offsets drawn inside
+    the segment of every row's country, and the per-country sums of all the replicates are a single reduceat.
+
+    Args:
+    scores (np.ndarray): Scores of the movies, sorted by country.
+    weights (np.ndarray or None): Weights (votes) of the movies, or None for the plain average.
+    group_starts (np.ndarray): Position of the first movie of every country.
+    group_sizes (np.ndarray): Number of movies of every country.
+    row_groups (np.ndarray): Country number of every movie.
+    seeds (list): Seeds (np.random.SeedSequence) of the replicates of the batch.
+
+    Returns:
+    np.ndarray: Matrix of replicate x country averages.
+    """
+    draws = np.empty((len(seeds), len(scores)))
+    for replicate, seed in enumerate(seeds):
+        np.random.default_rng(seed).random(out=draws[replicate])
+    offsets = (draws * group_sizes[row_groups]).astype(np.int64)
+    del draws
+    resampled = group_starts[row_groups] + offsets
+
+    if weights is None:
+        return np.add.reduceat(scores[resampled], group_starts, axis=1) / group_sizes
+
+    resampled_weights = weights[resampled]
+    weighted_sums = np.add.reduceat(scores[resampled] * resampled_weights, group_starts, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return weighted_sums / np.add.reduceat(resampled_weights, group_starts, axis=1)
+
+
+def bootstrap_shared_batch(movies_handle, countries_handle, seeds):
+    """
+    Attach in a worker process to the movies and countries published by bootstrap_country_scores and compute the
+    country averages of a batch of replicates with bootstrap_batch.
+    """
+    movies, segments = attach_frame(movies_handle)
+    countries, country_segments = attach_frame(countries_handle)
+    segments += country_segments
+    try:
+        weights = movies['weight'].to_numpy() if 'weight' in movies.columns else None
+        return bootstrap_batch(movies['score'].to_numpy(), weights, countries['start'].to_numpy(),
+                               countries['size'].to_numpy(), movies['group'].to_numpy(), seeds)
+    finally:
+        del movies, countries, weights
+        release_frame(segments)
+
+
+def replicate_ranks(replicates):
+    """Rank the countries (1 = highest average) within every replicate."""
+    order = np.argsort(-replicates, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, replicates.shape[1] + 1), axis=1)
+    return ranks
+
+
+def bootstrap_country_scores(movies_df, n_replicates=1000, confidence=0.95, weighted=False, n_workers=None,
+                             seed=None, country_column='country', score_column='composite_score',
+                             weight_column='numVotes', max_memory=None):
+    """
+    Bootstrap confidence intervals and rank intervals of the country composite score averages.
+
+    Movies are resampled with replacement within each country. Replicates are generated in batches of index
+    matrices, and the batches run across a process pool; the movie and country arrays are published once in
+    shared memory, so only their handles and the seeds of a batch are sent to the workers.
+
+    Args:
+    movies_df (pd.DataFrame): DataFrame of movies with country, composite score and votes columns.
+    n_replicates (int): Number of bootstrap replicates.
+    confidence (float): Confidence level of the intervals.
+    weighted (bool): Whether to bootstrap the vote-weighted average (as weighted_average_composite_score_by_country)
+        instead of the plain average (as average_composite_score_by_country).
+    n_workers (int, optional): Number of worker processes. Defaults to the number of cores.
+    seed (int, optional): Seed of the random generator, for reproducible intervals.
+    country_column (str): The column name of the country.
+    score_column (str): The column name of the score.
+    weight_column (str): The column name of the weights used when weighted is True.
+    max_memory (int or str, optional): Memory of the batches of all the workers together, e.g. '1GB', which sets
+        the number of replicates of a batch. Defaults to the MAX_MEMORY environment variable, or
+        DEFAULT_BOOTSTRAP_MEMORY.
+
+    Returns:
+    pd.DataFrame: DataFrame with 'country', 'movies', the average score, 'ci_lower', 'ci_upper', 'rank',
+        'rank_lower' and 'rank_upper' columns, sorted by the average score.
+    """
+    score_name = 'weighted average composite score' if weighted else 'average composite score'
+    columns = [country_column, score_column] + ([weight_column] if weighted else [])
+    movies_df = movies_df[columns].dropna()
+
+    # Sort the movies by country once so that every country is a contiguous segment
+    row_groups, countries = pd.factorize(movies_df[country_column], sort=True)
+    order = np.argsort(row_groups, kind='stable')
+    row_groups = row_groups[order]
+    scores = movies_df[score_column].to_numpy(dtype=np.float64)[order]
+    weights = movies_df[weight_column].to_numpy(dtype=np.float64)[order] if weighted else None
+    group_sizes = np.bincount(row_groups, minlength=len(countries))
+    group_starts = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+
+    if weighted:
+        estimates = np.bincount(row_groups, scores * weights) / np.bincount(row_groups, weights)
+    else:
+        estimates = np.bincount(row_groups, scores) / group_sizes
+
+    # Split the replicates into batches that fit in the budget of a worker and spread them over the workers
+    n_workers = n_workers or default_workers()
+    max_memory = parse_memory_size(max_memory or os.environ.get(MAX_MEMORY_VARIABLE) or DEFAULT_BOOTSTRAP_MEMORY)
+    batch_bytes = (WEIGHTED_BYTES_PER_VALUE if weighted else BYTES_PER_VALUE) * max(len(scores), 1)
+    batch_size = max(1, min(max_memory // n_workers // batch_bytes, MAX_BATCH_REPLICATES))
+    seeds = np.random.SeedSequence(seed).spawn(n_replicates)
+    batch_seeds = [seeds[start:start + batch_size] for start in range(0, n_replicates, batch_size)]
+
+    if n_workers == 1 or len(batch_seeds) == 1:
+        batches = [bootstrap_batch(scores, weights, group_starts, group_sizes, row_groups, replicate_seeds)
+                   for replicate_seeds in batch_seeds]
+    else:
+        movies = pd.DataFrame({'score': scores, 'group': row_groups})
+        if weighted:
+            movies['weight'] = weights
+        movies_handle, segments = publish_frame(movies)
+        try:
+            countries_handle, country_segments = publish_frame(pd.DataFrame({'start': group_starts,
+                                                                             'size': group_sizes}))
+            segments += country_segments
+            batches = list(worker_pool(n_workers).map(bootstrap_shared_batch, [movies_handle] * len(batch_seeds),
+                                                      [countries_handle] * len(batch_seeds), batch_seeds))
+        finally:
+            release_frame(segments, unlink=True)
+    replicates = np.vstack(batches)
+
+    alpha = (1 - confidence) / 2
+    ci_lower, ci_upper = np.nanquantile(replicates, [alpha, 1 - alpha], axis=0)
+    rank_lower, rank_upper = np.quantile(replicate_ranks(replicates), [alpha, 1 - alpha], axis=0,
+                                         method='inverted_cdf')
+
+    result = pd.DataFrame({
+        'country': countries,
+        'movies': group_sizes,
+        score_name: estimates,
+        'ci_lower': ci_lower,
+        'ci_upper': ci_upper,
+        'rank_lower': rank_lower.astype(np.int64),
+        'rank_upper': rank_upper.astype(np.int64)
+    })
+    result.insert(5, 'rank', result[score_name].rank(ascending=False, method='min').astype(np.int64))
+
+    return result.sort_values(score_name, ascending=False).reset_index(drop=True)
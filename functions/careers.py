@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+from functions.fact_table import MovieFacts
+
+# Default length, in years, of the rolling windows of the career statistics
+CAREER_WINDOW = 5
+
+
+def director_careers(movies_df, director_column='nconst', year_column='startYear', score_column='composite_score',
+                     votes_column='numVotes', name_column='primaryName', window=CAREER_WINDOW, min_periods=1):
+    """
+    Compute the career trajectory of every director, one row per director and active year.
+
+    The movie-director rows are sorted once by (director, year) and reduced to contiguous (director, year)
+    segments, so the rolling and cumulative statistics of all the directors are differences of global cumulative
+    sums: the window of a year starts at the first segment of the same director less than `window` years
+    earlier, found with one searchsorted over (director, year) keys, instead of a groupby-rolling per director.
+
+    Args:
+    movies_df (pd.DataFrame or MovieFacts): The movies-directors DataFrame of prepare_movies_directors, or the
+        movie facts.
+    director_column (str): The column name of the unique director identifier.
+    year_column (str): The column name of the movie year; movies without a year are skipped.
+    score_column (str): The column name of the score.
+    votes_column (str): The column name of the number of votes.
+    name_column (str): The column name of the director name, kept as the first value for each director when present.
+    window (int): Length of the rolling windows in years, the current year included.
+    min_periods (int): Minimum number of movies in a window for its rolling mean, NaN otherwise.
+
+    Returns:
+    pd.DataFrame: DataFrame sorted by director and year with the director (and name), 'year', 'movies',
+        'mean_score', 'window_start_year', 'rolling_movies', 'rolling_mean_score', 'cumulative_movies' and
+        'cumulative_votes' columns.
+    """
+    if window < 1:
+        raise ValueError("The window must be at least one year")
+    if isinstance(movies_df, MovieFacts):
+        movies_df = movies_df.director_rows([director_column, name_column, year_column, score_column, votes_column])
+    movies_df = movies_df.dropna(subset=[director_column, year_column, score_column])
+
+    # Sort once by (director, year)
+    director_codes, directors = pd.factorize(movies_df[director_column], sort=True)
+    years = movies_df[year_column].to_numpy(dtype=np.float64).astype(np.int64)
+    order = np.lexsort((years, director_codes))
+    director_codes = director_codes[order]
+    years = years[order]
+    scores = movies_df[score_column].to_numpy(dtype=np.float64)[order]
+    votes = pd.to_numeric(movies_df[votes_column], errors='coerce').fillna(0).to_numpy(dtype=np.float64)[order]
+
+    # Reduce the rows to (director, year) segments
+    new_segment = np.ones(len(years), dtype=bool)
+    new_segment[1:] = (director_codes[1:] != director_codes[:-1]) | (years[1:] != years[:-1])
+    starts = np.flatnonzero(new_segment)
+    segment_directors = director_codes[starts]
+    segment_years = years[starts]
+    segment_movies = np.diff(np.append(starts, len(years)))
+    segment_scores = np.add.reduceat(scores, starts) if len(starts) else scores
+    segment_votes = np.add.reduceat(votes, starts) if len(starts) else votes
+
+    # Global cumulative sums, with a leading zero, differenced over the segments of every window
+    cumulative_movies = np.concatenate(([0], np.cumsum(segment_movies)))
+    cumulative_scores = np.concatenate(([0.0], np.cumsum(segment_scores)))
+    cumulative_votes = np.concatenate(([0.0], np.cumsum(segment_votes)))
+
+    # Keys increase with (director, year) and leave a gap of more than a window between directors
+    year_offset = segment_years.min() if len(starts) else 0
+    key_span = (segment_years.max() - year_offset if len(starts) else 0) + window + 1
+    keys = segment_directors * key_span + (segment_years - year_offset)
+    window_starts = np.searchsorted(keys, keys - window + 1, side='left')
+    segment_ends = np.arange(1, len(starts) + 1)
+
+    rolling_movies = cumulative_movies[segment_ends] - cumulative_movies[window_starts]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rolling_mean = (cumulative_scores[segment_ends] - cumulative_scores[window_starts]) / rolling_movies
+    rolling_mean[rolling_movies < min_periods] = np.nan
+
+    # Cumulative statistics restart at the first segment of every director
+    director_starts = np.searchsorted(segment_directors, segment_directors, side='left')
+
+    careers = pd.DataFrame({director_column: np.asarray(directors, dtype=object).take(segment_directors)})
+    if name_column in movies_df.columns and name_column != director_column:
+        careers[name_column] = movies_df[name_column].to_numpy()[order][starts]
+    careers['year'] = segment_years
+    careers['movies'] = segment_movies
+    careers['mean_score'] = segment_scores / segment_movies
+    careers['window_start_year'] = segment_years[window_starts]
+    careers['rolling_movies'] = rolling_movies
+    careers['rolling_mean_score'] = rolling_mean
+    careers['cumulative_movies'] = cumulative_movies[segment_ends] - cumulative_movies[director_starts]
+    careers['cumulative_votes'] = cumulative_votes[segment_ends] - cumulative_votes[director_starts]
+
+    return careers
+
+
+def career_peaks(careers_df, director_column='nconst', name_column='primaryName'):
+    """
+    Summarize the careers of director_careers to one row per director with its peak window.
+
+    The peak is the window with the highest rolling mean score (the earliest on ties); the segments of every
+    director are contiguous, so the peaks are segmented reductions over the careers without grouping.
+
+    Args:
+    careers_df (pd.DataFrame): DataFrame returned by director_careers.
+    director_column (str): The column name of the unique director identifier.
+    name_column (str): The column name of the director name, kept when present.
+
+    Returns:
+    pd.DataFrame: DataFrame with the director (and name), 'first_year', 'last_year', 'active_years',
+        'total_movies', 'total_votes', 'peak_score', 'peak_start_year' and 'peak_end_year' columns, sorted by
+        'peak_score'.
+    """
+    directors = careers_df[director_column].to_numpy()
+    new_director = np.ones(len(directors), dtype=bool)
+    new_director[1:] = directors[1:] != directors[:-1]
+    starts = np.flatnonzero(new_director)
+    ends = np.append(starts[1:], len(directors)) - 1
+
+    rolling_mean = careers_df['rolling_mean_score'].to_numpy(dtype=np.float64)
+    if len(starts):
+        peak_scores = np.fmax.reduceat(rolling_mean, starts)
+    else:
+        peak_scores = rolling_mean
+    # The earliest segment of every director reaching its peak, NaN peaks pointing to the director's last segment
+    segment_directors = np.cumsum(new_director) - 1
+    is_peak = rolling_mean == peak_scores[segment_directors]
+    candidates = np.where(is_peak, np.arange(len(directors)), ends[segment_directors])
+    peak_rows = np.minimum.reduceat(candidates, starts) if len(starts) else candidates
+
+    peaks = pd.DataFrame({director_column: directors[starts]})
+    if name_column in careers_df.columns and name_column != director_column:
+        peaks[name_column] = careers_df[name_column].to_numpy()[starts]
+    years = careers_df['year'].to_numpy()
+    peaks['first_year'] = years[starts]
+    peaks['last_year'] = years[ends]
+    peaks['active_years'] = ends - starts + 1
+    peaks['total_movies'] = careers_df['cumulative_movies'].to_numpy()[ends]
+    peaks['total_votes'] = careers_df['cumulative_votes'].to_numpy()[ends]
+    peaks['peak_score'] = peak_scores
+    peaks['peak_start_year'] = careers_df['window_start_year'].to_numpy()[peak_rows]
+    peaks['peak_end_year'] = years[peak_rows]
+
+    return peaks.sort_values('peak_score', ascending=False, kind='stable').reset_index(drop=True)
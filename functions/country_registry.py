@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the ISO-3166 country codes file used by the analysis
+CODE_COLUMNS = ('name', 'alpha-2', 'alpha-3')
+
+
+class CountryRegistry:
+    """
+    One-time lookup structure over the ISO-3166 country codes DataFrame.
+
+    Every code column (name, alpha-2, alpha-3, ...) gets a hash index built once, so mapping or filtering a
+    country column is a single vectorized indexer lookup followed by a take, instead of a merge or a set rebuild
+    on every call.
+    """
+
+    def __init__(self, country_codes_df, code_columns=CODE_COLUMNS):
+        self.columns = {column: country_codes_df[column].to_numpy(dtype=object) for column in country_codes_df.columns}
+        self.indexes = {}
+        self.positions = {}
+        for column in code_columns:
+            if column not in country_codes_df.columns:
+                continue
+            # Index the first occurrence of every code, remembering its row in the registry
+            first = ~country_codes_df[column].duplicated().to_numpy()
+            self.indexes[column] = pd.Index(self.columns[column][first])
+            self.positions[column] = np.flatnonzero(first)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def codes(self, column):
+        """Return the index of the codes in the given column."""
+        return self.indexes[column]
+
+    def lookup(self, values, from_column):
+        """
+        Find the registry row of every value.
+
+        Args:
+        values (array-like): Country codes or names.
+        from_column (str): The registry column the values come from, e.g. 'alpha-2'.
+
+        Returns:
+        np.ndarray: Registry row of every value, -1 for values not in the registry.
+        """
+        rows = self.indexes[from_column].get_indexer(pd.Index(values))
+        return np.where(rows >= 0, self.positions[from_column][rows], -1)
+
+    def take(self, rows, to_column):
+        """Return the values of to_column at the given registry rows, with None for rows equal to -1."""
+        taken = self.columns[to_column].take(np.where(rows >= 0, rows, 0))
+        taken[rows < 0] = None
+        return taken
+
+    def map(self, values, from_column='alpha-2', to_column='name'):
+        """
+        Map country codes from one column of the registry to another.
+
+        Args:
+        values (array-like): Country codes or names to map.
+        from_column (str): The registry column the values come from.
+        to_column (str): The registry column to map to.
+
+        Returns:
+        tuple: A tuple containing:
+            - mapped (np.ndarray): The mapped values, None where the value is not in the registry.
+            - unmatched (list): The distinct values not found in the registry, in order of appearance.
+        """
+        rows = self.lookup(values, from_column)
+        unmatched = pd.unique(np.asarray(values, dtype=object)[rows < 0]).tolist()
+        return self.take(rows, to_column), unmatched
+
+    def contains(self, values, column):
+        """Return a boolean array telling which values are codes of the given column."""
+        return self.indexes[column].get_indexer(pd.Index(values)) >= 0
+
+    def categorical(self, values, column):
+        """Return the values as a Categorical with the registry codes of the column as categories."""
+        return pd.Categorical(values, categories=self.indexes[column].dropna())
@@ -0,0 +1,276 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+
+from functions.merge_audit import active_audit
+
+# Execution backends of the task functions; pandas is the default, the others are optional dependencies
+ENGINES = ('pandas', 'polars', 'duckdb')
+# Environment variable choosing the engine used when a task function gets engine=None
+ENGINE_VARIABLE = 'IMDB_ENGINE'
+# Join types supported by the columnar engines (pandas orders the keys of outer joins differently)
+ENGINE_JOINS = ('inner', 'left', 'right')
+
+
+def resolve_engine(engine=None):
+    """
+    Return the name of the engine to use, checking that it is installed.
+
+    Args:
+    engine (str, optional): 'pandas', 'polars' or 'duckdb'. Defaults to the IMDB_ENGINE environment variable,
+        then to 'pandas'.
+
+    Returns:
+    str: The engine name.
+    """
+    engine = engine or os.environ.get(ENGINE_VARIABLE) or 'pandas'
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}. Choose one of {', '.join(ENGINES)}")
+    if engine != 'pandas' and importlib.util.find_spec(engine) is None:
+        raise ImportError(f"The {engine} engine requires the '{engine}' package: pip install {engine}")
+    return engine
+
+
+def available_engines():
+    """Return the engines installed in the current environment."""
+    return [engine for engine in ENGINES if engine == 'pandas' or importlib.util.find_spec(engine) is not None]
+
+
+# Names of the row positions added to the frames joined by DuckDB, to restore the pandas row order
+LEFT_ROW, RIGHT_ROW = '__left_row__', '__right_row__'
+# Name of the right key column while Polars joins two columns of the same name
+RIGHT_KEY = '__right_key__'
+
+
+def _join_columns(left, right, left_on, right_on, suffixes):
+    """Return the output names of the left and right columns of a join, as pandas.merge names them."""
+    right_columns = [column for column in right.columns if not (left_on == right_on and column == right_on)]
+    overlap = set(left.columns) & set(right_columns)
+    left_names = {column: column + suffixes[0] if column in overlap else column for column in left.columns}
+    right_names = {column: column + suffixes[1] if column in overlap else column for column in right_columns}
+    return left_names, right_names
+
+
+def _to_pandas_dtypes(result, frames_names):
+    """
+    Give the columns of an engine output the dtypes pandas.merge gives them.
+
+    Integers of numpy dtype become float64 when they have missing values, as in pandas, while the columns of an
+    extension dtype in the inputs (categorical, nullable Int64, boolean, string) get back their dtype.
+    """
+    for column in result.columns:
+        dtype = result[column].dtype
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype) and not isinstance(dtype, pd.CategoricalDtype):
+            if pd.api.types.is_integer_dtype(dtype):
+                result[column] = result[column].astype(np.float64 if result[column].hasnans else dtype.numpy_dtype)
+            elif pd.api.types.is_bool_dtype(dtype):
+                result[column] = result[column].astype(object if result[column].hasnans else bool)
+    for frame, names in frames_names:
+        for column, name in names.items():
+            if isinstance(frame[column].dtype, pd.api.extensions.ExtensionDtype):
+                result[name] = result[name].astype(frame[column].dtype)
+    return result
+
+
+def _polars_join(left, right, left_on, right_on, how, suffixes):
+    import polars as pl
+
+    left_names, right_names = _join_columns(left, right, left_on, right_on, suffixes)
+    same_key = left_on == right_on
+    left_frame = pl.from_pandas(left).rename(left_names)
+    right_frame = pl.from_pandas(right).rename({**right_names, **({right_on: RIGHT_KEY} if same_key else {})})
+    left_key, right_key = left_names[left_on], RIGHT_KEY if same_key else right_names[right_on]
+
+    # Categorical keys are joined on their values
+    keys = []
+    for frame, key in [(left_frame, left_key), (right_frame, right_key)]:
+        keys.append(pl.col(key).cast(pl.String) if isinstance(frame.schema[key], (pl.Categorical, pl.Enum))
+                    else pl.col(key))
+    joined = left_frame.join(right_frame, left_on=keys[0], right_on=keys[1], how=how, coalesce=False,
+                             nulls_equal=True, maintain_order='right_left' if how == 'right' else 'left_right')
+    if same_key:
+        if how == 'right':
+            joined = joined.with_columns(pl.coalesce(left_key, RIGHT_KEY).alias(left_key))
+        joined = joined.drop(RIGHT_KEY)
+    result = joined.select(list(left_names.values()) + list(right_names.values())).to_pandas()
+    return _to_pandas_dtypes(result, [(left, left_names), (right, right_names)])
+
+
+def _duckdb_join(left, right, left_on, right_on, how, suffixes):
+    import duckdb
+
+    left_names, right_names = _join_columns(left, right, left_on, right_on, suffixes)
+    selected = [f'l."{column}" AS "{name}"' for column, name in left_names.items()]
+    if left_on == right_on and how == 'right':
+        selected[list(left_names).index(left_on)] = f'coalesce(l."{left_on}", r."{right_on}") AS "{left_on}"'
+    selected += [f'r."{column}" AS "{name}"' for column, name in right_names.items()]
+    order = f'r.{RIGHT_ROW}, l.{LEFT_ROW}' if how == 'right' else f'l.{LEFT_ROW}, r.{RIGHT_ROW}'
+
+    with duckdb.connect() as connection:
+        connection.register('left_frame', left.assign(**{LEFT_ROW: np.arange(len(left))}))
+        connection.register('right_frame', right.assign(**{RIGHT_ROW: np.arange(len(right))}))
+        # pandas matches missing keys with each other, hence IS NOT DISTINCT FROM
+        result = connection.execute(
+            f'SELECT {", ".join(selected)} FROM left_frame l {how.upper()} JOIN right_frame r '
+            f'ON l."{left_on}" IS NOT DISTINCT FROM r."{right_on}" ORDER BY {order}').df()
+    return _to_pandas_dtypes(result, [(left, left_names), (right, right_names)])
+
+
+def _polars_group_sums(keys, values):
+    import polars as pl
+
+    frame = pl.DataFrame([pl.from_pandas(keys).alias('key')] +
+                         [pl.from_pandas(series).alias(name) for name, series in values.items()])
+    sums = frame.drop_nulls('key').group_by('key').agg(pl.col(name).sum() for name in values).sort('key')
+    return sums.to_pandas()
+
+
+def _duckdb_group_sums(keys, values):
+    import duckdb
+
+    frame = pd.DataFrame({'key': keys.reset_index(drop=True),
+                          **{name: series.reset_index(drop=True) for name, series in values.items()}})
+    sums_sql = ', '.join(
+        f"CAST(coalesce(sum(\"{name}\"), 0) AS {'BIGINT' if pd.api.types.is_integer_dtype(series) else 'DOUBLE'}) "
+        f"AS \"{name}\"" for name, series in values.items())
+    with duckdb.connect() as connection:
+        connection.register('grouped', frame)
+        return connection.execute(
+            f"SELECT key, {sums_sql} FROM grouped WHERE key IS NOT NULL GROUP BY key ORDER BY key").df()
+
+
+ENGINE_JOIN = {'polars': _polars_join, 'duckdb': _duckdb_join}
+GROUP_SUMS = {'polars': _polars_group_sums, 'duckdb': _duckdb_group_sums}
+
+
+def join(left, right, left_on, right_on=None, how='inner', engine=None, suffixes=('_x', '_y'), label=None):
+    """
+    Join two DataFrames on one key column, with the output (rows, order, columns) of pandas.merge.
+
+    On Polars or DuckDB the whole join runs on the engine: the frames are converted once on the way in and the
+    result once on the way out, with the pandas row order, column names and dtypes. Only the ENGINE_JOINS types
+    run on the engines; other types (e.g. 'outer', whose key order the engines do not reproduce) always run on
+    pandas, whatever the engine.
+
+    Args:
+    left (pd.DataFrame): Left DataFrame.
+    right (pd.DataFrame): Right DataFrame.
+    left_on (str): Key column of the left DataFrame.
+    right_on (str, optional): Key column of the right DataFrame. Defaults to left_on.
+    how (str): 'inner', 'left' or 'right' on any engine, or another pandas.merge type run on pandas.
+    engine (str, optional): The engine running the join, see resolve_engine.
+    suffixes (tuple): Suffixes of the overlapping non-key columns, as in pandas.merge.
+    label (str, optional): Name of the join in the records of an active merge_audit.MergeAudit.
+
+    Returns:
+    pd.DataFrame: The joined DataFrame.
+    """
+    right_on = right_on or left_on
+    engine = resolve_engine(engine) if how in ENGINE_JOINS else 'pandas'
+
+    audit = active_audit()
+    record = audit.before_join(left, right, left_on, right_on, how, engine, label) if audit is not None else None
+    if engine == 'pandas':
+        result = left.merge(right, left_on=left_on, right_on=right_on, how=how, suffixes=suffixes)
+    else:
+        result = ENGINE_JOIN[engine](left, right, left_on, right_on, how, suffixes)
+    if record is not None:
+        audit.after_join(record, result)
+    return result
+
+
+def group_sums(df, by, columns, engine=None):
+    """
+    Sum columns by group on the given engine, skipping missing values as pandas does.
+
+    Args:
+    df (pd.DataFrame): DataFrame to aggregate.
+    by (str): The grouping column; rows with a missing group are dropped, as by DataFrame.groupby.
+    columns (dict): Output name -> Series (aligned with df) or column name to sum.
+    engine (str, optional): The engine running the aggregation, see resolve_engine.
+
+    Returns:
+    pd.DataFrame: DataFrame with the sorted groups in the 'by' column and one column of sums per output name.
+    """
+    engine = resolve_engine(engine)
+    values = {}
+    for name, column in columns.items():
+        series = df[column] if isinstance(column, str) else column
+        if pd.api.types.is_bool_dtype(series):
+            series = series.astype(np.float64 if series.hasnans else np.int64)
+        elif not pd.api.types.is_numeric_dtype(series):
+            series = pd.to_numeric(series, errors='coerce')
+        values[name] = series
+
+    if engine == 'pandas':
+        codes, groups = pd.factorize(df[by], sort=True)
+        present = codes >= 0
+        frame = pd.DataFrame({name: series.to_numpy()[present] for name, series in values.items()})
+        sums = frame.fillna(0).groupby(codes[present]).sum()
+        result = pd.DataFrame({by: groups.take(sums.index.to_numpy())})
+        for name in values:
+            result[name] = sums[name].to_numpy()
+        return result
+
+    # Categorical groups are sorted in the order of their categories, as by pandas, so their codes are grouped
+    keys = df[by]
+    categories = keys.dtype if isinstance(keys.dtype, pd.CategoricalDtype) else None
+    if categories is not None:
+        keys = keys.cat.codes.where(keys.cat.codes >= 0)
+    sums = GROUP_SUMS[engine](keys, values)
+
+    group_keys = sums['key']
+    if categories is not None:
+        group_keys = pd.Categorical.from_codes(group_keys.to_numpy(np.int64), dtype=categories)
+    result = pd.DataFrame({by: group_keys})
+    for name in values:
+        result[name] = sums[name].to_numpy()
+    return result
+
+
+def group_statistics(df, by, column, statistics, engine=None):
+    """
+    Compute sum, mean, size, count or weighted mean statistics of a column by group, as DataFrame.groupby.
+
+    Args:
+    df (pd.DataFrame): DataFrame to aggregate.
+    by (str): The grouping column.
+    column (str): The aggregated column.
+    statistics (list): Statistics among 'sum', 'mean', 'size', 'count' and ('weighted_mean', weight_column).
+    engine (str, optional): The engine running the aggregation, see resolve_engine.
+
+    Returns:
+    pd.DataFrame: DataFrame with the sorted groups and one column per statistic, named as the statistic
+        ('weighted_mean' for weighted means, missing for groups with a missing value or weight, as np.average).
+    """
+    values = df[column]
+    valid = values.notna().astype(np.int64)
+    sums = {'sum': values, 'valid': valid, 'size': pd.Series(np.ones(len(df), dtype=np.int64), index=df.index)}
+    for statistic in statistics:
+        if isinstance(statistic, tuple):
+            weights = pd.to_numeric(df[statistic[1]], errors='coerce')
+            sums['weighted_sum'] = values * weights
+            sums['weight'] = weights
+            # As np.average, a group with any missing value or weight has no weighted mean
+            sums['weighted_missing'] = (values.isna() | weights.isna()).astype(np.int64)
+    sums = group_sums(df, by, sums, engine)
+
+    result = sums[[by]].copy()
+    for statistic in statistics:
+        if statistic == 'sum':
+            result['sum'] = sums['sum']
+        elif statistic == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result['mean'] = sums['sum'] / sums['valid']
+        elif statistic == 'size':
+            result['size'] = sums['size'].astype(np.int64)
+        elif statistic == 'count':
+            result['count'] = sums['valid'].astype(np.int64)
+        elif isinstance(statistic, tuple) and statistic[0] == 'weighted_mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result['weighted_mean'] = (sums['weighted_sum'] / sums['weight']).where(sums['weighted_missing'] == 0)
+        else:
+            raise ValueError(f"Unknown statistic: {statistic}")
+    return result
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from functions.name_index import nconst_to_id
+
+# Year of the movies without a start year
+MISSING_YEAR = -1
+# Columns of the movie facts, named as in the movies DataFrame of task 1
+MOVIE_COLUMNS = ('tconst', 'startYear', 'averageRating', 'numVotes', 'composite_score', 'country')
+# Columns of the director attributes, named as in name.basics ('directors' is the crew column, equal to 'nconst')
+DIRECTOR_COLUMNS = ('nconst', 'directors', 'primaryName', 'primaryProfession', 'professionFlags')
+
+
+def tconst_to_id(tconsts):
+    """Convert tconst identifiers (e.g. 'tt0000001') to their integer ids, -1 for invalid values."""
+    return nconst_to_id(tconsts)
+
+
+def id_to_const(ids, prefix):
+    """Convert integer ids back to IMDb identifiers with the given prefix ('tt' or 'nm')."""
+    return np.char.add(prefix, np.char.zfill(np.asarray(ids).astype(str), 7)).astype(object)
+
+
+class MovieFacts:
+    """
+    Narrow table of movie facts, materialized once per run and shared by the three tasks.
+
+    Every movie (sorted by composite score, as the movies DataFrame of task 1) is a row of integer tconst, year,
+    rating, votes, composite score and country code arrays. The directors of movie i are
+    director_values[director_offsets[i]:director_offsets[i + 1]], codes into the small directors table, so the
+    movie-director pairs of task 3 are expanded with a repeat instead of joining crew, names and movies again.
+
+    Args:
+    tconst (np.ndarray): Integer title ids.
+    year (np.ndarray): Start years, MISSING_YEAR when unknown.
+    rating (np.ndarray): Average ratings.
+    votes (np.ndarray): Numbers of votes.
+    composite_score (np.ndarray): Composite scores.
+    country_codes (np.ndarray): Codes of the countries in the countries array.
+    countries (np.ndarray): Country (region) names.
+    director_offsets (np.ndarray): Start of the directors of every movie in director_values, plus the total.
+    director_values (np.ndarray): Codes of the directors in the directors table.
+    directors (pd.DataFrame): One row per director code with the DIRECTOR_COLUMNS available in name.basics.
+    """
+
+    def __init__(self, tconst, year, rating, votes, composite_score, country_codes, countries, director_offsets,
+                 director_values, directors):
+        self.tconst = tconst
+        self.year = year
+        self.rating = rating
+        self.votes = votes
+        self.composite_score = composite_score
+        self.country_codes = country_codes
+        self.countries = countries
+        self.director_offsets = director_offsets
+        self.director_values = director_values
+        self.directors = directors
+
+    @classmethod
+    def from_movies(cls, movies_df, crew_df, names_df, director_column='directors'):
+        """
+        Build the facts from the movies DataFrame of task 1 and the crew and names DataFrames.
+
+        A movie is credited to its crew directors value when that value is an nconst of names_df, as by the joins
+        of prepare_movies_directors: movies with comma-separated (co-directed) director lists or with directors
+        missing from names_df have no director, so both paths rank the same movies.
+
+        Args:
+        movies_df (pd.DataFrame): DataFrame of movies with country and composite score information.
+        crew_df (pd.DataFrame): DataFrame of title.crew.
+        names_df (pd.DataFrame): DataFrame of name.basics.
+        director_column (str): The crew column with the directors.
+
+        Returns:
+        MovieFacts: The facts.
+        """
+        country_codes, countries = pd.factorize(movies_df['country'])
+
+        # Name row of the director of every crew title, -1 when it is not a known nconst
+        crew_df = crew_df[['tconst', director_column]].dropna().drop_duplicates('tconst')
+        name_rows = pd.Index(names_df['nconst']).get_indexer(crew_df[director_column])
+
+        # Gather the director of every movie from its crew title, without materializing a join
+        crew_rows = pd.Index(crew_df['tconst']).get_indexer(movies_df['tconst'])
+        movie_name_rows = np.full(len(crew_rows), -1, dtype=np.int64)
+        matched = crew_rows >= 0
+        movie_name_rows[matched] = name_rows[crew_rows[matched]]
+        has_director = movie_name_rows >= 0
+        offsets = np.concatenate(([0], np.cumsum(has_director))).astype(np.int64)
+        movie_name_rows = movie_name_rows[has_director]
+
+        # Keep a compact directors table of the directors of the movies only
+        director_values, used_rows = pd.factorize(movie_name_rows, sort=True)
+        directors = names_df.iloc[used_rows][[column for column in DIRECTOR_COLUMNS if column in names_df.columns]]
+
+        return cls(
+            tconst=tconst_to_id(movies_df['tconst']).astype(np.int32),
+            year=pd.to_numeric(movies_df['startYear'], errors='coerce').fillna(MISSING_YEAR).to_numpy(np.int16),
+            rating=movies_df['averageRating'].to_numpy(np.float64),
+            votes=movies_df['numVotes'].to_numpy(),
+            composite_score=movies_df['composite_score'].to_numpy(np.float64),
+            country_codes=country_codes.astype(np.int16),
+            countries=np.asarray(countries, dtype=object),
+            director_offsets=offsets,
+            director_values=director_values.astype(np.int32),
+            directors=directors.reset_index(drop=True)
+        )
+
+    def filter_years(self, start_year=None, end_year=None):
+        """
+        Keep only the movies started within a year range, as filtering startYear of the movies DataFrame does.
+
+        Args:
+        start_year (int, optional): First year kept.
+        end_year (int, optional): Last year kept.
+
+        Returns:
+        MovieFacts: The facts of the kept movies, sharing the directors table.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if start_year is not None:
+            keep &= self.year >= start_year
+        if end_year is not None:
+            # Movies without a start year are dropped, as NaN years fail the comparisons of a DataFrame filter
+            keep &= (self.year <= end_year) & (self.year != MISSING_YEAR)
+
+        counts = np.diff(self.director_offsets)
+        return MovieFacts(
+            tconst=self.tconst[keep],
+            year=self.year[keep],
+            rating=self.rating[keep],
+            votes=self.votes[keep],
+            composite_score=self.composite_score[keep],
+            country_codes=self.country_codes[keep],
+            countries=self.countries,
+            director_offsets=np.concatenate(([0], np.cumsum(counts[keep]))).astype(np.int64),
+            director_values=self.director_values[np.repeat(keep, counts)],
+            directors=self.directors
+        )
+
+    @property
+    def columns(self):
+        """Columns available to director_rows: the MOVIE_COLUMNS and the director columns of name.basics."""
+        director_columns = [column for column in DIRECTOR_COLUMNS if column in self.directors.columns or
+                            (column == 'directors' and 'nconst' in self.directors.columns)]
+        return list(MOVIE_COLUMNS) + director_columns
+
+    def __len__(self):
+        return len(self.tconst)
+
+    def _movie_column(self, column, rows=None):
+        if column == 'tconst':
+            values = id_to_const(self.tconst if rows is None else self.tconst[rows], 'tt')
+            return values
+        if column == 'startYear':
+            year = self.year if rows is None else self.year[rows]
+            return np.where(year == MISSING_YEAR, np.nan, year)
+        if column == 'country':
+            codes = self.country_codes if rows is None else self.country_codes[rows]
+            return self.countries.take(codes)
+        values = {'averageRating': self.rating, 'numVotes': self.votes, 'composite_score': self.composite_score}
+        return values[column] if rows is None else values[column][rows]
+
+    def to_frame(self, columns=MOVIE_COLUMNS):
+        """
+        Materialize movie columns as a DataFrame, one row per movie in composite score order.
+
+        Args:
+        columns (list): Columns among MOVIE_COLUMNS.
+
+        Returns:
+        pd.DataFrame: The movies DataFrame.
+        """
+        return pd.DataFrame({column: self._movie_column(column) for column in columns})
+
+    def director_rows(self, columns=MOVIE_COLUMNS + DIRECTOR_COLUMNS):
+        """
+        Materialize one row per movie and director, as prepare_movies_directors does, for the given columns.
+
+        Args:
+        columns (list): Columns among MOVIE_COLUMNS and DIRECTOR_COLUMNS; unavailable director columns are skipped.
+
+        Returns:
+        pd.DataFrame: The movies-directors DataFrame.
+        """
+        movie_rows = np.repeat(np.arange(len(self)), np.diff(self.director_offsets))
+        data = {}
+        for column in dict.fromkeys(columns):
+            if column in MOVIE_COLUMNS:
+                data[column] = self._movie_column(column, movie_rows)
+            elif column == 'directors' and 'nconst' in self.directors.columns:
+                data[column] = self.directors['nconst'].to_numpy()[self.director_values]
+            elif column in self.directors.columns:
+                data[column] = self.directors[column].to_numpy()[self.director_values]
+        return pd.DataFrame(data)
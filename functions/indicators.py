@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+
+class IndicatorTable:
+    """
+    Compact country x year representation of a World Bank indicator (GDP, population, ...).
+
+    Values are kept in a single float array with one row per country and one column per year. Years are stored
+    as integers and are contiguous, so a year maps to its column by subtraction; countries map to their row
+    through an index of country codes. Year-range slicing returns a view sharing the same array.
+    """
+
+    def __init__(self, values, first_year, country_codes, country_names):
+        self.values = values
+        self.first_year = first_year
+        self.country_codes = pd.Index(country_codes)
+        self.country_names = np.asarray(country_names, dtype=object)
+
+    @classmethod
+    def from_frame(cls, df, start_column=4, code_column='Country Code', name_column='Country Name'):
+        """
+        Build the table from a wide World Bank DataFrame with string year columns.
+
+        Args:
+        df (pd.DataFrame): DataFrame as loaded with load_data from the World Bank CSV file.
+        start_column (int): The index of the first year column. Default is 4.
+        code_column (str): The column with the ISO alpha-3 country codes.
+        name_column (str): The column with the country names.
+
+        Returns:
+        IndicatorTable: The indicator table.
+        """
+        year_columns = [col for col in df.columns[start_column:] if str(col).isdigit()]
+        years = np.array([int(col) for col in year_columns])
+        if len(years) == 0:
+            raise ValueError("The DataFrame has no year columns.")
+        if not np.array_equal(years, np.arange(years[0], years[0] + len(years))):
+            raise ValueError("The year columns must be contiguous and sorted.")
+
+        values = df[year_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+        codes = df[code_column] if code_column in df.columns else df[name_column]
+        return cls(values, int(years[0]), codes, df[name_column].to_numpy())
+
+    @property
+    def years(self):
+        """Integer years of the table columns."""
+        return np.arange(self.first_year, self.first_year + self.values.shape[1])
+
+    def year_range(self):
+        """Return the first and the last year of the table."""
+        return self.first_year, self.first_year + self.values.shape[1] - 1
+
+    def year_index(self, year):
+        """Return the column of the given year (int or str)."""
+        index = int(year) - self.first_year
+        if not 0 <= index < self.values.shape[1]:
+            raise KeyError(f"Year {year} is not in the table.")
+        return index
+
+    def slice_years(self, start_year, end_year):
+        """Return a table restricted to the years [start_year, end_year], sharing the same values array."""
+        first, last = self.year_range()
+        start_year, end_year = max(int(start_year), first), min(int(end_year), last)
+        if start_year > end_year:
+            raise ValueError("The specified range does not overlap with the data range.")
+        values = self.values[:, start_year - first:end_year - first + 1]
+        return IndicatorTable(values, start_year, self.country_codes, self.country_names)
+
+    def select_countries(self, country_codes):
+        """Return a table restricted to the countries whose code is in country_codes, keeping the table order."""
+        rows = self.country_codes.isin(country_codes)
+        return IndicatorTable(self.values[rows], self.first_year, self.country_codes[rows], self.country_names[rows])
+
+    def column(self, year):
+        """Return the values of all the countries for the given year."""
+        return self.values[:, self.year_index(year)]
+
+    def value(self, country_code, year):
+        """Return the value of one country for one year."""
+        return self.values[self.country_codes.get_loc(country_code), self.year_index(year)]
+
+    def to_frame(self, year):
+        """Return a DataFrame with 'Country Name' and the year column, sorted by the year values as in task2."""
+        df = pd.DataFrame({'Country Name': self.country_names, str(year): self.column(year)})
+        return df.sort_values(by=str(year), ascending=False)
+
+
+def gdp_per_population(gdp, population, year):
+    """
+    Calculate GDP per population for each country from two indicator tables.
+
+    Countries are aligned by country code with one indexer lookup, so no per-country filtering is needed.
+
+    Args:
+    gdp (IndicatorTable): GDP indicator table.
+    population (IndicatorTable): Population indicator table.
+    year (int or str): The year the GDP and population values are taken from.
+
+    Returns:
+    pd.DataFrame: DataFrame with 'index' (country name) and 'gdp_per_population' columns, sorted descending,
+        as returned by task2_functions.calculate_gdp_per_population.
+    """
+    rows = population.country_codes.get_indexer(gdp.country_codes)
+    population_values = np.where(rows >= 0, population.column(year)[rows], np.nan)
+
+    gdp_pop_df = pd.DataFrame({'index': gdp.country_names,
+                               'gdp_per_population': gdp.column(year) / population_values})
+    gdp_pop_df.sort_values(by='gdp_per_population', ascending=False, inplace=True)
+
+    return gdp_pop_df
@@ -0,0 +1,416 @@
+import operator
+import os
+
+import pandas as pd
+
+from functions.utilities import clean_data
+from functions.task1_functions import quality_of_movies_by_country
+from functions.task2_functions import (
+    total_votes_by_country,
+    average_composite_score_by_country,
+    weighted_average_composite_score_by_country
+)
+from functions.task3_functions import prepare_movies_directors, rank_directors, custom_ranking
+
+# Columns read by the task functions wrapped as plan nodes
+COUNTRY_COLUMNS = ['tconst', 'titleId', 'title', 'region', 'isOriginalTitle', 'averageRating', 'numVotes']
+# Columns of title.akas, with several values per title: quality_of_movies_by_country fills the country of a title
+# from its other akas rows, so filtering them before the task changes its result
+AKAS_COLUMNS = ['titleId', 'ordering', 'title', 'region', 'language', 'types', 'attributes', 'isOriginalTitle']
+COUNTRY_AGGREGATIONS = {
+    'total_votes': (total_votes_by_country, ['country', 'numVotes'], ['country', 'number of votes']),
+    'average_score': (average_composite_score_by_country, ['country', 'composite_score'],
+                      ['country', 'average composite score']),
+    'weighted_average_score': (weighted_average_composite_score_by_country, ['country', 'composite_score', 'numVotes'],
+                               ['country', 'weighted average composite score'])
+}
+
+
+class Predicate:
+    """A simple row filter 'column op value' that can be pushed down to the file readers."""
+
+    OPERATORS = {
+        '==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+        'in': lambda series, values: series.isin(values)
+    }
+
+    def __init__(self, column, op, value):
+        if op not in self.OPERATORS:
+            raise ValueError(f"Unsupported operator: {op}")
+        self.column = column
+        self.op = op
+        self.value = value
+
+    def mask(self, df):
+        """Return the boolean mask of the rows of df satisfying the predicate (missing values never match)."""
+        series = df[self.column]
+        if isinstance(self.value, (int, float)) and not isinstance(self.value, bool):
+            series = pd.to_numeric(series, errors='coerce')
+        return self.OPERATORS[self.op](series, self.value).fillna(False).astype(bool)
+
+    def __repr__(self):
+        return f"{self.column} {self.op} {self.value!r}"
+
+
+def _apply_predicates(df, predicates):
+    """Keep the rows of df satisfying all the predicates."""
+    for predicate in predicates:
+        df = df[predicate.mask(df)]
+    return df
+
+
+def _needed(columns, extra):
+    """Add the extra columns to a set of needed columns (None meaning all the columns)."""
+    return None if columns is None else set(columns) | set(extra)
+
+
+class PlanNode:
+    """Base class of the lazy plan nodes."""
+
+    inputs = ()
+
+    def schema(self):
+        """Return the list of the output columns of the node."""
+        raise NotImplementedError
+
+    def optimize(self, columns, predicates):
+        """
+        Return an optimized copy of the node producing at least the given columns and satisfying the predicates.
+
+        Args:
+        columns (set or None): Columns needed by the consumers of the node, None for all the columns.
+        predicates (list): Predicates pushed down from the consumers of the node.
+
+        Returns:
+        PlanNode: The optimized node.
+        """
+        raise NotImplementedError
+
+    def execute(self):
+        """Compute the DataFrame of the (optimized) node."""
+        raise NotImplementedError
+
+    def describe(self):
+        return type(self).__name__
+
+    def explain(self, indent=0):
+        lines = ['  ' * indent + self.describe()]
+        for node in self.inputs:
+            lines.append(node.explain(indent + 1))
+        return '\n'.join(lines)
+
+
+class FilterExec(PlanNode):
+    """Predicates that could not be pushed further down, applied after their input, then a projection."""
+
+    def __init__(self, node, predicates, columns):
+        self.inputs = (node,)
+        self.predicates = predicates
+        self.columns = columns
+
+    def schema(self):
+        return self.inputs[0].schema()
+
+    def describe(self):
+        return f"Filter {self.predicates} -> {sorted(self.columns) if self.columns is not None else 'all'}"
+
+    def execute(self):
+        df = _apply_predicates(self.inputs[0].execute(), self.predicates)
+        if self.columns is not None:
+            df = df[[column for column in df.columns if column in self.columns]]
+        return df
+
+
+def _keep_predicates(node, predicates, columns):
+    """Wrap an optimized node with the predicates kept at its level, if any."""
+    return FilterExec(node, predicates, columns) if predicates else node
+
+
+class Scan(PlanNode):
+    """Reads a CSV or TSV source, loading only the needed columns and the rows satisfying the pushed predicates."""
+
+    def __init__(self, path, header=0, chunksize=1_000_000):
+        self.path = path
+        self.header = header
+        self.chunksize = chunksize
+        self.columns = None
+        self.predicates = []
+        self._schema = None
+
+    def _sep(self):
+        return '\t' if os.path.splitext(self.path)[1].lower() == '.tsv' else ','
+
+    def schema(self):
+        if self._schema is None:
+            self._schema = pd.read_csv(self.path, sep=self._sep(), header=self.header, nrows=0).columns.tolist()
+        return self._schema
+
+    def optimize(self, columns, predicates):
+        scan = Scan(self.path, self.header, self.chunksize)
+        scan._schema = self.schema()
+        scan.columns = [column for column in scan._schema if columns is None or column in columns]
+        scan.predicates = list(predicates)
+        return scan
+
+    def describe(self):
+        return f"Scan {os.path.basename(self.path)} columns={self.columns} predicates={self.predicates}"
+
+    def execute(self):
+        print(f'Scanning data from: {self.path} ...')
+        columns = self.columns if self.columns is not None else self.schema()
+        usecols = set(columns) | {predicate.column for predicate in self.predicates}
+        chunks = []
+        for chunk in pd.read_csv(self.path, sep=self._sep(), header=self.header, low_memory=False,
+                                 usecols=lambda column: column in usecols, chunksize=self.chunksize):
+            chunk = _apply_predicates(clean_data(chunk), self.predicates)
+            chunks.append(chunk[[column for column in columns if column in chunk.columns]])
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+
+
+class Filter(PlanNode):
+    """Row filter; always pushed down as far as the plan allows."""
+
+    def __init__(self, node, predicate):
+        self.inputs = (node,)
+        self.predicate = predicate
+
+    def schema(self):
+        return self.inputs[0].schema()
+
+    def optimize(self, columns, predicates):
+        return self.inputs[0].optimize(columns, predicates + [self.predicate])
+
+
+class Select(PlanNode):
+    """Column projection."""
+
+    def __init__(self, node, columns):
+        self.inputs = (node,)
+        self.columns = list(columns)
+
+    def schema(self):
+        return self.columns
+
+    def optimize(self, columns, predicates):
+        needed = set(self.columns) if columns is None else set(columns) & set(self.columns)
+        return FilterExec(self.inputs[0].optimize(needed, predicates), [], needed)
+
+
+class Merge(PlanNode):
+    """Join of two plans; predicates are pushed to the side owning their column when the join type allows it."""
+
+    def __init__(self, left, right, left_on, right_on, how):
+        self.inputs = (left, right)
+        self.left_on = left_on
+        self.right_on = right_on
+        self.how = how
+
+    def schema(self):
+        left_schema = self.inputs[0].schema()
+        return left_schema + [column for column in self.inputs[1].schema() if column not in left_schema]
+
+    def optimize(self, columns, predicates):
+        left, right = self.inputs
+        left_schema, right_schema = set(left.schema()), set(right.schema())
+        left_predicates, right_predicates, kept = [], [], []
+        for predicate in predicates:
+            if predicate.column in left_schema and self.how in ('left', 'inner'):
+                left_predicates.append(predicate)
+            elif predicate.column in right_schema and self.how in ('right', 'inner'):
+                right_predicates.append(predicate)
+            else:
+                kept.append(predicate)
+
+        needed = _needed(columns, [predicate.column for predicate in kept])
+        left_columns = None if needed is None else (needed & left_schema) | {self.left_on}
+        right_columns = None if needed is None else (needed & right_schema) | {self.right_on}
+
+        merge = Merge(left.optimize(left_columns, left_predicates), right.optimize(right_columns, right_predicates),
+                      self.left_on, self.right_on, self.how)
+        return _keep_predicates(merge, kept, columns)
+
+    def describe(self):
+        return f"Merge {self.left_on} = {self.right_on} how={self.how}"
+
+    def execute(self):
+        left, right = self.inputs
+        return left.execute().merge(right.execute(), left_on=self.left_on, right_on=self.right_on, how=self.how)
+
+
+class TaskNode(PlanNode):
+    """
+    Wraps a task function over one input plan.
+
+    reads are the input columns used by the function, produces the columns it adds, and passthrough tells
+    whether the other input columns are kept in the output (and so whether predicates on them can be pushed
+    below the node). Predicates on the blocked columns stay above the node even when passed through: the
+    function combines several rows of these columns, so removing rows before it changes the other rows' results.
+    """
+
+    def __init__(self, node, function, reads, produces, passthrough, label, blocked=()):
+        self.inputs = (node,)
+        self.function = function
+        self.reads = list(reads)
+        self.produces = list(produces)
+        self.passthrough = passthrough
+        self.label = label
+        self.blocked = list(blocked)
+
+    def schema(self):
+        if not self.passthrough:
+            return self.produces
+        input_schema = self.inputs[0].schema()
+        return input_schema + [column for column in self.produces if column not in input_schema]
+
+    def optimize(self, columns, predicates):
+        touched = set(self.reads) | set(self.produces) | set(self.blocked)
+        pushed = [predicate for predicate in predicates if self.passthrough and predicate.column not in touched]
+        kept = [predicate for predicate in predicates if predicate not in pushed]
+
+        if self.passthrough:
+            needed = _needed(columns, [predicate.column for predicate in kept])
+            input_columns = None if needed is None else (needed - set(self.produces)) | set(self.reads)
+        else:
+            input_columns = set(self.reads)
+
+        node = TaskNode(self.inputs[0].optimize(input_columns, pushed), self.function, self.reads, self.produces,
+                        self.passthrough, self.label, self.blocked)
+        return _keep_predicates(node, kept, columns)
+
+    def describe(self):
+        return self.label
+
+    def execute(self):
+        return self.function(self.inputs[0].execute())
+
+
+class PrepareMoviesDirectors(PlanNode):
+    """prepare_movies_directors over crew, names and movies plans; predicates on movie columns go to the movies."""
+
+    def __init__(self, crew, names, movies):
+        self.inputs = (crew, names, movies)
+
+    def schema(self):
+        schema = []
+        for node in self.inputs:
+            schema += [column for column in node.schema() if column not in schema]
+        return schema
+
+    def optimize(self, columns, predicates):
+        crew, names, movies = self.inputs
+        movies_schema = set(movies.schema())
+        pushed = [predicate for predicate in predicates if predicate.column in movies_schema]
+        kept = [predicate for predicate in predicates if predicate not in pushed]
+
+        needed = _needed(columns, [predicate.column for predicate in kept])
+        crew_columns = None if needed is None else (needed & set(crew.schema())) | {'directors', 'tconst'}
+        names_columns = None if needed is None else (needed & set(names.schema())) | {'nconst'}
+        movies_columns = None if needed is None else (needed & movies_schema) | {'tconst'}
+
+        node = PrepareMoviesDirectors(crew.optimize(crew_columns, []), names.optimize(names_columns, []),
+                                      movies.optimize(movies_columns, pushed))
+        return _keep_predicates(node, kept, columns)
+
+    def execute(self):
+        crew, names, movies = self.inputs
+        return prepare_movies_directors(crew.execute(), names.execute(), movies.execute())
+
+
+class LazyFrame:
+    """
+    Lazy plan over the IMDb and World Bank sources.
+
+    Operations only build the plan. collect() first pushes the column pruning and the filters down to the file
+    readers, then executes the plan, so unneeded columns and rows are never loaded.
+    """
+
+    def __init__(self, node):
+        self.node = node
+
+    def filter(self, column, op, value):
+        """Keep the rows where 'column op value' holds (op is one of ==, !=, <, <=, >, >=, in)."""
+        return LazyFrame(Filter(self.node, Predicate(column, op, value)))
+
+    def select(self, columns):
+        """Keep only the given columns."""
+        return LazyFrame(Select(self.node, columns))
+
+    def merge(self, other, left_on, right_on=None, how='inner'):
+        """Join with another lazy frame."""
+        return LazyFrame(Merge(self.node, other.node, left_on, right_on or left_on, how))
+
+    def filter_movies(self):
+        """Lazy version of task1_functions.filter_movies."""
+        return self.filter('titleType', '==', 'movie')
+
+    def filter_years(self, start_year=None, end_year=None, year_column='startYear'):
+        """Keep the titles released between start_year and end_year (inclusive)."""
+        frame = self
+        if start_year is not None:
+            frame = frame.filter(year_column, '>=', start_year)
+        if end_year is not None:
+            frame = frame.filter(year_column, '<=', end_year)
+        return frame
+
+    def quality_of_movies_by_country(self, top_orders):
+        """Lazy version of task1_functions.quality_of_movies_by_country, producing the movies DataFrame."""
+        function = lambda df: quality_of_movies_by_country(df, top_orders)[1]
+        return LazyFrame(TaskNode(self.node, function, COUNTRY_COLUMNS, ['country', 'composite_score'], True,
+                                  f"QualityOfMoviesByCountry top_orders={top_orders}", blocked=AKAS_COLUMNS))
+
+    def country_aggregation(self, kind):
+        """Lazy version of the task2 country tables ('total_votes', 'average_score' or 'weighted_average_score')."""
+        function, reads, produces = COUNTRY_AGGREGATIONS[kind]
+        return LazyFrame(TaskNode(self.node, function, reads, produces, False, f"CountryAggregation {kind}"))
+
+    def prepare_movies_directors(self, crew, names):
+        """Lazy version of task3_functions.prepare_movies_directors, with self as the movies plan."""
+        return LazyFrame(PrepareMoviesDirectors(crew.node, names.node, self.node))
+
+    def rank_directors(self, director_column, score_column, aggregation='mean'):
+        """Lazy version of task3_functions.rank_directors."""
+        function = lambda df: rank_directors(df, director_column, score_column, aggregation)
+        produces = [director_column, 'aggregated_score', 'total_movies', 'rank']
+        return LazyFrame(TaskNode(self.node, function, [director_column, score_column], produces, False,
+                                  f"RankDirectors {aggregation}({score_column}) by {director_column}"))
+
+    def custom_ranking(self, director_column, score_column, good_threshold=8.0, bad_threshold=5.0):
+        """Lazy version of task3_functions.custom_ranking."""
+        function = lambda df: custom_ranking(df.copy(), director_column, score_column, good_threshold, bad_threshold)
+        produces = [director_column, 'custom_score', 'total_movies', 'rank']
+        return LazyFrame(TaskNode(self.node, function, [director_column, score_column, 'tconst'], produces, False,
+                                  f"CustomRanking({score_column}) by {director_column}"))
+
+    def optimized(self):
+        """Return the plan with column pruning and filters pushed down."""
+        return self.node.optimize(None, [])
+
+    def explain(self):
+        """Return a description of the optimized plan."""
+        return self.optimized().explain()
+
+    def collect(self):
+        """Optimize and execute the plan."""
+        return self.optimized().execute()
+
+
+def scan(path, header=0, chunksize=1_000_000):
+    """Start a lazy plan from a CSV or TSV file (use header=2 for the World Bank files)."""
+    return LazyFrame(Scan(path, header, chunksize))
+
+
+def scan_movies(data_dir):
+    """
+    Lazy version of task1_functions.prepare_data over the IMDb files of a directory.
+
+    Args:
+    data_dir (str): Path to directory with IMDb movie data.
+
+    Returns:
+    LazyFrame: Plan of the merged basics, ratings and akas datasets filtered to movies.
+    """
+    basics = scan(os.path.join(data_dir, 'title.basics.tsv'))
+    ratings = scan(os.path.join(data_dir, 'title.ratings.tsv'))
+    akas = scan(os.path.join(data_dir, 'title.akas.tsv'))
+    merged = basics.merge(ratings, 'tconst', how='left').merge(akas, 'tconst', 'titleId', how='left')
+    return merged.filter_movies()
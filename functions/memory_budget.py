@@ -0,0 +1,237 @@
+import json
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from functions.utilities import parse_memory_size
+
+# Environment variable holding the memory budget of an analysis run, e.g. '4GB'
+MAX_MEMORY_VARIABLE = 'MAX_MEMORY'
+# Share of the budget above which the tracked frames are downcast
+DOWNCAST_THRESHOLD = 0.75
+# Text columns with at most this share of distinct values become categoricals when downcasting
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+# Rows sampled to estimate the size of text columns
+SAMPLE_ROWS = 10000
+SPILL_MANIFEST = 'manifest.json'
+
+
+def frame_bytes(df, sample_rows=SAMPLE_ROWS):
+    """
+    Estimate the in-memory size of a DataFrame, text included.
+
+    Numeric and categorical columns are measured exactly; the size of text columns is extrapolated from a sample
+    of rows, which avoids walking every string of large frames.
+
+    Args:
+    df (pd.DataFrame): The DataFrame to measure.
+    sample_rows (int): Number of rows sampled for text columns.
+
+    Returns:
+    int: The estimated size in bytes.
+    """
+    total = int(df.memory_usage(index=True, deep=False).sum())
+    text_columns = [column for column in df.columns if df[column].dtype == object]
+    if text_columns and len(df):
+        sample = df[text_columns].iloc[:sample_rows]
+        text_bytes = sample.memory_usage(index=False, deep=True).sum() - sample.memory_usage(index=False).sum()
+        total += int(text_bytes * len(df) / len(sample))
+    return total
+
+
+def downcast_frame(df, category_ratio=CATEGORY_MAX_UNIQUE_RATIO):
+    """
+    Shrink the dtypes of a DataFrame: float32 floats (scores), smallest integers (votes) and categorical
+    low-cardinality text columns (regions, title types, countries).
+
+    Args:
+    df (pd.DataFrame): The DataFrame to downcast.
+    category_ratio (float): Largest share of distinct values of a text column converted to a categorical.
+
+    Returns:
+    pd.DataFrame: The downcast DataFrame.
+    """
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_float_dtype(series.dtype):
+            series = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_extension_array_dtype(series.dtype):
+            series = pd.to_numeric(series, downcast='integer')
+        elif series.dtype == object and len(series) and series.nunique() <= category_ratio * len(series):
+            series = series.astype('category')
+        columns[column] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def spill_frame(df, path):
+    """
+    Write a DataFrame to a local columnar directory, one .npy file per column.
+
+    Numeric columns are stored as they are; text and categorical columns as integer codes plus their distinct
+    values, so that the columns can be memory-mapped back.
+
+    Args:
+    df (pd.DataFrame): The DataFrame to write.
+    path (str): The directory to write to, created if needed.
+    """
+    os.makedirs(path, exist_ok=True)
+    manifest = {'columns': [], 'n_rows': len(df)}
+    for number, column in enumerate(df.columns):
+        series = df[column]
+        file_name = f'{number}.npy'
+        if pd.api.types.is_numeric_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype) \
+                and not pd.api.types.is_extension_array_dtype(series.dtype):
+            np.save(os.path.join(path, file_name), series.to_numpy())
+            kind = 'numeric'
+        else:
+            categorical = isinstance(series.dtype, pd.CategoricalDtype)
+            codes, uniques = (series.cat.codes.to_numpy(), series.cat.categories) if categorical else \
+                pd.factorize(series)
+            np.save(os.path.join(path, file_name), codes)
+            np.save(os.path.join(path, f'{number}.values.npy'), np.asarray(uniques, dtype=object), allow_pickle=True)
+            kind = 'categorical' if categorical else 'text'
+        manifest['columns'].append({'name': column, 'file': file_name, 'kind': kind})
+    with open(os.path.join(path, SPILL_MANIFEST), 'w') as file:
+        json.dump(manifest, file)
+
+
+def load_spilled_frame(path, columns=None):
+    """
+    Read back a DataFrame written by spill_frame, memory-mapping its numeric columns and codes.
+
+    Args:
+    path (str): The directory written by spill_frame.
+    columns (list, optional): Columns to read. Defaults to all the columns.
+
+    Returns:
+    pd.DataFrame: The DataFrame.
+    """
+    with open(os.path.join(path, SPILL_MANIFEST)) as file:
+        manifest = json.load(file)
+
+    data = {}
+    for entry in manifest['columns']:
+        if columns is not None and entry['name'] not in columns:
+            continue
+        values = np.load(os.path.join(path, entry['file']), mmap_mode='r')
+        if entry['kind'] != 'numeric':
+            uniques = np.load(os.path.join(path, entry['file'].replace('.npy', '.values.npy')), allow_pickle=True)
+            if entry['kind'] == 'categorical':
+                values = pd.Categorical.from_codes(np.asarray(values), categories=uniques)
+            else:
+                taken = uniques.take(np.where(values >= 0, values, 0)) if len(uniques) else \
+                    np.empty(len(values), dtype=object)
+                taken[np.asarray(values) < 0] = np.nan
+                values = taken
+        data[entry['name']] = values
+    return pd.DataFrame(data, index=pd.RangeIndex(manifest['n_rows']))
+
+
+class MemoryBudget:
+    """
+    Memory budget of an analysis run.
+
+    Frames registered with track() are measured; once their total nears the budget they are downcast, and frames
+    that later stages no longer need are released. Only frames a later stage reads back with load() should be
+    spilled to a local columnar file. The aim is to complete within the budget rather than to be as fast as
+    possible.
+
+    The spilled frames are written to a temporary directory removed by cleanup(), on leaving a with block, when
+    the budget is garbage collected or at exit.
+
+    Args:
+    max_memory (int or str): The budget, e.g. '4GB'.
+    spill_dir (str, optional): Parent directory of the temporary directory of the spilled frames. Defaults to the
+        system temporary directory.
+    downcast_threshold (float): Share of the budget above which the tracked frames are downcast.
+    """
+
+    def __init__(self, max_memory, spill_dir=None, downcast_threshold=DOWNCAST_THRESHOLD):
+        self.max_memory = parse_memory_size(max_memory)
+        self.downcast_threshold = downcast_threshold
+        self.spill_parent_dir = spill_dir
+        self.spill_dir = None
+        self._remove_spill_dir = None
+        self.frames = {}
+        self.sizes = {}
+        self.spilled = {}
+        self.downcast = False
+        self.exceeded = False
+
+    def usage(self):
+        """Return the estimated bytes of the tracked frames."""
+        return sum(self.sizes.values())
+
+    def track(self, name, df):
+        """
+        Register a frame, downcasting the tracked frames if their total nears the budget.
+
+        Args:
+        name (str): Name of the frame.
+        df (pd.DataFrame): The frame.
+
+        Returns:
+        pd.DataFrame: The frame, downcast if the budget required it; use it in place of df.
+        """
+        if self.downcast:
+            df = downcast_frame(df)
+        self.frames[name] = df
+        self.sizes[name] = frame_bytes(df)
+
+        if not self.downcast and self.usage() > self.downcast_threshold * self.max_memory:
+            print(f"Memory usage {self.usage() / 1024 ** 2:.0f}MB is near the budget of "
+                  f"{self.max_memory / 1024 ** 2:.0f}MB, downcasting frames ...")
+            self.downcast = True
+            for frame_name, frame in self.frames.items():
+                self.frames[frame_name] = downcast_frame(frame)
+                self.sizes[frame_name] = frame_bytes(self.frames[frame_name])
+
+        if self.usage() > self.max_memory and not self.exceeded:
+            self.exceeded = True
+            print(f"Warning: tracked frames take {self.usage() / 1024 ** 2:.0f}MB, above the budget of "
+                  f"{self.max_memory / 1024 ** 2:.0f}MB.")
+        return self.frames[name]
+
+    def get(self, name):
+        """Return a tracked frame (callers should re-fetch frames after track() downcasts them)."""
+        return self.frames[name]
+
+    def release(self, name, spill=False):
+        """
+        Stop tracking a frame no longer needed in memory.
+
+        Args:
+        name (str): Name of the frame.
+        spill (bool): Whether to write the frame to the spill directory, so that load() can read it back.
+        """
+        df = self.frames.pop(name)
+        self.sizes.pop(name)
+        if spill:
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix='imdb_spill_', dir=self.spill_parent_dir)
+                self._remove_spill_dir = weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+            self.spilled[name] = os.path.join(self.spill_dir, name)
+            spill_frame(df, self.spilled[name])
+
+    def load(self, name, columns=None):
+        """Read back a spilled frame, see load_spilled_frame."""
+        return load_spilled_frame(self.spilled[name], columns)
+
+    def cleanup(self):
+        """Remove the spill directory with all the spilled frames."""
+        if self._remove_spill_dir is not None:
+            self._remove_spill_dir()
+        self.spill_dir = None
+        self._remove_spill_dir = None
+        self.spilled = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
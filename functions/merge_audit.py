@@ -0,0 +1,156 @@
+import contextvars
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Audits receiving the joins run by engines.join in the current thread or task; empty unless a MergeAudit is active
+_ACTIVE_AUDITS = contextvars.ContextVar('active_merge_audits', default=())
+AUDIT_ACTIONS = ('warn', 'raise', 'record')
+
+
+class MergeFanOutError(ValueError):
+    """Raised before a join whose output would exceed the fan-out threshold of the active audit."""
+
+
+class MergeFanOutWarning(UserWarning):
+    """Warned when a join output exceeds the fan-out threshold of the active audit."""
+
+
+def active_audit():
+    """Return the innermost active MergeAudit, or None when joins are not audited."""
+    audits = _ACTIVE_AUDITS.get()
+    return audits[-1] if audits else None
+
+
+def key_counts(left_keys, right_keys):
+    """
+    Count the rows of every key on both sides of a join.
+
+    The keys of both sides are factorized together, missing keys included since pandas joins them with each other.
+
+    Returns:
+    tuple: The arrays of rows per key code of the left and of the right side.
+    """
+    codes, uniques = pd.factorize(pd.concat([left_keys, right_keys], ignore_index=True), use_na_sentinel=False)
+    left_counts = np.bincount(codes[:len(left_keys)], minlength=len(uniques))
+    right_counts = np.bincount(codes[len(left_keys):], minlength=len(uniques))
+    return left_counts, right_counts
+
+
+def predict_rows(left_counts, right_counts, how):
+    """
+    Compute the number of rows of a join from the key counts of both sides, without running it.
+
+    Args:
+    left_counts (np.ndarray): Rows per key code of the left side, see key_counts.
+    right_counts (np.ndarray): Rows per key code of the right side.
+    how (str): 'inner', 'left', 'right' or 'outer'.
+
+    Returns:
+    int: The number of rows of the join output.
+    """
+    rows = int(np.dot(left_counts, right_counts))
+    if how in ('left', 'outer'):
+        rows += int(left_counts[right_counts == 0].sum())
+    if how in ('right', 'outer'):
+        rows += int(right_counts[left_counts == 0].sum())
+    return rows
+
+
+def duplication_factor(counts):
+    """Return the average number of rows per distinct key of one side."""
+    return counts.sum() / max(np.count_nonzero(counts), 1)
+
+
+def join_cardinality(left_counts, right_counts):
+    """Describe the join as one-to-one, one-to-many, many-to-one or many-to-many."""
+    left_side = 'many' if left_counts.max(initial=0) > 1 else 'one'
+    right_side = 'many' if right_counts.max(initial=0) > 1 else 'one'
+    return f"{left_side}-to-{right_side}"
+
+
+class MergeAudit:
+    """
+    Opt-in auditing of the joins of the task functions (merge_datasets, quality_of_movies_by_country,
+    prepare_movies_directors and anything else going through engines.join).
+
+    Inside a 'with MergeAudit(...)' block every join records its rows in and out, the key duplication factor of
+    both sides, the bytes of the inputs and the output, and its strategy. The output size is predicted from the
+    key counts before the join runs, so a fan-out above max_fan_out can raise before the rows are allocated.
+    Audits are local to the thread (or asyncio task) that entered them, so concurrent queries audit separately.
+
+    Args:
+    max_fan_out (float, optional): Largest allowed ratio of output rows to rows of the preserved side (the left
+        side, or the right side of right joins). None disables the check.
+    action (str): What to do above max_fan_out: 'warn', 'raise' (MergeFanOutError) or 'record' only.
+    deep (bool): Whether to measure the bytes of object columns deeply (exact but slower on large frames).
+    """
+
+    def __init__(self, max_fan_out=None, action='warn', deep=False):
+        if action not in AUDIT_ACTIONS:
+            raise ValueError(f"Audit action must be one of {', '.join(AUDIT_ACTIONS)}")
+        self.max_fan_out = max_fan_out
+        self.action = action
+        self.deep = deep
+        self.records = []
+
+    def __enter__(self):
+        self._token = _ACTIVE_AUDITS.set(_ACTIVE_AUDITS.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _ACTIVE_AUDITS.reset(self._token)
+        return False
+
+    def frame_bytes(self, df):
+        return int(df.memory_usage(index=True, deep=self.deep).sum())
+
+    def before_join(self, left, right, left_on, right_on, how, engine, label=None):
+        """
+        Record the inputs of a join and check its predicted fan-out.
+
+        Returns:
+        dict: The record of the join, completed by after_join.
+        """
+        left_counts, right_counts = key_counts(left[left_on], right[right_on])
+        preserved_rows = len(right) if how == 'right' else len(left)
+        predicted_rows = predict_rows(left_counts, right_counts, how)
+
+        record = {
+            'label': label or f"{left_on} = {right_on}",
+            'how': how,
+            'strategy': f"{engine} hash join, {join_cardinality(left_counts, right_counts)}",
+            'left_rows': len(left),
+            'right_rows': len(right),
+            'left_key_duplication': duplication_factor(left_counts),
+            'right_key_duplication': duplication_factor(right_counts),
+            'left_max_key_rows': int(left_counts.max(initial=0)),
+            'right_max_key_rows': int(right_counts.max(initial=0)),
+            'predicted_rows': predicted_rows,
+            'fan_out': predicted_rows / max(preserved_rows, 1),
+            'input_bytes': self.frame_bytes(left) + self.frame_bytes(right)
+        }
+        self.records.append(record)
+
+        if self.max_fan_out is not None and record['fan_out'] > self.max_fan_out:
+            message = (f"Join {record['label']} ({how}) fans out {record['fan_out']:.2f}x: {predicted_rows} rows "
+                       f"from {len(left)} x {len(right)} (key duplication {record['left_key_duplication']:.2f} / "
+                       f"{record['right_key_duplication']:.2f}), above the limit of {self.max_fan_out}")
+            if self.action == 'raise':
+                raise MergeFanOutError(message)
+            if self.action == 'warn':
+                warnings.warn(message, MergeFanOutWarning, stacklevel=4)
+        record['started'] = time.perf_counter()
+        return record
+
+    def after_join(self, record, result):
+        """Complete the record of a join with its output."""
+        record['output_rows'] = len(result)
+        record['output_bytes'] = self.frame_bytes(result)
+        record['seconds'] = time.perf_counter() - record.pop('started')
+
+    def to_frame(self):
+        """Return the records as a DataFrame, one row per join."""
+        return pd.DataFrame(self.records)
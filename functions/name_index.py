@@ -0,0 +1,179 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from functions.utilities import clean_data, encode_professions
+
+# One entry per person of name.basics: numeric part of nconst, byte offset and byte length of its line
+INDEX_DTYPE = np.dtype([('id', np.int64), ('offset', np.int64), ('length', np.int32)])
+
+# nconst identifiers look like 'nm0000001'
+NCONST_PREFIX_LENGTH = 2
+MAX_NCONST_DIGITS = 12
+# Bytes of the names file scanned for line boundaries at once
+SCAN_CHUNK_BYTES = 64 * 1024 ** 2
+
+
+def default_index_path(names_path):
+    """Return the path of the index file kept next to the name.basics file."""
+    return names_path + '.idx.npy'
+
+
+def nconst_to_id(nconsts):
+    """
+    Convert nconst identifiers (e.g. 'nm0000001') to their integer ids.
+
+    Args:
+    nconsts (iterable): The nconst identifiers.
+
+    Returns:
+    np.ndarray: Array of integer ids, -1 for values that are not valid nconst identifiers.
+    """
+    ids = pd.to_numeric(pd.Series(list(nconsts), dtype='object').str[NCONST_PREFIX_LENGTH:], errors='coerce')
+    return ids.fillna(-1).astype(np.int64).to_numpy()
+
+
+def find_newlines(data, chunk_bytes=SCAN_CHUNK_BYTES):
+    """
+    Find the positions of the newlines of a memory-mapped file, scanning it in fixed-size chunks so that the
+    comparison masks stay small whatever the size of the file.
+
+    Args:
+    data (np.memmap): The bytes of the file.
+    chunk_bytes (int): Number of bytes scanned at once.
+
+    Returns:
+    np.ndarray: The positions of the newlines.
+    """
+    positions = [np.flatnonzero(data[start:start + chunk_bytes] == ord('\n')) + start
+                 for start in range(0, len(data), chunk_bytes)]
+    return np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+
+
+def build_name_index(names_path, index_path=None):
+    """
+    Build a sorted nconst -> (offset, length) index over a name.basics TSV file and save it to disk.
+
+    Line boundaries and nconst ids are found with vectorized operations over a memory map of the file,
+    so the file is never parsed into a DataFrame.
+
+    Args:
+    names_path (str): Path to the name.basics TSV file.
+    index_path (str, optional): Path of the index file. Defaults to the names path with '.idx.npy' appended.
+
+    Returns:
+    str: The path of the saved index file.
+    """
+    index_path = index_path or default_index_path(names_path)
+    print(f'Building name index for: {names_path} ...')
+
+    data = np.memmap(names_path, dtype=np.uint8, mode='r')
+
+    # Line starts are the positions after each newline; the first line is the header
+    newlines = find_newlines(data)
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(data)]))
+    starts, ends = starts[1:], ends[1:]
+    non_empty = ends > starts
+    starts, ends = starts[non_empty], ends[non_empty]
+
+    # Parse the digits following the 'nm' prefix of every line at once
+    ids = np.zeros(len(starts), dtype=np.int64)
+    active = np.ones(len(starts), dtype=bool)
+    for position in range(NCONST_PREFIX_LENGTH, NCONST_PREFIX_LENGTH + MAX_NCONST_DIGITS):
+        in_line = starts + position < ends
+        chars = np.full(len(starts), ord('\t'), dtype=np.uint8)
+        chars[in_line] = data[starts[in_line] + position]
+        active &= (chars >= ord('0')) & (chars <= ord('9'))
+        if not active.any():
+            break
+        ids[active] = ids[active] * 10 + (chars[active] - ord('0'))
+
+    index = np.empty(len(starts), dtype=INDEX_DTYPE)
+    index['id'] = ids
+    index['offset'] = starts
+    index['length'] = ends - starts
+    index.sort(order='id', kind='stable')
+
+    np.save(index_path, index)
+
+    return index_path
+
+
+def load_name_index(names_path, index_path=None):
+    """
+    Load the memory-mapped name index, building it first if it is missing or older than the names file.
+
+    Args:
+    names_path (str): Path to the name.basics TSV file.
+    index_path (str, optional): Path of the index file. Defaults to the names path with '.idx.npy' appended.
+
+    Returns:
+    np.ndarray: Read-only memory-mapped structured array with 'id', 'offset' and 'length' fields, sorted by 'id'.
+    """
+    index_path = index_path or default_index_path(names_path)
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(names_path):
+        build_name_index(names_path, index_path)
+    return np.load(index_path, mmap_mode='r')
+
+
+def lookup_names(names_path, nconsts, index=None, index_path=None):
+    """
+    Fetch only the requested person records from name.basics using binary search on the index.
+
+    Args:
+    names_path (str): Path to the name.basics TSV file.
+    nconsts (iterable): The nconst identifiers to fetch.
+    index (np.ndarray, optional): Index returned by load_name_index. Loaded (or built) when not given.
+    index_path (str, optional): Path of the index file, used when index is not given.
+
+    Returns:
+    pd.DataFrame: Cleaned DataFrame with the name.basics columns for the found identifiers, in file order.
+        Identifiers missing from the file are skipped.
+    """
+    if index is None:
+        index = load_name_index(names_path, index_path)
+
+    with open(names_path, 'rb') as names_file:
+        header = names_file.readline()
+
+    ids = np.unique(nconst_to_id(nconsts))
+    ids = ids[ids >= 0]
+
+    # Binary search for each requested id in the sorted index
+    positions = np.searchsorted(index['id'], ids)
+    found = positions < len(index)
+    found[found] = index['id'][positions[found]] == ids[found]
+    records = np.sort(index[positions[found]], order='offset')
+
+    # Read the records in file order so the access pattern stays sequential
+    data = np.memmap(names_path, dtype=np.uint8, mode='r')
+    lines = [data[offset:offset + length].tobytes() for offset, length in zip(records['offset'], records['length'])]
+
+    buffer = io.BytesIO(header + b''.join(line.rstrip(b'\r') + b'\n' for line in lines))
+    names_df = pd.read_csv(buffer, sep='\t', low_memory=False)
+
+    return clean_data(names_df)
+
+
+def load_director_names(crew_df, names_path, director_column='directors', index_path=None):
+    """
+    Load the name.basics records of the directors present in the crew DataFrame only.
+
+    Replaces loading the whole name.basics file before prepare_movies_directors: only the records of the
+    working set of directors are read, and the profession bitmask is added as in utilities.load_names.
+
+    Args:
+    crew_df (pd.DataFrame): The DataFrame containing crew information (including directors).
+    names_path (str): Path to the name.basics TSV file.
+    director_column (str): The column of crew_df with (comma-separated) director nconst identifiers.
+    index_path (str, optional): Path of the index file.
+
+    Returns:
+    pd.DataFrame: Name information of the directors, with the 'professionFlags' column.
+    """
+    directors = crew_df[director_column].dropna().astype(str).str.split(',').explode().unique()
+    names_df = lookup_names(names_path, directors, index_path=index_path)
+    return encode_professions(names_df)
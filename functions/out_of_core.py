@@ -0,0 +1,364 @@
+import math
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from functions.utilities import clean_data, parse_memory_size
+from functions.task1_functions import prepare_data, quality_of_movies_by_country, count_country_appearances
+from functions.task3_functions import prepare_movies_directors, compute_custom_scores
+from functions.name_index import load_director_names
+
+# Joined frames take several times the memory of their inputs, so inputs only get a fraction of the budget
+JOIN_MEMORY_FACTOR = 4
+
+
+def estimate_frame_bytes(file_path, sample_rows=10000):
+    """
+    Estimate the in-memory size of a whole TSV file from a sample of its rows.
+
+    Args:
+    file_path (str): Path to the TSV file.
+    sample_rows (int): Number of rows to sample.
+
+    Returns:
+    tuple: A tuple containing:
+        - total_bytes (int): Estimated in-memory size of the whole file.
+        - row_bytes (float): Estimated in-memory size of a single row.
+    """
+    sample = pd.read_csv(file_path, sep='\t', nrows=sample_rows, low_memory=False)
+    if sample.empty:
+        return 0, 1.0
+    row_bytes = sample.memory_usage(deep=True).sum() / len(sample)
+
+    # Scale the sample by the ratio of the file size to the sample size on disk
+    with open(file_path, 'rb') as file:
+        sample_disk_bytes = sum(len(file.readline()) for _ in range(len(sample) + 1))
+    total_bytes = row_bytes * len(sample) * os.path.getsize(file_path) / max(sample_disk_bytes, 1)
+
+    return int(total_bytes), row_bytes
+
+
+def plan_partitions(file_paths, max_memory):
+    """
+    Choose the number of partitions and the read chunk size so that one partition fits the memory budget.
+
+    Args:
+    file_paths (list): Paths to the TSV files joined together.
+    max_memory (int or str): Memory budget, e.g. '2GB'.
+
+    Returns:
+    tuple: A tuple containing:
+        - n_partitions (int): Number of hash partitions.
+        - chunksize (int): Number of rows read at once while partitioning.
+    """
+    max_memory = parse_memory_size(max_memory)
+    estimates = [estimate_frame_bytes(file_path) for file_path in file_paths]
+    total_bytes = sum(total for total, _ in estimates)
+    widest_row = max(row_bytes for _, row_bytes in estimates)
+
+    n_partitions = max(1, math.ceil(total_bytes * JOIN_MEMORY_FACTOR / max_memory))
+    chunksize = max(1000, int(max_memory / JOIN_MEMORY_FACTOR / widest_row))
+
+    return n_partitions, chunksize
+
+
+def partition_ids(keys, n_partitions):
+    """
+    Assign every title identifier (e.g. 'tt0000001') to a hash partition.
+
+    Uses the numeric part of the identifier, so the same title lands in the same partition in every file.
+
+    Args:
+    keys (pd.Series): Title identifiers.
+    n_partitions (int): Number of partitions.
+
+    Returns:
+    np.ndarray: Partition number of every key. Missing or invalid keys go to partition 0.
+    """
+    numbers = pd.to_numeric(keys.astype('string').str[2:], errors='coerce').fillna(0).astype(np.int64)
+    return (numbers % n_partitions).to_numpy()
+
+
+def _write_partition_chunk(chunk, key_column, n_partitions, paths):
+    """Append the rows of one chunk to the partition files they hash to."""
+    parts = partition_ids(chunk[key_column], n_partitions)
+    for partition in np.unique(parts):
+        chunk[parts == partition].to_csv(paths[partition], sep='\t', index=False, header=False, mode='a')
+
+
+def _create_partition_files(chunk_columns, name, n_partitions, output_dir):
+    """Create empty partition files with a header so that every partition can be loaded."""
+    paths = [os.path.join(output_dir, f'{name}.part{partition}.tsv') for partition in range(n_partitions)]
+    for path in paths:
+        pd.DataFrame(columns=chunk_columns).to_csv(path, sep='\t', index=False)
+    return paths
+
+
+def partition_file(file_path, key_column, n_partitions, output_dir, chunksize=1_000_000, usecols=None):
+    """
+    Hash-partition a TSV file by title identifier into several TSV files on local disk, reading it in chunks.
+
+    Args:
+    file_path (str): Path to the TSV file.
+    key_column (str): The column holding the title identifier ('tconst' or 'titleId').
+    n_partitions (int): Number of partitions.
+    output_dir (str): Directory where the partition files are written.
+    chunksize (int): Number of rows read at once.
+    usecols (list, optional): Columns to keep.
+
+    Returns:
+    list: Paths of the partition files, one per partition.
+    """
+    print(f'Partitioning data from: {file_path} into {n_partitions} partitions ...')
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    columns = usecols or pd.read_csv(file_path, sep='\t', nrows=0).columns.tolist()
+    paths = _create_partition_files(columns, name, n_partitions, output_dir)
+
+    # Values are copied as raw strings, so '\N' markers are kept and cleaned when a partition is loaded
+    for chunk in pd.read_csv(file_path, sep='\t', chunksize=chunksize, usecols=usecols, dtype=str,
+                             keep_default_na=False):
+        _write_partition_chunk(chunk[columns], key_column, n_partitions, paths)
+
+    return paths
+
+
+def partition_frame(df, key_column, n_partitions, output_dir, name):
+    """
+    Hash-partition an in-memory DataFrame by title identifier into several files on local disk.
+
+    Args:
+    df (pd.DataFrame): The DataFrame to partition.
+    key_column (str): The column holding the title identifier.
+    n_partitions (int): Number of partitions.
+    output_dir (str): Directory where the partition files are written.
+    name (str): Base name of the partition files.
+
+    Returns:
+    list: Paths of the partition files, one per partition.
+    """
+    parts = partition_ids(df[key_column], n_partitions)
+    paths = []
+    for partition in range(n_partitions):
+        path = os.path.join(output_dir, f'{name}.part{partition}.pkl')
+        df[parts == partition].to_pickle(path)
+        paths.append(path)
+    return paths
+
+
+def load_partition(path):
+    """Load a single partition file written by partition_file, partition_frame or the out-of-core functions."""
+    if path.endswith('.pkl'):
+        return pd.read_pickle(path)
+    return clean_data(pd.read_csv(path, sep='\t', low_memory=False))
+
+
+def quality_of_movies_by_country_out_of_core(basics_path, ratings_path, akas_path, top_orders, output_dir,
+                                             max_memory='2GB', work_dir=None, basics_filter=None):
+    """
+    Out-of-core version of prepare_data followed by quality_of_movies_by_country.
+
+    The basics, ratings and akas files are hash-partitioned by title to local disk, each partition is
+    joined and analyzed independently, and its movies are written to output_dir. Every title lands in a single
+    partition, so the result is the same as when the whole files are loaded. Only the best max(top_orders) movies
+    seen so far are kept in memory for the country counts, so the peak memory is bounded by max_memory instead of
+    the size of the files or of the output.
+
+    Args:
+    basics_path (str): Path to title.basics.tsv.
+    ratings_path (str): Path to title.ratings.tsv.
+    akas_path (str): Path to title.akas.tsv.
+    top_orders (list): List of top N orders to analyze.
+    output_dir (str): Directory where the movie partitions are written.
+    max_memory (int or str): Memory budget for a single partition, e.g. '2GB'.
+    work_dir (str, optional): Directory for the input partition files. A temporary directory is used by default.
+    basics_filter (callable, optional): Function applied to every basics partition before the join,
+        e.g. to keep only the analyzed years.
+
+    Returns:
+    tuple: A tuple containing:
+        - country_counts (dict): Dictionary containing counts of country appearances in specified top N sequences.
+        - movies_parts (list): Paths of the movie partition files (sorted by composite score within a partition),
+          None for partitions without movies, one per hash partition of the tconst. They can be loaded one at a
+          time with load_partition or passed to prepare_movies_directors_out_of_core.
+    """
+    n_partitions, chunksize = plan_partitions([basics_path, ratings_path, akas_path], max_memory)
+    max_order = max(top_orders, default=0)
+
+    os.makedirs(output_dir, exist_ok=True)
+    movies_parts = []
+    top_movies = None
+    with tempfile.TemporaryDirectory(dir=work_dir) as partition_dir:
+        basics_parts = partition_file(basics_path, 'tconst', n_partitions, partition_dir, chunksize)
+        ratings_parts = partition_file(ratings_path, 'tconst', n_partitions, partition_dir, chunksize)
+        akas_parts = partition_file(akas_path, 'titleId', n_partitions, partition_dir, chunksize)
+
+        for partition, (basics_part, ratings_part, akas_part) in enumerate(zip(basics_parts, ratings_parts,
+                                                                               akas_parts)):
+            basics = load_partition(basics_part)
+            if basics_filter is not None:
+                basics = basics_filter(basics)
+            prepared_df = prepare_data(basics, load_partition(ratings_part), load_partition(akas_part))
+            if prepared_df.empty:
+                movies_parts.append(None)
+                continue
+            _, movies_part = quality_of_movies_by_country(prepared_df, top_orders)
+
+            path = os.path.join(output_dir, f'movies.part{partition}.pkl')
+            movies_part.to_pickle(path)
+            movies_parts.append(path)
+
+            # Partitions are disjoint, so the global top N is the top N of the partition top Ns
+            candidates = movies_part.head(max_order)
+            if top_movies is not None:
+                candidates = pd.concat([top_movies, candidates])
+            top_movies = candidates.sort_values(by='composite_score', ascending=False, kind='stable').head(max_order)
+
+    country_counts = count_country_appearances(top_movies if top_movies is not None else
+                                               pd.DataFrame({'country': []}), top_orders)
+
+    return country_counts, movies_parts
+
+
+def prepare_movies_directors_out_of_core(crew_path, names_path, movies_df, output_dir, max_memory='2GB'):
+    """
+    Out-of-core version of prepare_movies_directors writing the joined partitions to local disk.
+
+    The crew file and the movies are hash-partitioned by title, and each partition is joined with the name records
+    of its directors only, fetched through the name index (see name_index.load_director_names). The movie
+    partitions of quality_of_movies_by_country_out_of_core are used as they are: the crew is split into a multiple
+    of their number, so every crew partition only reads the rows of one movie partition.
+
+    Args:
+    crew_path (str): Path to title.crew.tsv.
+    names_path (str): Path to name.basics.tsv.
+    movies_df (pd.DataFrame or list): The DataFrame containing movie information, or the movie partition files
+        returned by quality_of_movies_by_country_out_of_core.
+    output_dir (str): Directory where the joined partitions are written.
+    max_memory (int or str): Memory budget for a single partition, e.g. '2GB'.
+
+    Returns:
+    list: Paths of the joined partition files, to be used with rank_directors_out_of_core,
+        custom_ranking_out_of_core or load_partition.
+    """
+    n_partitions, chunksize = plan_partitions([crew_path], max_memory)
+    if isinstance(movies_df, pd.DataFrame):
+        movies_bytes = movies_df.memory_usage(deep=True).sum()
+        n_partitions = max(n_partitions,
+                           math.ceil(movies_bytes * JOIN_MEMORY_FACTOR / parse_memory_size(max_memory)))
+    else:
+        # A tconst in crew partition p (modulo n_partitions) is in movie partition p % len(movies_df)
+        n_partitions = len(movies_df) * math.ceil(n_partitions / max(len(movies_df), 1))
+
+    os.makedirs(output_dir, exist_ok=True)
+    joined_parts = []
+    with tempfile.TemporaryDirectory(dir=output_dir) as partition_dir:
+        crew_parts = partition_file(crew_path, 'tconst', n_partitions, partition_dir, chunksize)
+        if isinstance(movies_df, pd.DataFrame):
+            movies_parts = partition_frame(movies_df, 'tconst', n_partitions, partition_dir, 'movies')
+
+        for partition, crew_part in enumerate(crew_parts):
+            if isinstance(movies_df, pd.DataFrame):
+                movies = load_partition(movies_parts[partition])
+            else:
+                movies_path = movies_df[partition % len(movies_df)]
+                if movies_path is None:
+                    continue
+                movies = load_partition(movies_path)
+                movies = movies[partition_ids(movies['tconst'], n_partitions) == partition]
+            crew = load_partition(crew_part)
+            names = load_director_names(crew, names_path)
+            joined_df = prepare_movies_directors(crew, names, movies)
+
+            path = os.path.join(output_dir, f'movies_directors.part{partition}.pkl')
+            joined_df.to_pickle(path)
+            joined_parts.append(path)
+
+    return joined_parts
+
+
+def _combine_director_partials(partials, director_column, score_column, extra_columns=()):
+    """Sum the per-partition director aggregates into one row per director."""
+    combined = pd.concat(partials, ignore_index=True)
+    return combined.groupby(director_column)[[score_column, 'total_movies', *extra_columns]].sum().reset_index()
+
+
+def _rank_and_sort(aggregated_scores, score_column):
+    """Rank the directors on the aggregated score and sort them by rank."""
+    aggregated_scores['rank'] = aggregated_scores[score_column].rank(ascending=False, method='min')
+    return aggregated_scores.sort_values('rank').reset_index(drop=True)
+
+
+def rank_directors_out_of_core(partition_paths, director_column, score_column, aggregation='mean'):
+    """
+    Out-of-core version of rank_directors over the partitions written by prepare_movies_directors_out_of_core.
+
+    Each partition is reduced to per-director sums and counts, which are combined into the final ranking.
+
+    Args:
+    partition_paths (list): Paths of the joined partition files.
+    director_column (str): The column name of the director.
+    score_column (str): The column name of the score to rank the directors by.
+    aggregation (str): The method to aggregate scores for each director ('mean' or 'sum').
+
+    Returns:
+    pd.DataFrame: A DataFrame with 'director', 'aggregated_score', 'total_movies' and 'rank' columns.
+    """
+    if aggregation not in ('mean', 'sum'):
+        raise ValueError("Aggregation method must be 'mean' or 'sum'")
+
+    partials = []
+    for path in partition_paths:
+        part = load_partition(path)
+        # count (non-null scores) is the denominator of the mean, which skips missing scores as groupby.mean does
+        partials.append(part.groupby(director_column)[score_column].agg(['sum', 'size', 'count'])
+                        .rename(columns={'sum': score_column, 'size': 'total_movies'}).reset_index())
+
+    aggregated_scores = _combine_director_partials(partials, director_column, score_column, ['count'])
+    if aggregation == 'mean':
+        aggregated_scores[score_column] = aggregated_scores[score_column] / aggregated_scores['count']
+    aggregated_scores = aggregated_scores[[director_column, score_column, 'total_movies']]
+    aggregated_scores.columns = [director_column, 'aggregated_score', 'total_movies']
+
+    return _rank_and_sort(aggregated_scores, 'aggregated_score')
+
+
+def custom_ranking_out_of_core(partition_paths, director_column, score_column, good_threshold=8.0,
+                               bad_threshold=5.0):
+    """
+    Out-of-core version of custom_ranking over the partitions written by prepare_movies_directors_out_of_core.
+
+    A first pass finds the global minimum and maximum used to normalize 'composite_score', and a second pass
+    reduces each partition to per-director custom score sums and counts.
+
+    Args:
+    partition_paths (list): Paths of the joined partition files.
+    director_column (str): The column name of the director.
+    score_column (str): The column name of the score to rank the directors by.
+    good_threshold (float): Threshold above which a movie is considered 'good'.
+    bad_threshold (float): Threshold below which a movie is considered 'bad'.
+
+    Returns:
+    pd.DataFrame: A DataFrame with 'director', 'custom_score', 'total_movies' and 'rank' columns.
+    """
+    min_score, max_score = None, None
+    if score_column == 'composite_score':
+        bounds = pd.DataFrame([load_partition(path)[score_column].agg(['min', 'max']) for path in partition_paths])
+        min_score = bounds['min'].min()
+        max_score = bounds['max'].max()
+
+    partials = []
+    for path in partition_paths:
+        part = load_partition(path)
+        scores = part[score_column]
+        if min_score is not None:
+            scores = ((scores - min_score) / (max_score - min_score)) * 10
+        part = pd.DataFrame({director_column: part[director_column],
+                             'custom_score': compute_custom_scores(scores, good_threshold, bad_threshold)})
+        partials.append(part.groupby(director_column)['custom_score'].agg(['sum', 'size'])
+                        .rename(columns={'sum': 'custom_score', 'size': 'total_movies'}).reset_index())
+
+    aggregated_scores = _combine_director_partials(partials, director_column, 'custom_score')
+
+    return _rank_and_sort(aggregated_scores, 'custom_score')
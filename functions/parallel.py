@@ -0,0 +1,355 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from functions.task3_functions import compute_custom_scores
+from functions.shared_frames import SharedFrameHandle, publish_frame, attach_frame, release_frame, frame_categories
+
+# Process pools shared by all the parallel calls, by number of workers, so that no call pays for starting workers
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def default_workers():
+    """Return the default number of worker processes (the number of available cores)."""
+    return os.cpu_count() or 1
+
+
+def worker_pool(n_workers):
+    """Return the process pool of n_workers workers shared by the parallel calls, starting it on first use."""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(n_workers)
+        if pool is None:
+            pool = _POOLS[n_workers] = ProcessPoolExecutor(max_workers=n_workers)
+        return pool
+
+
+def shutdown_pools():
+    """Shut down the shared process pools; the next parallel call starts new ones."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_pools)
+
+
+def shard_bounds(n_rows, n_shards):
+    """
+    Split a number of rows into contiguous shards.
+
+    Args:
+    n_rows (int): Number of rows.
+    n_shards (int): Number of shards.
+
+    Returns:
+    list: List of (start, stop) row bounds, one per non-empty shard.
+    """
+    bounds = np.linspace(0, n_rows, max(1, n_shards) + 1).astype(int)
+    return [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def split_shards(df, n_shards):
+    """
+    Split a DataFrame into contiguous row shards.
+
+    Args:
+    df (pd.DataFrame): The DataFrame to split.
+    n_shards (int): Number of shards.
+
+    Returns:
+    list: List of DataFrames, one per non-empty shard.
+    """
+    return [df.iloc[start:stop] for start, stop in shard_bounds(len(df), n_shards)]
+
+
+def run_on_shared_shard(func, handle, start, stop, *args):
+    """
+    Attach to rows [start, stop) of a shared frame in a worker process and apply func to them; string columns are
+    attached as their integer codes, so the workers never decode the categories.
+    """
+    shard, segments = attach_frame(handle, start, stop, decode_categories=False)
+    try:
+        return func(shard, *args)
+    finally:
+        del shard
+        release_frame(segments)
+
+
+def map_shards(func, df, n_workers=None, *args):
+    """
+    Apply a function to row shards of a DataFrame in a process pool and return the partial results.
+
+    The frame is published once in shared memory (see shared_frames) and the workers attach to their rows
+    zero-copy, so only a small handle is pickled to each worker instead of the rows themselves. The workers are
+    those of the shared worker_pool, started by the first call only. Shards of a shared frame get the string
+    columns as integer codes (-1 for missing values); reduce_shards maps grouped codes back to labels.
+
+    Args:
+    func (callable): Top-level function called as func(shard, *args) in the worker processes.
+    df (pd.DataFrame or SharedFrameHandle): The DataFrame to split, or the handle of a frame already
+        published with shared_frames.publish_frame. Only the columns needed by func should be passed.
+    n_workers (int, optional): Number of worker processes. Defaults to the number of cores.
+    args: Additional arguments passed to func.
+
+    Returns:
+    list: The partial results, in shard order.
+    """
+    n_workers = n_workers or default_workers()
+    bounds = shard_bounds(len(df), n_workers)
+    if n_workers == 1 or len(bounds) <= 1:
+        if isinstance(df, SharedFrameHandle):
+            return [run_on_shared_shard(func, df, start, stop, *args) for start, stop in bounds]
+        return [func(df.iloc[start:stop], *args) for start, stop in bounds]
+
+    handle, segments = (df, []) if isinstance(df, SharedFrameHandle) else publish_frame(df)
+    try:
+        executor = worker_pool(n_workers)
+        futures = [executor.submit(run_on_shared_shard, func, handle, start, stop, *args) for start, stop in bounds]
+        return [future.result() for future in futures]
+    finally:
+        release_frame(segments, unlink=True)
+
+
+def reduce_shards(func, df, key_column, n_workers=None, *args):
+    """
+    Apply a partial aggregation to row shards with map_shards and sum the partials into one row per group.
+
+    The workers group on the integer codes of the key column, and the codes are mapped to their labels once here,
+    after combining, instead of every worker decoding all the categories.
+
+    Args:
+    func (callable): Top-level function called as func(shard, *args), returning partials indexed by key_column.
+    df (pd.DataFrame or SharedFrameHandle): The DataFrame to split, or the handle of a published frame.
+    key_column (str): The column the partials are grouped by.
+    n_workers (int, optional): Number of worker processes. Defaults to the number of cores.
+    args: Additional arguments passed to func.
+
+    Returns:
+    pd.DataFrame: The combined partials indexed by the labels of key_column, sorted as in groupby.
+    """
+    n_workers = n_workers or default_workers()
+    if not isinstance(df, SharedFrameHandle) and (n_workers == 1 or len(shard_bounds(len(df), n_workers)) <= 1):
+        return combine_partials(map_shards(func, df, n_workers, *args))
+
+    handle, segments = (df, []) if isinstance(df, SharedFrameHandle) else publish_frame(df)
+    try:
+        combined = combine_partials(map_shards(func, handle, n_workers, *args))
+        categories = frame_categories(handle, key_column)
+    finally:
+        release_frame(segments, unlink=True)
+
+    if categories is None:
+        return combined
+    # Missing keys (code -1) are dropped as groupby does; the categories are sorted, so the codes order is kept
+    combined = combined[combined.index >= 0]
+    combined.index = categories.take(combined.index).rename(combined.index.name)
+    return combined
+
+
+def country_partials(shard):
+    """
+    Compute the mergeable per-country aggregates of one shard of the movies DataFrame; weighted_missing counts the
+    movies with a missing score or number of votes, which leave a country without weighted average (np.average).
+    """
+    shard = shard.assign(weighted_score=shard['composite_score'] * shard['numVotes'],
+                         weighted_missing=(shard['composite_score'].isna() | shard['numVotes'].isna()).astype(np.int64))
+    return shard.groupby('country', observed=True).agg(
+        votes=('numVotes', 'sum'),
+        movies=('composite_score', 'count'),
+        score_sum=('composite_score', 'sum'),
+        weighted_score_sum=('weighted_score', 'sum'),
+        weighted_missing=('weighted_missing', 'sum')
+    )
+
+
+def combine_partials(partials):
+    """Sum per-shard aggregates indexed by group into one row per group, sorted by group as in groupby."""
+    combined = pd.concat(partials)
+    if isinstance(combined.index, pd.CategoricalIndex):
+        # Shards attached from shared memory are grouped on categorical columns
+        combined.index = combined.index.astype(combined.index.categories.dtype)
+    return combined.groupby(level=0).sum()
+
+
+def parallel_country_statistics(movies_df, n_workers=None):
+    """
+    Compute the per-country aggregates used by the task 2 tables in a process pool.
+
+    Args:
+    movies_df (pd.DataFrame or SharedFrameHandle): DataFrame of movies with 'country', 'numVotes' and
+        'composite_score' columns.
+    n_workers (int, optional): Number of worker processes. Defaults to the number of cores.
+
+    Returns:
+    pd.DataFrame: DataFrame indexed by country with 'votes', 'movies', 'score_sum', 'weighted_score_sum' and
+        'weighted_missing' columns.
+    """
+    return reduce_shards(country_partials, movies_df[['country', 'numVotes', 'composite_score']], 'country',
+                         n_workers)
+
+
+def parallel_country_tables(movies_df, n_workers=None):
+    """
+    Compute the three task 2 country tables from a single parallel_country_statistics pass.
+
+    Args:
+    movies_df (pd.DataFrame or SharedFrameHandle): DataFrame of movies with 'country', 'numVotes' and
+        'composite_score' columns.
+    n_workers (int, optional): Number of worker processes. Defaults to the number of cores.
+
+    Returns:
+    tuple: The tables of total_votes_by_country, average_composite_score_by_country and
+        weighted_average_composite_score_by_country.
+    """
+    statistics = parallel_country_statistics(movies_df, n_workers)
+    return _votes_table(statistics), _average_table(statistics), _weighted_average_table(statistics)
+
+
+def _votes_table(statistics):
+    """Build the total_votes_by_country table from the country statistics."""
+    votes_by_country = statistics['votes'].rename_axis('country').reset_index(name='number of votes')
+    votes_by_country.sort_values(by='number of votes', ascending=False, inplace=True)
+
+    return votes_by_country
+
+
+def _average_table(statistics):
+    """Build the average_composite_score_by_country table from the country statistics."""
+    avg_score_by_country = (
+        (statistics['score_sum'] / statistics['movies']).rename_axis('country')
+        .reset_index(name='average composite score')
+        .sort_values(by='average composite score', ascending=False)
+    )
+
+    return avg_score_by_country
+
+
+def _weighted_average_table(statistics):
+    """Build the weighted_average_composite_score_by_country table from the country statistics."""
+    weighted_average = (statistics['weighted_score_sum'] / statistics['votes']).where(
+        statistics['weighted_missing'] == 0)
+    weighted_avg_score_by_country = (
+        weighted_average.rename_axis('country')
+        .reset_index(name='weighted average composite score')
+        .sort_values(by='weighted average composite score', ascending=False)
+    )
+
+    return weighted_avg_score_by_country
+
+
+def parallel_total_votes_by_country(movies_df, n_workers=None):
+    """Parallel version of task2_functions.total_votes_by_country returning the same table."""
+    return _votes_table(parallel_country_statistics(movies_df, n_workers))
+
+
+def parallel_average_composite_score_by_country(movies_df, n_workers=None):
+    """Parallel version of task2_functions.average_composite_score_by_country returning the same table."""
+    return _average_table(parallel_country_statistics(movies_df, n_workers))
+
+
+def parallel_weighted_average_composite_score_by_country(movies_df, n_workers=None):
+    """Parallel version of task2_functions.weighted_average_composite_score_by_country returning the same table."""
+    return _weighted_average_table(parallel_country_statistics(movies_df, n_workers))
+
+
+def director_partials(shard, director_column, score_column):
+    """
+    Compute the mergeable per-director score sums, movie counts (size) and non-null score counts (count) of one
+    shard; count is the denominator of the mean, which skips missing scores as groupby.mean does.
+    """
+    return shard.groupby(director_column, observed=True)[score_column].agg(['sum', 'size', 'count'])
+
+
+def score_bounds(shard, score_column):
+    """Compute the minimum and maximum score of one shard, used for the composite score normalization."""
+    return shard[score_column].min(), shard[score_column].max()
+
+
+def custom_score_partials(shard, director_column, score_column, good_threshold, bad_threshold, bounds):
+    """Compute the per-director custom score sums and counts of one shard."""
+    scores = shard[score_column]
+    if bounds is not None:
+        min_score, max_score = bounds
+        scores = ((scores - min_score) / (max_score - min_score)) * 10
+    custom_scores = pd.Series(compute_custom_scores(scores, good_threshold, bad_threshold), index=shard.index)
+    return custom_scores.groupby(shard[director_column], observed=True).agg(['sum', 'size'])
+
+
+def _rank_directors_table(combined, director_column, score_name):
+    """Rank the directors from their combined aggregates as in task3_functions."""
+    aggregated_scores = combined.rename_axis(director_column).reset_index()
+    aggregated_scores.columns = [director_column, score_name, 'total_movies']
+
+    aggregated_scores['rank'] = aggregated_scores[score_name].rank(ascending=False, method='min')
+    aggregated_scores = aggregated_scores.sort_values('rank', kind='stable').reset_index(drop=True)
+
+    return aggregated_scores
+
+
+def parallel_rank_directors(movies_df, director_column, score_column, aggregation='mean', n_workers=None):
+    """
+    Parallel version of task3_functions.rank_directors returning the same table.
+
+    Args:
+    movies_df (pd.DataFrame or SharedFrameHandle): DataFrame containing the director and score columns.
+    director_column (str): The column name of the director.
+    score_column (str): The column name of the score to rank the directors by.
+    aggregation (str): The method to aggregate scores for each director ('mean' or 'sum').
+    n_workers (int, optional): Number of worker processes. Defaults to the number of cores.
+
+    Returns:
+    pd.DataFrame: A DataFrame with 'director', 'aggregated_score', 'total_movies' and 'rank' columns.
+    """
+    if aggregation not in ('mean', 'sum'):
+        raise ValueError("Aggregation method must be 'mean' or 'sum'")
+
+    combined = reduce_shards(director_partials, movies_df[[director_column, score_column]], director_column,
+                             n_workers, director_column, score_column)
+    if aggregation == 'mean':
+        combined['sum'] = combined['sum'] / combined['count']
+
+    return _rank_directors_table(combined[['sum', 'size']], director_column, 'aggregated_score')
+
+
+def parallel_custom_ranking(movies_df, director_column, score_column, good_threshold=8.0, bad_threshold=5.0,
+                            n_workers=None):
+    """
+    Parallel version of task3_functions.custom_ranking returning the same table.
+
+    Unlike custom_ranking, the input DataFrame is not modified.
+
+    Args:
+    movies_df (pd.DataFrame or SharedFrameHandle): DataFrame containing the director and score columns.
+    director_column (str): The column name of the director.
+    score_column (str): The column name of the score to rank the directors by.
+    good_threshold (float): Threshold above which a movie is considered 'good'.
+    bad_threshold (float): Threshold below which a movie is considered 'bad'.
+    n_workers (int, optional): Number of worker processes. Defaults to the number of cores.
+
+    Returns:
+    pd.DataFrame: A DataFrame with 'director', 'custom_score', 'total_movies' and 'rank' columns.
+    """
+    columns = movies_df[[director_column, score_column]]
+
+    # Both passes run on the same columns, so they are published in shared memory only once
+    handle, segments = (columns, []) if isinstance(columns, SharedFrameHandle) else publish_frame(columns)
+    try:
+        # Normalization of composite_score needs the global minimum and maximum first
+        bounds = None
+        if score_column == 'composite_score':
+            partial_bounds = np.array(map_shards(score_bounds, handle, n_workers, score_column), dtype=float)
+            bounds = (np.nanmin(partial_bounds[:, 0]), np.nanmax(partial_bounds[:, 1]))
+
+        combined = reduce_shards(custom_score_partials, handle, director_column, n_workers, director_column,
+                                 score_column, good_threshold, bad_threshold, bounds)
+    finally:
+        release_frame(segments, unlink=True)
+
+    return _rank_directors_table(combined, director_column, 'custom_score')
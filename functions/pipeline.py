@@ -0,0 +1,189 @@
+import os
+
+import pandas as pd
+
+from functions.utilities import load_data, clean_data, filter_by_common_years, load_indicator
+from functions.name_index import load_director_names
+from functions.task1_functions import prepare_data, quality_of_movies_by_country
+from functions.country_registry import CountryRegistry
+from functions.memory_budget import MAX_MEMORY_VARIABLE, MemoryBudget
+from functions.fact_table import MovieFacts
+from functions.title_index import load_title_index
+from functions.shared_frames import PublishedFrame
+
+# Files read by the analysis, as in analysis.ipynb
+IMDB_FILES = {
+    'basics': 'title.basics.tsv',
+    'akas': 'title.akas.tsv',
+    'ratings': 'title.ratings.tsv',
+    'crew': 'title.crew.tsv',
+    'names': 'name.basics.tsv'
+}
+GDP_FILE = 'API_NY.GDP.MKTP.CD_DS2_en_csv_v2_580250.csv'
+POPULATION_FILE = 'API_SP.POP.TOTL_DS2_en_csv_v2_580248.csv'
+COUNTRY_CODES_FILE = 'country_codes_all.csv'
+# Columns of the movies and of the movie-director rows published for the parallel aggregations
+SHARED_MOVIE_COLUMNS = ['country', 'numVotes', 'composite_score']
+SHARED_DIRECTOR_COLUMNS = ['primaryName', 'directors', 'composite_score', 'averageRating', 'numVotes']
+
+
+def data_files(movie_data_dir, gdp_pop_data_dir):
+    """Return the paths of all the files read by the analysis."""
+    paths = [os.path.join(movie_data_dir, file_name) for file_name in IMDB_FILES.values()]
+    paths += [os.path.join(gdp_pop_data_dir, file_name) for file_name in [GDP_FILE, POPULATION_FILE,
+                                                                          COUNTRY_CODES_FILE]]
+    return paths
+
+
+def load_imdb_data(movie_data_dir, budget=None):
+    """
+    Load and clean the IMDb files used by the analysis.
+
+    Args:
+    movie_data_dir (str): Path to directory with IMDb movie data.
+    budget (MemoryBudget, optional): Memory budget tracking (and downcasting) the loaded frames.
+
+    Returns:
+    dict: Dictionary with 'basics', 'akas', 'ratings', 'crew' and 'names' DataFrames. Only the directors of the
+        crew are read from name.basics, through its nconst index (see name_index.load_director_names).
+    """
+    data = {}
+    for name, file_name in IMDB_FILES.items():
+        file_path = os.path.join(movie_data_dir, file_name)
+        if name == 'names':
+            frame = load_director_names(data['crew'], file_path)
+        else:
+            frame = clean_data(load_data(file_path))
+        _track(data, budget, name, frame)
+    return data
+
+
+def load_gdp_population_data(gdp_pop_data_dir):
+    """
+    Load and clean the World Bank GDP and population files and the country codes.
+
+    Args:
+    gdp_pop_data_dir (str): Path to directory with GDP and Population data.
+
+    Returns:
+    dict: Dictionary with the 'gdp' and 'population' IndicatorTables, the 'country_codes' DataFrame and the
+        'country_registry' built once from the country codes.
+    """
+    country_codes_df = pd.read_csv(os.path.join(gdp_pop_data_dir, COUNTRY_CODES_FILE))
+    return {
+        'gdp': load_indicator(os.path.join(gdp_pop_data_dir, GDP_FILE)),
+        'population': load_indicator(os.path.join(gdp_pop_data_dir, POPULATION_FILE)),
+        'country_codes': country_codes_df,
+        'country_registry': CountryRegistry(country_codes_df)
+    }
+
+
+def _track(data, budget, name, df):
+    """
+    Store a frame in data, registering it with the budget if any.
+
+    Downcasting replaces the tracked frames, so every tracked frame of data is refreshed, leaving no reference to
+    the frames before the downcast.
+    """
+    data[name] = df
+    if budget is not None:
+        budget.track(name, df)
+        for tracked_name, frame in budget.frames.items():
+            if tracked_name in data:
+                data[tracked_name] = frame
+
+
+def _release(data, budget, names):
+    """Drop frames no longer needed by the later stages, which never read them back, so nothing is spilled."""
+    for name in names:
+        del data[name]
+        if budget is not None:
+            budget.release(name)
+
+
+def publish_analysis_frames(data, n_workers=None):
+    """
+    Publish the movies and the movie-director rows once in shared memory for the parallel aggregations.
+
+    The handles are stored as 'shared_movies' and 'shared_directors' and are passed as they are to the parallel_*
+    functions, whose workers attach to them instead of every call copying its input to new segments. The owners of
+    the segments are kept under 'shared_frames': the segments live as long as data does.
+
+    Args:
+    data (dict): The analysis data, with 'movie_facts'.
+    n_workers (int, optional): Number of worker processes of the parallel aggregations, stored as 'n_workers'.
+
+    Returns:
+    dict: The data with the shared frame entries added.
+    """
+    movie_facts = data['movie_facts']
+    director_columns = [column for column in SHARED_DIRECTOR_COLUMNS if column in movie_facts.columns]
+    shared_frames = {
+        'shared_movies': PublishedFrame(movie_facts.to_frame(SHARED_MOVIE_COLUMNS)),
+        'shared_directors': PublishedFrame(movie_facts.director_rows(director_columns))
+    }
+    data.update({name: frame.handle for name, frame in shared_frames.items()})
+    data['shared_frames'] = list(shared_frames.values())
+    data['n_workers'] = n_workers
+    return data
+
+
+def prepare_analysis(movie_data_dir, gdp_pop_data_dir, top_orders=(10, 20, 50, 100), max_memory=None,
+                     n_workers=None):
+    """
+    Load all the data and build the frames shared by the three tasks, as done at the top of analysis.ipynb.
+
+    Under a memory budget the frames are downcast once their total nears the budget, and the raw IMDb frames are
+    dropped as soon as the stages using them are done.
+
+    Args:
+    movie_data_dir (str): Path to directory with IMDb movie data.
+    gdp_pop_data_dir (str): Path to directory with GDP and Population data.
+    top_orders (list): List of top N orders to analyze.
+    max_memory (int or str, optional): Memory budget such as '4GB'. Defaults to the MAX_MEMORY environment
+        variable; no budget when neither is set.
+    n_workers (int, optional): With more than one worker, the movies and the movie-director rows are published
+        once in shared memory for the parallel aggregations (see publish_analysis_frames).
+
+    Returns:
+    dict: Dictionary with the loaded DataFrames plus 'country_counts' and the narrow 'movie_facts' accepted by
+        all the task functions, which replace the wide movies DataFrame of task 1 (the director rankings are
+        computed from it, without joining crew, names and movies again), and the 'title_index' of title.akas
+        (persisted next to the akas file, built on the first run), whose searches are restricted to the movie
+        facts. Under a memory budget the raw IMDb frames are dropped and the 'memory_budget' entry is added.
+        With n_workers, the shared frame handles of publish_analysis_frames are added.
+    """
+    max_memory = max_memory or os.environ.get(MAX_MEMORY_VARIABLE)
+    budget = MemoryBudget(max_memory) if max_memory else None
+
+    data = load_imdb_data(movie_data_dir, budget)
+    data.update(load_gdp_population_data(gdp_pop_data_dir))
+
+    data['basics'], data['gdp'] = filter_by_common_years(data['basics'], data['gdp'])
+    _, data['population'] = filter_by_common_years(data['basics'], data['population'])
+
+    if budget is not None:
+        # filter_by_common_years returns a new basics frame
+        _track(data, budget, 'basics', data['basics'])
+
+    data['title_index'] = load_title_index(os.path.join(movie_data_dir, IMDB_FILES['akas']), akas_df=data['akas'])
+    _track(data, budget, 'prepared_df', prepare_data(data['basics'], data['ratings'], data['akas']))
+    if budget is not None:
+        _release(data, budget, ['basics', 'ratings', 'akas'])
+
+    data['country_counts'], movies_df = quality_of_movies_by_country(data['prepared_df'], list(top_orders))
+    _release(data, budget, ['prepared_df'])
+    _track(data, budget, 'movies_df', movies_df)
+    del movies_df
+
+    data['movie_facts'] = MovieFacts.from_movies(data['movies_df'], data['crew'], data['names'])
+    data['title_index'].attach_movies(data['movie_facts'])
+    # Every task reads the narrow facts, so the wide movies frame is not kept resident
+    _release(data, budget, ['movies_df'])
+    if budget is not None:
+        _release(data, budget, ['crew', 'names'])
+        data['memory_budget'] = budget
+    if n_workers is not None and n_workers > 1:
+        publish_analysis_frames(data, n_workers)
+
+    return data
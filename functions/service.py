@@ -0,0 +1,384 @@
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from functions.pipeline import prepare_analysis, data_files
+from functions.memory_budget import MAX_MEMORY_VARIABLE
+from functions.indicators import IndicatorTable
+from functions.task1_functions import quality_of_movies_by_country
+from functions.task2_functions import (
+    total_votes_by_country,
+    average_composite_score_by_country,
+    weighted_average_composite_score_by_country,
+    calculate_gdp_per_population
+)
+from functions.task3_functions import rank_directors, custom_ranking, rank_director_actors, director_leaderboard
+from functions.parallel import (
+    parallel_total_votes_by_country,
+    parallel_average_composite_score_by_country,
+    parallel_weighted_average_composite_score_by_country,
+    parallel_rank_directors,
+    parallel_custom_ranking
+)
+
+# Maximum number of query results kept in the cache of the service, the least recently used being dropped first
+CACHE_SIZE = 256
+
+
+def _filter_facts(facts, params):
+    """Keep only the movie facts within the start_year/end_year parameters of a query."""
+    start_year, end_year = params.get('start_year'), params.get('end_year')
+    return facts.filter_years(None if start_year is None else int(start_year),
+                              None if end_year is None else int(end_year))
+
+
+def _shared(data, name, params, columns=()):
+    """
+    Return the handle of a frame published by pipeline.publish_analysis_frames to run a query on in parallel, or
+    None when there is none, when the query has a year range or when the frame lacks one of the columns.
+    """
+    handle = data.get(name)
+    if handle is None or 'start_year' in params or 'end_year' in params:
+        return None
+    return handle if all(column in handle.column_names for column in columns) else None
+
+
+def _required(params, name):
+    """Return a required query parameter, raising ValueError (a bad request) when it is missing."""
+    if name not in params:
+        raise ValueError(f"Missing parameter: {name}")
+    return params[name]
+
+
+def _column(params, name, default, columns):
+    """Return a column parameter of a query, raising ValueError (a bad request) for a column not in columns."""
+    column = params.get(name, default)
+    if column not in columns:
+        raise ValueError(f"Unknown column for {name}: {column}")
+    return column
+
+
+def _year(params, indicator, default='2023'):
+    """Return the year parameter of a query, raising ValueError (a bad request) for a year without indicator data."""
+    year = str(params.get('year', default))
+    if isinstance(indicator, IndicatorTable):
+        first_year, last_year = indicator.year_range()
+        available = year.isdigit() and first_year <= int(year) <= last_year
+    else:
+        available = year in indicator.columns
+    if not available:
+        raise ValueError(f"No data for year: {year}")
+    return year
+
+
+def _top_orders(params):
+    """Parse the comma-separated top_orders parameter of a query."""
+    return [int(order) for order in str(params.get('top_orders', '10,20,50,100')).split(',')]
+
+
+def query_country_counts(data, params):
+    """Count country appearances in the top N movies (task 1)."""
+    country_counts, _ = quality_of_movies_by_country(_filter_facts(data['movie_facts'], params), _top_orders(params))
+    return country_counts
+
+
+def query_total_votes_by_country(data, params):
+    """Total number of votes per country (task 2)."""
+    shared_movies = _shared(data, 'shared_movies', params)
+    if shared_movies is not None:
+        return parallel_total_votes_by_country(shared_movies, data['n_workers'])
+    return total_votes_by_country(_filter_facts(data['movie_facts'], params))
+
+
+def query_average_composite_score_by_country(data, params):
+    """Average composite score per country (task 2)."""
+    shared_movies = _shared(data, 'shared_movies', params)
+    if shared_movies is not None:
+        return parallel_average_composite_score_by_country(shared_movies, data['n_workers'])
+    return average_composite_score_by_country(_filter_facts(data['movie_facts'], params))
+
+
+def query_weighted_average_composite_score_by_country(data, params):
+    """Vote-weighted average composite score per country (task 2)."""
+    shared_movies = _shared(data, 'shared_movies', params)
+    if shared_movies is not None:
+        return parallel_weighted_average_composite_score_by_country(shared_movies, data['n_workers'])
+    return weighted_average_composite_score_by_country(_filter_facts(data['movie_facts'], params))
+
+
+def query_gdp_per_population(data, params):
+    """GDP per population of the reference countries for the given year (task 2)."""
+    year = _year(params, data['gdp'])
+    reference_countries = data['country_registry'].codes('alpha-3')
+    gdp = data['gdp'].select_countries(reference_countries)
+    population = data['population'].select_countries(reference_countries)
+    return calculate_gdp_per_population(gdp, population, year)
+
+
+def _top_k_options(params):
+    """Parse the top_k, offset, limit and min_movies parameters of the ranking queries."""
+    options = {name: int(params[name]) for name in ['top_k', 'limit', 'min_movies'] if name in params}
+    options['offset'] = int(params.get('offset', 0))
+    return options
+
+
+def query_rank_directors(data, params):
+    """Directors ranked by mean or sum of their scores (task 3)."""
+    movie_facts = _filter_facts(data['movie_facts'], params)
+    director_column = _column(params, 'director_column', 'primaryName', movie_facts.columns)
+    score_column = _column(params, 'score_column', 'composite_score', movie_facts.columns)
+    aggregation = params.get('aggregation', 'mean')
+    top_k_options = _top_k_options(params)
+
+    # The parallel ranking returns the full table, so it only answers the queries without top_k options
+    shared_directors = _shared(data, 'shared_directors', params, [director_column, score_column])
+    if shared_directors is not None and top_k_options == {'offset': 0}:
+        return parallel_rank_directors(shared_directors, director_column, score_column, aggregation,
+                                       data['n_workers'])
+    return rank_directors(movie_facts, director_column, score_column, aggregation, **top_k_options)
+
+
+def query_custom_ranking(data, params):
+    """Directors ranked by the custom good/bad movie scoring (task 3)."""
+    movie_facts = _filter_facts(data['movie_facts'], params)
+    director_column = _column(params, 'director_column', 'primaryName', movie_facts.columns)
+    score_column = _column(params, 'score_column', 'composite_score', movie_facts.columns)
+    good_threshold = float(params.get('good_threshold', 8.0))
+    bad_threshold = float(params.get('bad_threshold', 5.0))
+    top_k_options = _top_k_options(params)
+
+    shared_directors = _shared(data, 'shared_directors', params, [director_column, score_column])
+    if shared_directors is not None and top_k_options == {'offset': 0}:
+        return parallel_custom_ranking(shared_directors, director_column, score_column, good_threshold,
+                                       bad_threshold, data['n_workers'])
+    return custom_ranking(movie_facts, director_column, score_column, good_threshold, bad_threshold,
+                          **top_k_options)
+
+
+def query_rank_director_actors(data, params):
+    """Directors who are also actors ranked by the custom scoring (task 3)."""
+    movie_facts = _filter_facts(data['movie_facts'], params)
+    return rank_director_actors(movie_facts, _column(params, 'director_column', 'primaryName', movie_facts.columns),
+                                _column(params, 'score_column', 'composite_score', movie_facts.columns),
+                                good_threshold=float(params.get('good_threshold', 8.0)),
+                                bad_threshold=float(params.get('bad_threshold', 5.0)))
+
+
+def query_director_leaderboard(data, params):
+    """All director rankings computed in a single pass (task 3)."""
+    movie_facts = _filter_facts(data['movie_facts'], params)
+    return director_leaderboard(movie_facts, _column(params, 'score_column', 'composite_score', movie_facts.columns),
+                                good_threshold=float(params.get('good_threshold', 8.0)),
+                                bad_threshold=float(params.get('bad_threshold', 5.0)))
+
+
+def query_search_titles(data, params):
+    """Movies whose (possibly localized or misspelled) title best matches the title parameter."""
+    title = _required(params, 'title')
+    return data['title_index'].search(title, limit=int(params.get('limit', 10)),
+                                      min_similarity=float(params.get('min_similarity', 0.3)))
+
+
+# Queries exposed by the service, with their parameters passed as strings in the query string
+QUERIES = {
+    'country_counts': query_country_counts,
+    'total_votes_by_country': query_total_votes_by_country,
+    'average_composite_score_by_country': query_average_composite_score_by_country,
+    'weighted_average_composite_score_by_country': query_weighted_average_composite_score_by_country,
+    'gdp_per_population': query_gdp_per_population,
+    'rank_directors': query_rank_directors,
+    'custom_ranking': query_custom_ranking,
+    'rank_director_actors': query_rank_director_actors,
+    'director_leaderboard': query_director_leaderboard,
+    'search_titles': query_search_titles
+}
+
+
+def to_json_ready(result, limit=None):
+    """Convert a query result (DataFrame or dict) to JSON serializable objects."""
+    if isinstance(result, pd.DataFrame):
+        if limit is not None:
+            result = result.head(limit)
+        return json.loads(result.to_json(orient='records'))
+    return json.loads(json.dumps(result, default=str))
+
+
+class UnknownQueryError(KeyError):
+    """Raised for a query name that is not one of QUERIES."""
+
+
+class AnalysisService:
+    """
+    Keeps the prepared analysis data in memory and answers task queries from it.
+
+    The data is loaded once with pipeline.prepare_analysis. The results of the last cache_size queries are cached
+    per query and parameters, and the data is reloaded (and the cache cleared) when any of the underlying files
+    changes.
+    """
+
+    def __init__(self, movie_data_dir, gdp_pop_data_dir, loader=prepare_analysis, cache_size=CACHE_SIZE):
+        self.movie_data_dir = movie_data_dir
+        self.gdp_pop_data_dir = gdp_pop_data_dir
+        self.loader = loader
+        self.cache_size = cache_size
+        self.lock = threading.RLock()
+        self.data = None
+        self.cache = OrderedDict()
+        self.file_times = {}
+        self.reload()
+
+    def _current_file_times(self):
+        return {path: os.path.getmtime(path) for path in data_files(self.movie_data_dir, self.gdp_pop_data_dir)
+                if os.path.exists(path)}
+
+    def reload(self):
+        """Load and prepare the data, replacing the resident frames once the new ones are ready."""
+        file_times = self._current_file_times()
+        data = self.loader(self.movie_data_dir, self.gdp_pop_data_dir)
+        with self.lock:
+            previous, self.data = self.data, data
+            self.cache = OrderedDict()
+            self.file_times = file_times
+        # Frames spilled under the memory budget of the previous load, if any, are not needed anymore
+        if previous is not None and previous.get('memory_budget') is not None:
+            previous['memory_budget'].cleanup()
+
+    def reload_if_changed(self):
+        """Reload the data if any of the underlying files was modified, added or removed."""
+        if self._current_file_times() != self.file_times:
+            print('Data files changed, reloading ...')
+            self.reload()
+            return True
+        return False
+
+    def query(self, name, params=None):
+        """
+        Run a task query on the resident data.
+
+        Args:
+        name (str): Name of the query, one of QUERIES.
+        params (dict, optional): Query parameters, e.g. start_year, end_year, top_orders or thresholds.
+
+        Returns:
+        JSON serializable result of the query.
+        """
+        if name not in QUERIES:
+            raise UnknownQueryError(f"Unknown query: {name}")
+        params = dict(params or {})
+        # The ranking and title search queries also read limit, to select only the rows returned
+        limit = int(params['limit']) if 'limit' in params else None
+        key = (name, tuple(sorted(params.items())))
+
+        # Only the snapshot of the data and the cache is taken under the lock, so that a slow query neither
+        # blocks the other queries nor a reload; a reload replaces both, so results of old data are not kept
+        with self.lock:
+            data, cache = self.data, self.cache
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+
+        result = to_json_ready(QUERIES[name](data, params), limit)
+        with self.lock:
+            cache[key] = result
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return result
+
+
+def watch_files(service, interval=5.0, stop_event=None):
+    """Poll the data files every interval seconds and hot-reload the service when they change."""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.wait(interval):
+        try:
+            service.reload_if_changed()
+        except Exception as e:
+            print(f"Error reloading data: {e}")
+
+
+def make_handler(service):
+    """Create the HTTP request handler class answering queries from the given service."""
+
+    class QueryHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [part for part in url.path.split('/') if part]
+            if parts == ['queries']:
+                self._send_json(200, sorted(QUERIES))
+                return
+            if len(parts) != 2 or parts[0] != 'query':
+                self._send_json(404, {'error': 'Use /queries or /query/<name>?<parameters>'})
+                return
+
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            started = time.perf_counter()
+            try:
+                result = service.query(parts[1], params)
+            except UnknownQueryError as e:
+                self._send_json(404, {'error': str(e)})
+                return
+            except ValueError as e:
+                # Invalid parameters: unparsable numbers, unknown columns, years without data, missing parameters
+                self._send_json(400, {'error': str(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+                return
+            self._send_json(200, {'query': parts[1], 'params': params, 'result': result,
+                                  'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident Movie Analysis service")
+    parser.add_argument('--movie_data_dir', default='data_imdb', help='Path to directory with IMDb movie data')
+    parser.add_argument('--gdp_pop_data_dir', default='data_gdp_population',
+                        help='Path to directory with GDP and Population data')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--reload_interval', type=float, default=5.0,
+                        help='Seconds between checks of the data files for changes')
+    parser.add_argument('--max_memory', help="Memory budget of the data preparation, e.g. '4GB'")
+    parser.add_argument('--n_workers', type=int,
+                        help='Worker processes of the parallel aggregations, over frames published once at load')
+
+    args = parser.parse_args()
+    if args.max_memory:
+        os.environ[MAX_MEMORY_VARIABLE] = args.max_memory
+
+    service = AnalysisService(args.movie_data_dir, args.gdp_pop_data_dir,
+                              loader=functools.partial(prepare_analysis, n_workers=args.n_workers))
+    threading.Thread(target=watch_files, args=(service, args.reload_interval), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"Serving analysis queries on http://{args.host}:{args.port}/query/<name>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import sys
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+class SharedFrameHandle:
+    """
+    Picklable description of a DataFrame published in shared memory by publish_frame.
+
+    Only the names of the shared memory segments and the column layouts are pickled, so sending a handle to a
+    worker process costs the same whatever the size of the frame. Selecting columns with handle[[...]] returns
+    a handle to a subset of the columns without copying any data.
+    """
+
+    def __init__(self, columns, n_rows):
+        self.columns = columns
+        self.n_rows = n_rows
+
+    def __getitem__(self, column_names):
+        by_name = {column['name']: column for column in self.columns}
+        return SharedFrameHandle([by_name[name] for name in column_names], self.n_rows)
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def column_names(self):
+        """Names of the published columns."""
+        return [column['name'] for column in self.columns]
+
+    def segment_names(self):
+        """Return the names of all the shared memory segments used by the frame."""
+        return [name for column in self.columns for name in column['segments'].values()]
+
+
+def _create_segment(array, segments):
+    """Copy an array into a new shared memory segment and return the segment layout."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    segments.append(shm)
+    return shm.name, array.dtype.str, array.shape
+
+
+def _share_array(array, segments, layout, key):
+    """Publish an array and record its segment name, dtype and shape under key."""
+    name, dtype, shape = _create_segment(np.ascontiguousarray(array), segments)
+    layout['segments'][key] = name
+    layout['dtypes'][key] = dtype
+    layout['shapes'][key] = shape
+
+
+def publish_frame(df):
+    """
+    Publish the column buffers of a DataFrame once in shared memory.
+
+    Numeric, boolean and datetime columns are shared as they are. String and other object columns are shared as
+    categorical codes, with the categories stored as UTF-8 bytes and offsets (Arrow-style). The index is not
+    published: attached frames get a RangeIndex.
+
+    Args:
+    df (pd.DataFrame): The DataFrame to publish (e.g. produced by load_data or by the task stages).
+
+    Returns:
+    tuple: A tuple containing:
+        - handle (SharedFrameHandle): Picklable handle to pass to worker processes.
+        - segments (list): The owned shared memory segments, to be released with release_frame.
+    """
+    segments = []
+    columns = []
+    try:
+        for name in df.columns:
+            series = df[name]
+            layout = {'name': name, 'segments': {}, 'dtypes': {}, 'shapes': {}}
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufcmM':
+                layout['kind'] = 'numeric'
+                _share_array(series.to_numpy(), segments, layout, 'values')
+            elif series.dtype.kind in 'biuf':
+                # Nullable numeric extension types are shared as floats with NaN for missing values
+                layout['kind'] = 'numeric'
+                _share_array(series.to_numpy(dtype=np.float64, na_value=np.nan), segments, layout, 'values')
+            else:
+                layout['kind'] = 'categorical'
+                categorical = pd.Categorical(series)
+                _share_array(categorical.codes, segments, layout, 'codes')
+                categories = categorical.categories
+                if categories.dtype.kind in 'biufmM':
+                    layout['categories_kind'] = 'numeric'
+                    _share_array(categories.to_numpy(), segments, layout, 'categories')
+                else:
+                    layout['categories_kind'] = 'string'
+                    encoded = [str(category).encode('utf-8') for category in categories]
+                    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                    offsets[1:] = np.cumsum([len(value) for value in encoded])
+                    _share_array(offsets, segments, layout, 'offsets')
+                    _share_array(np.frombuffer(b''.join(encoded), dtype=np.uint8), segments, layout, 'data')
+            columns.append(layout)
+    except Exception:
+        release_frame(segments, unlink=True)
+        raise
+
+    return SharedFrameHandle(columns, len(df)), segments
+
+
+class PublishedFrame:
+    """
+    Owner of a DataFrame published once with publish_frame, for frames attached by many calls.
+
+    The segments are freed when the owner is garbage collected (or at exit), so a frame stays attachable as long
+    as anything, e.g. a snapshot of the analysis data used by a running query, references its owner.
+
+    Args:
+    df (pd.DataFrame): The DataFrame to publish.
+    """
+
+    def __init__(self, df):
+        self.handle, segments = publish_frame(df)
+        self._finalizer = weakref.finalize(self, release_frame, segments, True)
+
+    def release(self):
+        """Free the segments now; the handle must not be attached anymore."""
+        self._finalizer()
+
+
+def _attach_segment(name):
+    """Attach to an existing shared memory segment without taking ownership of it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _attached_array(layout, key, segments):
+    """Return a read-only array view on the shared memory segment stored under key."""
+    shm = _attach_segment(layout['segments'][key])
+    segments.append(shm)
+    array = np.ndarray(layout['shapes'][key], dtype=np.dtype(layout['dtypes'][key]), buffer=shm.buf)
+    array.flags.writeable = False
+    return array
+
+
+def _attached_categories(layout, segments):
+    """Decode the categories of a categorical column into process memory."""
+    if layout['categories_kind'] == 'numeric':
+        return pd.Index(_attached_array(layout, 'categories', segments))
+    offsets = _attached_array(layout, 'offsets', segments)
+    raw = _attached_array(layout, 'data', segments).tobytes()
+    return pd.Index([raw[begin:end].decode('utf-8') for begin, end in zip(offsets[:-1], offsets[1:])], dtype=object)
+
+
+def attach_frame(handle, start=None, stop=None, decode_categories=True):
+    """
+    Attach to a DataFrame published by publish_frame, without copying the column buffers.
+
+    Args:
+    handle (SharedFrameHandle): Handle returned by publish_frame.
+    start (int, optional): First row of the attached slice.
+    stop (int, optional): Row after the last row of the attached slice.
+    decode_categories (bool): Whether string and other categorical columns are returned as pd.Categorical. When
+        False they are returned as their integer codes (-1 for missing values), so workers that only group on
+        them skip decoding the categories; see frame_categories to map the codes back.
+
+    Returns:
+    tuple: A tuple containing:
+        - df (pd.DataFrame): Read-only DataFrame backed by the shared memory segments. Only the string
+          categories are decoded into process memory.
+        - segments (list): The attached segments, to be released with release_frame once df is no longer used.
+    """
+    segments = []
+    rows = slice(start, stop)
+    data = {}
+    for layout in handle.columns:
+        if layout['kind'] == 'numeric':
+            data[layout['name']] = _attached_array(layout, 'values', segments)[rows]
+            continue
+
+        codes = _attached_array(layout, 'codes', segments)[rows]
+        if decode_categories:
+            data[layout['name']] = pd.Categorical.from_codes(codes, _attached_categories(layout, segments),
+                                                             validate=False)
+        else:
+            data[layout['name']] = codes
+
+    return pd.DataFrame(data, copy=False), segments
+
+
+def frame_categories(handle, column_name):
+    """
+    Decode the categories of one column of a published frame, e.g. once in the parent to label the groups of
+    codes computed by the workers.
+
+    Args:
+    handle (SharedFrameHandle): Handle returned by publish_frame.
+    column_name (str): The column name.
+
+    Returns:
+    pd.Index: The categories, whose positions are the codes of the column, or None for a numeric column.
+    """
+    layout = handle[[column_name]].columns[0]
+    if layout['kind'] == 'numeric':
+        return None
+    segments = []
+    try:
+        # Copied, so that the categories outlive the attached segments
+        return _attached_categories(layout, segments).copy(deep=True)
+    finally:
+        release_frame(segments)
+
+
+def release_frame(segments, unlink=False):
+    """
+    Close shared memory segments, and free them when called by the publisher.
+
+    Args:
+    segments (list): Segments returned by publish_frame or attach_frame.
+    unlink (bool): Whether to free the segments. Only the publisher should unlink, once all workers are done.
+    """
+    for shm in segments:
+        try:
+            shm.close()
+        except BufferError:
+            # Arrays still point to the segment; it is unmapped once they are garbage collected
+            pass
+        if unlink:
+            shm.unlink()
@@ -1,7 +1,8 @@
-import pandas as pd
+from functions.engines import join
+from functions.fact_table import MovieFacts
 
 
-def merge_datasets(basics, ratings, akas):
+def merge_datasets(basics, ratings, akas, engine=None):
     """
     Merge the basics, ratings, and akas datasets.
 
@@ -9,12 +10,13 @@ def merge_datasets(basics, ratings, akas):
     basics (pd.DataFrame): DataFrame containing basics data.
     ratings (pd.DataFrame): DataFrame containing ratings data.
     akas (pd.DataFrame): DataFrame containing akas data.
+    engine (str, optional): Engine running the joins ('pandas', 'polars' or 'duckdb'), see engines.resolve_engine.
 
     Returns:
     pd.DataFrame: Merged DataFrame.
     """
-    merged_df = basics.merge(ratings, on='tconst', how='left').merge(akas, left_on='tconst', right_on='titleId',
-                                                                     how='left')
+    merged_df = join(basics, ratings, 'tconst', how='left', engine=engine, label='basics x ratings')
+    merged_df = join(merged_df, akas, 'tconst', 'titleId', how='left', engine=engine, label='basics x akas')
     return merged_df
 
 
@@ -24,9 +26,9 @@ def filter_movies(merged_df):
     return movies_df
 
 
-def prepare_data(basics, ratings, akas):
+def prepare_data(basics, ratings, akas, engine=None):
 
-    merged_df = merge_datasets(basics, ratings, akas)
+    merged_df = merge_datasets(basics, ratings, akas, engine)
     movies_df = filter_movies(merged_df)
 
     return movies_df
@@ -92,12 +94,14 @@ def count_country_appearances(top_movies_df, top_orders):
     country_counts = {}
     for n in top_orders:
         top_n_movies = top_movies_df.head(n)
-        counts = top_n_movies['country'].value_counts().to_dict()
+        counts = top_n_movies['country'].value_counts()
+        # Categorical countries (downcast frames) also count the countries absent from the top N
+        counts = counts[counts > 0].to_dict()
         country_counts[n] = counts
     return country_counts
 
 
-def quality_of_movies_by_country(movies_df, top_orders):
+def quality_of_movies_by_country(movies_df, top_orders, engine=None):
     """
     Main function to analyze the quality of movies by country.
 
@@ -106,15 +110,19 @@ def quality_of_movies_by_country(movies_df, top_orders):
     ratings (pd.DataFrame): DataFrame containing ratings data.
     akas (pd.DataFrame): DataFrame containing akas data.
     top_orders (list): List of top N orders to analyze.
+    engine (str, optional): Engine running the joins ('pandas', 'polars' or 'duckdb'), see engines.resolve_engine.
 
     Returns:
     tuple: A tuple containing:
         - country_counts (dict): Dictionary containing counts of country appearances in specified top N sequences.
         - movies_df (pd.DataFrame): DataFrame of movies with additional country and composite score information.
+    Given MovieFacts instead of a DataFrame, the countries and scores are already computed, so only the counts are.
     """
+    if isinstance(movies_df, MovieFacts):
+        return count_country_appearances(movies_df.to_frame(['country']), top_orders), movies_df
 
     country_df = get_movie_country(movies_df)
-    movies_df = pd.merge(movies_df, country_df, left_on='tconst', right_on='titleId')
+    movies_df = join(movies_df, country_df, 'tconst', 'titleId', engine=engine, label='movies x countries')
     movies_df = movies_df[movies_df['isOriginalTitle'] == 1]
 
     movies_df = calculate_composite_score(movies_df)
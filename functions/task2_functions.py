@@ -1,61 +1,93 @@
 import numpy as np
 import pandas as pd
 
+from functions.indicators import IndicatorTable, gdp_per_population
+from functions.country_registry import CountryRegistry
+from functions.engines import resolve_engine, group_statistics
+from functions.fact_table import MovieFacts
 
-def total_votes_by_country(movies_df):
+
+def total_votes_by_country(movies_df, engine=None):
     """
     Calculate the total sum of votes for each country and return a DataFrame.
 
     Parameters:
-    movies_df (pd.DataFrame): DataFrame of movies with country and composite score information.
+    movies_df (pd.DataFrame or MovieFacts): DataFrame of movies with country and composite score information.
+    engine (str, optional): Engine running the aggregation ('pandas', 'polars' or 'duckdb'), see
+        engines.resolve_engine.
 
     Returns:
     pd.DataFrame: DataFrame with two columns: 'country' and 'number of votes'.
     """
-
-    votes_by_country = (movies_df.groupby('country')['numVotes'].sum().reset_index(name='number of votes'))
+    if isinstance(movies_df, MovieFacts):
+        movies_df = movies_df.to_frame(['country', 'numVotes'])
+
+    if resolve_engine(engine) == 'pandas':
+        votes_by_country = (movies_df.groupby('country', observed=True)['numVotes'].sum()
+                            .reset_index(name='number of votes'))
+    else:
+        votes_by_country = group_statistics(movies_df, 'country', 'numVotes', ['sum'], engine)
+        votes_by_country.columns = ['country', 'number of votes']
     votes_by_country.sort_values(by='number of votes', ascending=False, inplace=True)
 
     return votes_by_country
 
 
-def average_composite_score_by_country(movies_df):
+def average_composite_score_by_country(movies_df, engine=None):
     """
     Calculate the average composite score for each country and return a DataFrame.
 
     Parameters:
-    movies_df (pd.DataFrame): DataFrame of movies with country and composite score information.
+    movies_df (pd.DataFrame or MovieFacts): DataFrame of movies with country and composite score information.
+    engine (str, optional): Engine running the aggregation ('pandas', 'polars' or 'duckdb'), see
+        engines.resolve_engine.
 
     Returns:
     pd.DataFrame: DataFrame with two columns: 'country' and 'average composite score'.
     """
+    if isinstance(movies_df, MovieFacts):
+        movies_df = movies_df.to_frame(['country', 'composite_score'])
 
-    avg_score_by_country = (
-        movies_df.groupby('country')['composite_score'].mean()
-        .reset_index(name='average composite score')
-        .sort_values(by='average composite score', ascending=False)
-    )
+    if resolve_engine(engine) == 'pandas':
+        avg_score_by_country = movies_df.groupby('country', observed=True)['composite_score'].mean().reset_index(
+            name='average composite score')
+    else:
+        avg_score_by_country = group_statistics(movies_df, 'country', 'composite_score', ['mean'], engine)
+        avg_score_by_country.columns = ['country', 'average composite score']
+
+    avg_score_by_country = avg_score_by_country.sort_values(by='average composite score', ascending=False)
 
     return avg_score_by_country
 
 
-def weighted_average_composite_score_by_country(movies_df):
+def weighted_average_composite_score_by_country(movies_df, engine=None):
     """
     Calculate the weighted average composite score for each country and return a DataFrame.
 
     Parameters:
-    movies_df (pd.DataFrame): DataFrame of movies with country and composite score information.
+    movies_df (pd.DataFrame or MovieFacts): DataFrame of movies with country and composite score information.
+    engine (str, optional): Engine running the aggregation ('pandas', 'polars' or 'duckdb'), see
+        engines.resolve_engine.
 
     Returns:
     pd.DataFrame: DataFrame with two columns: 'country' and 'weighted average composite score'.
     """
-
-    weighted_avg_score_by_country = (
-        movies_df.groupby('country')
-        .apply(lambda x: np.average(x['composite_score'], weights=x['numVotes']))
-        .reset_index(name='weighted average composite score')
-        .sort_values(by='weighted average composite score', ascending=False)
-    )
+    if isinstance(movies_df, MovieFacts):
+        movies_df = movies_df.to_frame(['country', 'composite_score', 'numVotes'])
+
+    if resolve_engine(engine) == 'pandas':
+        weighted_avg_score_by_country = (
+            movies_df.groupby('country', observed=True)
+            .apply(lambda x: np.average(x['composite_score'], weights=x['numVotes']))
+            .reset_index(name='weighted average composite score')
+        )
+    else:
+        weighted_avg_score_by_country = group_statistics(movies_df, 'country', 'composite_score',
+                                                         [('weighted_mean', 'numVotes')], engine)
+        weighted_avg_score_by_country.columns = ['country', 'weighted average composite score']
+
+    weighted_avg_score_by_country = weighted_avg_score_by_country.sort_values(
+        by='weighted average composite score', ascending=False)
 
     return weighted_avg_score_by_country
 
@@ -86,9 +118,11 @@ def filter_countries_with_reference(df, col_name, reference_df, reference_column
     """ Filters a pandas dataframe to keep only rows with countries present in a reference list.
 
   Args:
-      df (pandas.DataFrame): The dataframe containing countries/regions.
+      df (pandas.DataFrame or IndicatorTable): The dataframe containing countries/regions. An IndicatorTable is
+          filtered on its country codes.
       col_name (str, optional): The name of the column containing countries/regions in df.
-      reference_df (pandas.DataFrame): The already loaded pandas dataframe containing the reference list of countries.
+      reference_df (pandas.DataFrame or CountryRegistry): The already loaded pandas dataframe containing the
+          reference list of countries, or a CountryRegistry built from it once.
       reference_column (str): The name of the column from which to filter the reference list.
       year (str): The year from which to filter the reference list. NOTE: str
 
@@ -96,8 +130,14 @@ def filter_countries_with_reference(df, col_name, reference_df, reference_column
       pandas.DataFrame: A new dataframe containing only rows with countries present in the reference list.
   """
 
-    # Get the reference countries as a set
-    reference_countries = set(reference_df[reference_column].tolist())
+    # Get the reference countries as a set (the registry keeps them as a prebuilt index)
+    if isinstance(reference_df, CountryRegistry):
+        reference_countries = reference_df.codes(reference_column)
+    else:
+        reference_countries = set(reference_df[reference_column].tolist())
+
+    if isinstance(df, IndicatorTable):
+        return df.select_countries(reference_countries).to_frame(year)
 
     # Filter the dataframe based on the reference list
     df_filtered = df[df[col_name].isin(reference_countries)]
@@ -115,7 +155,8 @@ def get_countries_and_clean_orders(df, merge_df, merge_col_left, merge_col_right
 
   Args:
       df (pd.DataFrame): The DataFrame to be processed and merged.
-      merge_df (pd.DataFrame): The DataFrame to be merged with.
+      merge_df (pd.DataFrame or CountryRegistry): The DataFrame to be merged with. With a CountryRegistry the
+          codes are mapped with a vectorized lookup instead of a merge (only a left merge is supported).
       merge_col_left (str): The column name for merging in the left DataFrame.
       merge_col_right (str): The column name for merging in the right DataFrame.
       cols_to_keep (list): The list of column names to be kept in the merge DataFrame.
@@ -126,6 +167,9 @@ def get_countries_and_clean_orders(df, merge_df, merge_col_left, merge_col_right
       list: A list of countries excluded due to missing values in the merge column.
   """
 
+    if isinstance(merge_df, CountryRegistry):
+        return map_countries_with_registry(df, merge_df, merge_col_left, merge_col_right, cols_to_keep)
+
     # Merge the DataFrames
     merged_df = df.merge(merge_df, left_on=merge_col_left, right_on=merge_col_right, how=how)
 
@@ -141,28 +185,58 @@ def get_countries_and_clean_orders(df, merge_df, merge_col_left, merge_col_right
     return processed_df, missing_values['country'].tolist()
 
 
+def map_countries_with_registry(df, registry, code_column, registry_column, cols_to_keep):
+    """
+    Map a country code column with a CountryRegistry, dropping and reporting the unmatched codes in bulk.
+
+    Gives the same result as get_countries_and_clean_orders with a left merge on the country codes DataFrame.
+
+    Args:
+        df (pd.DataFrame): The DataFrame with the country code column.
+        registry (CountryRegistry): The registry built from the country codes DataFrame.
+        code_column (str): The column name of the country codes in df.
+        registry_column (str): The registry column the codes come from, e.g. 'alpha-2'.
+        cols_to_keep (list): The list of column names to be kept, from df or from the registry.
+
+    Returns:
+        pd.DataFrame: The DataFrame with the mapped registry columns, without unmatched countries.
+        list: A list of countries excluded because their code is not in the registry.
+    """
+    rows = registry.lookup(df[code_column], registry_column)
+    matched = rows >= 0
+
+    processed_df = df.reset_index(drop=True)
+    for column in cols_to_keep:
+        if column not in processed_df.columns:
+            processed_df[column] = registry.take(rows, column)
+
+    return processed_df[matched][cols_to_keep], df[code_column][~matched].tolist()
+
+
 def calculate_gdp_per_population(gdp_df, population_df, year):
     """
   Calculates GDP per population for each country and returns a new DataFrame.
 
   Args:
-      gdp_df (pd.DataFrame): DataFrame containing countries and GDP values.
-      population_df (pd.DataFrame): DataFrame containing countries and population values.
+      gdp_df (pd.DataFrame or IndicatorTable): DataFrame containing countries and GDP values.
+      population_df (pd.DataFrame or IndicatorTable): DataFrame containing countries and population values.
       year (str): The year the gdp and population values to be taken from. NOTE: str
 
   Returns:
-      pd.DataFrame: A new DataFrame with countries and GDP per population.
+      pd.DataFrame: A new DataFrame with countries and GDP per population. A country of gdp_df missing from
+          population_df, or without a value for the year, gets NaN (sorted last) instead of raising IndexError.
   """
 
-    # Create a dictionary with country as key and gdp/population as value
-    gdp_pop_dict = {
-        country: gdp_df[gdp_df['Country Name'] == country][year].values[0] /
-                 population_df[population_df['Country Name'] == country][year].values[0]
-        for country in gdp_df['Country Name'].unique()
-    }
+    if isinstance(gdp_df, IndicatorTable) and isinstance(population_df, IndicatorTable):
+        return gdp_per_population(gdp_df, population_df, year)
 
-    # Convert the dictionary to a DataFrame
-    gdp_pop_df = pd.DataFrame.from_dict(gdp_pop_dict, orient='index', columns=['gdp_per_population'])
+    # Align the first value of every country in both DataFrames instead of filtering them per country
+    gdp_values = gdp_df.drop_duplicates('Country Name').set_index('Country Name')[year]
+    population_values = population_df.drop_duplicates('Country Name').set_index('Country Name')[year]
+    gdp_pop = gdp_values / population_values.reindex(gdp_values.index)
+
+    # Convert the Series to a DataFrame
+    gdp_pop_df = gdp_pop.rename_axis(None).to_frame('gdp_per_population')
     gdp_pop_df.reset_index(inplace=True)  # Make 'country' a column
     gdp_pop_df.sort_values(by='gdp_per_population', ascending=False, inplace=True)
 
@@ -196,7 +270,24 @@ def rename_and_add_rank(df, new_col_names):
     return df
 
 
-def compute_hegemony(df1, df2, label1, label2):
+def format_hegemony(hegemony_df, label1, label2):
+    """
+    Format hegemony rankings as the text printed by compute_hegemony.
+
+    Args:
+    hegemony_df (pd.DataFrame): DataFrame with 'country', 'hegemony_score' and 'hegemony_rank' columns.
+    label1 (str): The label for the first ranking.
+    label2 (str): The label for the second ranking.
+
+    Returns:
+    str: The formatted rankings, one country per line.
+    """
+    lines = (hegemony_df['hegemony_rank'].astype(str) + '. ' + hegemony_df['country'].astype(str)
+             + ' (Hegemony Score: ' + hegemony_df['hegemony_score'].astype(str) + ')')
+    return f"\n{label1.capitalize()} / {label2.capitalize()} Hegemony Rankings:\n" + '\n'.join(lines)
+
+
+def compute_hegemony(df1, df2, label1, label2, verbose=True, formatter=format_hegemony):
     """
     Compute and print the hegemony rankings based on the difference in ranks between two DataFrames.
 
@@ -205,6 +296,8 @@ def compute_hegemony(df1, df2, label1, label2):
     df2 (pd.DataFrame): The second DataFrame containing 'country' and 'rank' columns.
     label1 (str): The label for the first DataFrame (used in the print title and column suffix).
     label2 (str): The label for the second DataFrame (used in the print title and column suffix).
+    verbose (bool): Whether to print the rankings. Defaults to True.
+    formatter (callable): Function formatting the rankings for printing, called as formatter(df, label1, label2).
 
     Returns:
     pd.DataFrame: A DataFrame with 'country', 'hegemony_score', and 'hegemony_rank' columns.
@@ -218,9 +311,111 @@ def compute_hegemony(df1, df2, label1, label2):
     merged_df = merged_df.sort_values('hegemony_score').reset_index(drop=True)
     merged_df['hegemony_rank'] = merged_df.index + 1
 
+    hegemony_df = merged_df[['country', 'hegemony_score', 'hegemony_rank']]
+
     # Print the results
-    print(f"\n{label1.capitalize()} / {label2.capitalize()} Hegemony Rankings:")
-    for index, row in merged_df.iterrows():
-        print(f"{row['hegemony_rank']}. {row['country']} (Hegemony Score: {row['hegemony_score']})")
+    if verbose:
+        print(formatter(hegemony_df, label1, label2))
+
+    return hegemony_df
+
+
+def align_rankings(rankings):
+    """
+    Align several country rankings into a country x ranking integer matrix.
+
+    Args:
+    rankings (dict): Dictionary of label -> DataFrame with 'country' and 'rank' columns,
+        as produced by rename_and_add_rank.
+
+    Returns:
+    tuple: A tuple containing:
+        - countries (pd.Index): All the countries, in order of first appearance.
+        - rank_matrix (np.ndarray): Rank of every country in every ranking, 0 where the country is missing.
+        - position_matrix (np.ndarray): Row position of every country in every ranking table, -1 where missing.
+    """
+    countries = pd.Index(pd.unique(pd.concat([df['country'] for df in rankings.values()], ignore_index=True)))
+
+    rank_matrix = np.zeros((len(countries), len(rankings)), dtype=np.int64)
+    position_matrix = np.full((len(countries), len(rankings)), -1, dtype=np.int64)
+    for column, df in enumerate(rankings.values()):
+        df = df.drop_duplicates('country')
+        rows = countries.get_indexer(df['country'])
+        rank_matrix[rows, column] = df['rank'].to_numpy()
+        position_matrix[rows, column] = np.arange(len(df))
+
+    return countries, rank_matrix, position_matrix
+
 
-    return merged_df[['country', 'hegemony_score', 'hegemony_rank']]
+def spearman_correlation(ranks1, ranks2):
+    """Spearman rank correlation of two rankings restricted to the same countries."""
+    x = pd.Series(ranks1).rank().to_numpy()
+    y = pd.Series(ranks2).rank().to_numpy()
+    if len(x) < 2 or x.std() == 0 or y.std() == 0:
+        return np.nan
+    return np.corrcoef(x, y)[0, 1]
+
+
+def kendall_correlation(ranks1, ranks2):
+    """Kendall tau-b rank correlation of two rankings restricted to the same countries."""
+    n = len(ranks1)
+    if n < 2:
+        return np.nan
+    first, second = np.triu_indices(n, k=1)
+    sign1 = np.sign(ranks1[first] - ranks1[second])
+    sign2 = np.sign(ranks2[first] - ranks2[second])
+
+    pairs = len(first)
+    denominator = np.sqrt((pairs - np.count_nonzero(sign1 == 0)) * (pairs - np.count_nonzero(sign2 == 0)))
+    return np.sum(sign1 * sign2) / denominator if denominator else np.nan
+
+
+def compute_all_hegemonies(rankings, verbose=False, formatter=format_hegemony):
+    """
+    Compute the hegemony rankings and the rank correlations of every pair of country rankings at once.
+
+    The rankings are aligned once into a country x ranking integer matrix, and each pair is computed with
+    vectorized operations on two of its columns instead of a merge on country names.
+
+    Args:
+    rankings (dict): Dictionary of label -> DataFrame with 'country' and 'rank' columns, e.g.
+        {'votes': votes_df, 'avg_score': avg_score_df, 'gdp': gdp_df, 'pop': pop_df, 'gdp_pop': gdp_pop_df}.
+    verbose (bool): Whether to print the hegemony rankings of every pair. Defaults to False.
+    formatter (callable): Function formatting the rankings for printing, called as formatter(df, label1, label2).
+
+    Returns:
+    tuple: A tuple containing:
+        - summary_df (pd.DataFrame): One row per pair with 'ranking_1', 'ranking_2', 'countries',
+          'mean_hegemony_score', 'spearman' and 'kendall' columns.
+        - hegemonies (dict): Dictionary of (label1, label2) -> DataFrame as returned by compute_hegemony.
+    """
+    labels = list(rankings)
+    countries, rank_matrix, position_matrix = align_rankings(rankings)
+
+    summary = []
+    hegemonies = {}
+    for i in range(len(labels)):
+        for j in range(i + 1, len(labels)):
+            # Countries present in both rankings, in the row order of the first ranking (as in the merge)
+            rows = np.flatnonzero((rank_matrix[:, i] > 0) & (rank_matrix[:, j] > 0))
+            rows = rows[np.argsort(position_matrix[rows, i], kind='stable')]
+            ranks1, ranks2 = rank_matrix[rows, i], rank_matrix[rows, j]
+
+            hegemony_df = pd.DataFrame({'country': countries[rows], 'hegemony_score': np.abs(ranks1 - ranks2)})
+            hegemony_df = hegemony_df.sort_values('hegemony_score').reset_index(drop=True)
+            hegemony_df['hegemony_rank'] = hegemony_df.index + 1
+            hegemonies[(labels[i], labels[j])] = hegemony_df
+
+            if verbose:
+                print(formatter(hegemony_df, labels[i], labels[j]))
+
+            summary.append({
+                'ranking_1': labels[i],
+                'ranking_2': labels[j],
+                'countries': len(rows),
+                'mean_hegemony_score': hegemony_df['hegemony_score'].mean(),
+                'spearman': spearman_correlation(ranks1, ranks2),
+                'kendall': kendall_correlation(ranks1, ranks2)
+            })
+
+    return pd.DataFrame(summary), hegemonies
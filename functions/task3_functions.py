@@ -1,23 +1,34 @@
+import numpy as np
 import pandas as pd
 
+from functions.utilities import has_profession
+from functions.engines import resolve_engine, join, group_sums, group_statistics
+from functions.fact_table import MovieFacts
 
-def prepare_movies_directors(crew_df, names_df, movies_df):
+
+def prepare_movies_directors(crew_df, names_df, movies_df, engine=None):
     """ Merges crew, names, and movies DataFrames, keeping only movies with directors.
 
   Args:
       crew_df (pandas.DataFrame): The DataFrame containing crew information (including directors).
       names_df (pandas.DataFrame): The DataFrame containing name information.
-      movies_df (pandas.DataFrame): The DataFrame containing movie information.
+      movies_df (pandas.DataFrame or MovieFacts): The DataFrame containing movie information, or the movie facts
+          which already hold the directors of every movie.
+      engine (str, optional): Engine running the joins ('pandas', 'polars' or 'duckdb'), see
+          engines.resolve_engine.
 
   Returns:
       pandas.DataFrame: The merged DataFrame containing movies with directors and their information.
   """
+    if isinstance(movies_df, MovieFacts):
+        # The directors of every movie are already part of the facts
+        return movies_df.director_rows()
 
     # Merge crew and names on directors and nconst
-    merged_df = pd.merge(left=crew_df, right=names_df, left_on='directors', right_on='nconst')
+    merged_df = join(crew_df, names_df, 'directors', 'nconst', engine=engine, label='crew x names')
 
     # Further merge with movies on tconst, keeping all movie rows (how='right')
-    merged_df = pd.merge(left=merged_df, right=movies_df, left_on='tconst', right_on='tconst', how='right')
+    merged_df = join(merged_df, movies_df, 'tconst', how='right', engine=engine, label='directors x movies')
 
     # Drop rows with missing directors
     merged_df = merged_df.dropna(subset=['directors'])
@@ -25,55 +36,122 @@ def prepare_movies_directors(crew_df, names_df, movies_df):
     return merged_df
 
 
-def rank_directors(movies_df, director_column, score_column, aggregation='mean'):
+def rank_and_select(aggregated_scores, score_column, top_k=None, offset=0, limit=None, min_movies=None):
+    """
+    Rank the directors on an aggregated score (1 = best, method='min' ties) and sort them by rank.
+
+    With top_k (or limit) only the best groups are kept: the k-th best score is found with a partial selection
+    (np.partition), every director scoring at least as much is kept, so directors tied at the boundary are all
+    included with their method='min' rank, and only these directors are ranked and sorted, never the long tail.
+    Directors without a score come last, in their original order, so a page is always a prefix (or slice) of the
+    full ranking.
+
+    Args:
+    aggregated_scores (pd.DataFrame): One row per director with the score and 'total_movies' columns.
+    score_column (str): The column name of the aggregated score.
+    top_k (int, optional): Keep the directors ranked top_k or better. Defaults to offset + limit when limit is
+        given, to all the directors otherwise.
+    offset (int): Number of sorted rows skipped, for pagination.
+    limit (int, optional): Maximum number of rows returned after the offset.
+    min_movies (int, optional): Minimum 'total_movies' of the ranked directors; the ranks are computed among
+        these directors only.
+
+    Returns:
+    pd.DataFrame: The directors with a 'rank' column, sorted by rank.
+    """
+    if min_movies is not None:
+        aggregated_scores = aggregated_scores[aggregated_scores['total_movies'] >= min_movies].copy()
+    if top_k is None and limit is not None:
+        top_k = offset + limit
+
+    if top_k is None:
+        aggregated_scores['rank'] = aggregated_scores[score_column].rank(ascending=False, method='min')
+        aggregated_scores = aggregated_scores.sort_values('rank', kind='stable')
+    else:
+        scores = aggregated_scores[score_column].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(scores)
+        if 0 < top_k < valid.sum():
+            # k-th best score, without sorting the other scores
+            kth_score = -np.partition(-scores[valid], top_k - 1)[top_k - 1]
+            valid &= scores >= kth_score
+        elif top_k > valid.sum():
+            # The selection reaches the directors without a score, which follow the ranked ones
+            valid[:] = True
+        elif top_k <= 0:
+            valid[:] = False
+        # Every director with a better score is kept, so the ranks within the selection are the global ranks
+        aggregated_scores = aggregated_scores[valid].copy()
+        aggregated_scores['rank'] = aggregated_scores[score_column].rank(ascending=False, method='min')
+        aggregated_scores = aggregated_scores.sort_values('rank', kind='stable')
+
+    if offset or limit is not None:
+        aggregated_scores = aggregated_scores.iloc[offset:None if limit is None else offset + limit]
+    return aggregated_scores.reset_index(drop=True)
+
+
+def rank_directors(movies_df, director_column, score_column, aggregation='mean', engine=None, top_k=None, offset=0,
+                   limit=None, min_movies=None):
     """
     Rank directors based on a chosen score and add a column with the total number of movies directed by each.
 
     Args:
-    movies_df (pd.DataFrame): DataFrame containing the director and score columns.
+    movies_df (pd.DataFrame or MovieFacts): DataFrame containing the director and score columns, or the movie facts.
     director_column (str): The column name of the director.
     score_column (str): The column name of the score to rank the directors by.
     aggregation (str): The method to aggregate scores for each director ('mean' or 'sum').
+    engine (str, optional): Engine running the aggregation ('pandas', 'polars' or 'duckdb'), see
+        engines.resolve_engine.
+    top_k (int, optional): Keep only the directors ranked top_k or better, see rank_and_select.
+    offset (int): Number of ranked directors skipped, for pagination.
+    limit (int, optional): Maximum number of ranked directors returned after the offset.
+    min_movies (int, optional): Minimum number of movies of the ranked directors.
 
     Returns:
     pd.DataFrame: A DataFrame with 'director', 'aggregated_score', 'rank', and 'total_movies' columns.
     """
+    if isinstance(movies_df, MovieFacts):
+        movies_df = movies_df.director_rows([director_column, score_column])
     # Group by the director column and aggregate the scores
-    if aggregation == 'mean':
-        aggregated_scores = movies_df.groupby(director_column)[score_column].agg(['mean', 'size']).reset_index()
-    elif aggregation == 'sum':
-        aggregated_scores = movies_df.groupby(director_column)[score_column].agg(['sum', 'size']).reset_index()
-    else:
+    if aggregation not in ('mean', 'sum'):
         raise ValueError("Aggregation method must be 'mean' or 'sum'")
+    if resolve_engine(engine) == 'pandas':
+        aggregated_scores = movies_df.groupby(director_column, observed=True)[score_column].agg(
+            [aggregation, 'size']).reset_index()
+    else:
+        aggregated_scores = group_statistics(movies_df, director_column, score_column, [aggregation, 'size'], engine)
 
     # Rename columns for clarity
     aggregated_scores.columns = [director_column, 'aggregated_score', 'total_movies']
 
-    # Rank the directors based on aggregated scores
-    aggregated_scores['rank'] = aggregated_scores['aggregated_score'].rank(ascending=False, method='min')
+    # Rank the directors based on aggregated scores and sort them by rank
+    return rank_and_select(aggregated_scores, 'aggregated_score', top_k, offset, limit, min_movies)
 
-    # Sort by rank
-    aggregated_scores = aggregated_scores.sort_values('rank').reset_index(drop=True)
 
-    return aggregated_scores
-
-
-def custom_ranking(movies_df, director_column, score_column, good_threshold=8.0, bad_threshold=5.0):
+def custom_ranking(movies_df, director_column, score_column, good_threshold=8.0, bad_threshold=5.0, engine=None,
+                   top_k=None, offset=0, limit=None, min_movies=None):
     """
     Rank directors based on a custom scoring metric that rewards good movies and penalizes bad movies.
     Perform normalization to range [0, 10] for 'composite_score' before ranking.
     Add a column with the total number of movies directed by each director.
 
     Args:
-    movies_df (pd.DataFrame): DataFrame containing the director and score columns.
+    movies_df (pd.DataFrame or MovieFacts): DataFrame containing the director and score columns, or the movie facts.
     director_column (str): The column name of the director.
     score_column (str): The column name of the score to rank the directors by.
     good_threshold (float): Threshold above which a movie is considered 'good'.
     bad_threshold (float): Threshold below which a movie is considered 'bad'.
+    engine (str, optional): Engine running the aggregation ('pandas', 'polars' or 'duckdb'), see
+        engines.resolve_engine.
+    top_k (int, optional): Keep only the directors ranked top_k or better, see rank_and_select.
+    offset (int): Number of ranked directors skipped, for pagination.
+    limit (int, optional): Maximum number of ranked directors returned after the offset.
+    min_movies (int, optional): Minimum number of movies of the ranked directors.
 
     Returns:
     pd.DataFrame: A DataFrame with 'director', 'custom_score', 'rank', and 'total_movies' columns.
     """
+    if isinstance(movies_df, MovieFacts):
+        movies_df = movies_df.director_rows(['tconst', director_column, score_column])
     # Perform normalization if score_column is 'composite_score'
     if score_column == 'composite_score':
         # Normalize composite_score to range [0, 10]
@@ -88,45 +166,165 @@ def custom_ranking(movies_df, director_column, score_column, good_threshold=8.0,
         else (abs(x) - bad_threshold) * 2 if abs(x) <= good_threshold
         else (abs(x) - bad_threshold) * 3)
 
-    # Count total number of movies for each director
-    movies_df.loc[:, 'total_movies'] = movies_df.groupby(director_column)['tconst'].transform('count')
-
-    # Group by the director column and aggregate the custom scores
-    aggregated_scores = movies_df.groupby(director_column).agg({
-        'custom_score': 'sum',
-        'total_movies': 'first'  # Take the first value since it's the same for all rows of the group
-    }).reset_index()
+    if resolve_engine(engine) == 'pandas':
+        # Count total number of movies for each director
+        movies_df.loc[:, 'total_movies'] = movies_df.groupby(director_column, observed=True)['tconst'].transform(
+            'count')
 
-    # Rank the directors based on custom scores
-    aggregated_scores['rank'] = aggregated_scores['custom_score'].rank(ascending=False, method='min')
-
-    # Sort by rank
-    aggregated_scores = aggregated_scores.sort_values('rank').reset_index(drop=True)
+        # Group by the director column and aggregate the custom scores
+        aggregated_scores = movies_df.groupby(director_column, observed=True).agg({
+            'custom_score': 'sum',
+            'total_movies': 'first'  # Take the first value since it's the same for all rows of the group
+        }).reset_index()
+    else:
+        # Sum the custom scores and count the movies of every director in one aggregation
+        aggregated_scores = group_sums(movies_df, director_column, {
+            'custom_score': 'custom_score',
+            'total_movies': movies_df['tconst'].notna().astype(np.int64)
+        }, engine)
 
-    return aggregated_scores
+    # Rank the directors based on custom scores and sort them by rank
+    return rank_and_select(aggregated_scores, 'custom_score', top_k, offset, limit, min_movies)
 
 
 def rank_director_actors(movies_df, director_column, score_column, profession_column='primaryProfession',
-                         good_threshold=8.0, bad_threshold=5.0):
+                         good_threshold=8.0, bad_threshold=5.0, flag_column='professionFlags'):
     """
     Filter directors who are also actors and rank them using a custom scoring metric.
 
     Args:
-    movies_df (pd.DataFrame): DataFrame containing the director, score, and profession columns.
+    movies_df (pd.DataFrame or MovieFacts): DataFrame containing the director, score, and profession columns, or the
+        movie facts.
     director_column (str): The column name of the director.
     score_column (str): The column name of the score to rank the directors by.
     profession_column (str): The column name containing professions.
     good_threshold (float): Threshold above which a movie is considered 'good'.
     bad_threshold (float): Threshold below which a movie is considered 'bad'.
+    flag_column (str): The column name of the profession bitmask (see utilities.load_names).
+        When present it is used instead of matching strings in profession_column.
 
     Returns:
     pd.DataFrame: A DataFrame with 'director', 'custom_score', 'rank', and 'total_movies' columns.
     """
-    # Filter directors who are also actors
-    actor_directors_df = movies_df[movies_df[profession_column].str.contains('actor', case=False, na=False)].copy()
+    if isinstance(movies_df, MovieFacts):
+        movies_df = movies_df.director_rows(['tconst', director_column, score_column, profession_column, flag_column])
+    # Filter directors who are also actors, with a bit test when the profession bitmask is available
+    if flag_column in movies_df.columns:
+        is_actor = has_profession(movies_df, 'actor', flag_column)
+    else:
+        is_actor = movies_df[profession_column].str.contains('actor', case=False, na=False)
+    actor_directors_df = movies_df[is_actor].copy()
 
     # Apply custom ranking to the filtered subset
     ranked_actor_directors = custom_ranking(actor_directors_df, director_column, score_column, good_threshold,
                                             bad_threshold)
 
     return ranked_actor_directors
+
+
+def compute_custom_scores(scores, good_threshold=8.0, bad_threshold=5.0):
+    """
+    Vectorized version of the per-movie scoring rule used by custom_ranking.
+
+    Args:
+    scores (pd.Series): Scores of the movies.
+    good_threshold (float): Threshold above which a movie is considered 'good'.
+    bad_threshold (float): Threshold below which a movie is considered 'bad'.
+
+    Returns:
+    np.ndarray: Custom score of every movie.
+    """
+    abs_scores = np.abs(scores)
+    distance = abs_scores - bad_threshold
+    return np.select([abs_scores <= bad_threshold, abs_scores <= good_threshold],
+                     [distance, distance * 2], default=distance * 3)
+
+
+def director_leaderboard(movies_df, score_column='composite_score', director_column='nconst',
+                         name_column='primaryName', profession_column='primaryProfession',
+                         good_threshold=8.0, bad_threshold=5.0, flag_column='professionFlags'):
+    """
+    Build every director ranking in a single grouped pass over the directors DataFrame.
+
+    Computes the same metrics as rank_directors (mean and sum), custom_ranking and rank_director_actors (whose
+    composite score normalization only spans the actor-directors), but groups the data only once and returns all
+    the rankings as columns of one DataFrame.
+    Directors are grouped by their unique identifier (nconst) instead of the non-unique primaryName.
+
+    Args:
+    movies_df (pd.DataFrame or MovieFacts): DataFrame containing the director, score, and optionally name and
+        profession columns, or the movie facts.
+    score_column (str): The column name of the score to rank the directors by.
+    director_column (str): The column name of the unique director identifier.
+    name_column (str): The column name of the director name, kept as the first value for each director.
+    profession_column (str): The column name containing professions, used to flag directors who are also actors.
+    good_threshold (float): Threshold above which a movie is considered 'good'.
+    bad_threshold (float): Threshold below which a movie is considered 'bad'.
+    flag_column (str): The column name of the profession bitmask, used instead of profession_column when present.
+
+    Returns:
+    pd.DataFrame: A DataFrame with one row per director and 'total_movies', 'mean_score', 'mean_rank', 'sum_score',
+    'sum_rank', 'custom_score', 'custom_rank', 'is_actor', 'actor_custom_score' and 'actor_custom_rank' columns,
+    sorted by 'custom_rank'.
+    """
+    if isinstance(movies_df, MovieFacts):
+        movies_df = movies_df.director_rows([director_column, name_column, score_column, profession_column,
+                                             flag_column])
+    scores = movies_df[score_column]
+
+    if flag_column in movies_df.columns:
+        is_actor = has_profession(movies_df, 'actor', flag_column)
+    elif profession_column in movies_df.columns:
+        is_actor = movies_df[profession_column].str.contains('actor', case=False, na=False)
+    else:
+        is_actor = pd.Series(False, index=movies_df.index)
+    is_actor = is_actor.astype(bool)
+
+    # Normalize composite_score to range [0, 10] for the custom scores, without modifying the input; as in
+    # rank_director_actors, the actor custom score is normalized over the movies of the actor-directors only
+    custom_input = scores
+    actor_custom_input = scores.where(is_actor)
+    if score_column == 'composite_score':
+        custom_input = ((scores - scores.min()) / (scores.max() - scores.min())) * 10
+        actor_scores = scores[is_actor]
+        actor_custom_input = ((actor_custom_input - actor_scores.min()) / (actor_scores.max() - actor_scores.min())) \
+            * 10
+
+    working_df = pd.DataFrame({
+        director_column: movies_df[director_column],
+        '_score': scores,
+        '_custom_score': compute_custom_scores(custom_input, good_threshold, bad_threshold),
+        '_actor_custom_score': compute_custom_scores(actor_custom_input, good_threshold, bad_threshold),
+        '_is_actor': is_actor
+    }, index=movies_df.index)
+
+    aggregations = {
+        'total_movies': ('_score', 'size'),
+        'mean_score': ('_score', 'mean'),
+        'sum_score': ('_score', 'sum'),
+        'custom_score': ('_custom_score', 'sum'),
+        'is_actor': ('_is_actor', 'any'),
+        'actor_custom_score': ('_actor_custom_score', 'sum')
+    }
+    if name_column in movies_df.columns and name_column != director_column:
+        working_df[name_column] = movies_df[name_column]
+        aggregations = {name_column: (name_column, 'first'), **aggregations}
+
+    # Single grouped pass computing all the aggregates at once
+    leaderboard = working_df.groupby(director_column, observed=True).agg(**aggregations).reset_index()
+
+    # Rank the directors on every aggregate
+    leaderboard['mean_rank'] = leaderboard['mean_score'].rank(ascending=False, method='min')
+    leaderboard['sum_rank'] = leaderboard['sum_score'].rank(ascending=False, method='min')
+    leaderboard['custom_rank'] = leaderboard['custom_score'].rank(ascending=False, method='min')
+    leaderboard['actor_custom_score'] = leaderboard['actor_custom_score'].where(leaderboard['is_actor'])
+    leaderboard['actor_custom_rank'] = leaderboard['actor_custom_score'].rank(ascending=False, method='min')
+
+    columns = [director_column] + ([name_column] if name_column in aggregations else []) + [
+        'total_movies', 'mean_score', 'mean_rank', 'sum_score', 'sum_rank', 'custom_score', 'custom_rank',
+        'is_actor', 'actor_custom_score', 'actor_custom_rank']
+
+    # Sort by custom rank
+    leaderboard = leaderboard.sort_values('custom_rank', kind='stable').reset_index(drop=True)
+
+    return leaderboard[columns]
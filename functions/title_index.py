@@ -0,0 +1,311 @@
+import json
+import math
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from functions.fact_table import MovieFacts, tconst_to_id, id_to_const
+from functions.utilities import clean_data
+
+# Columns of title.akas kept in the index
+AKAS_COLUMNS = ['titleId', 'title', 'region', 'isOriginalTitle']
+# Titles turned into trigrams at once while building the index
+TRIGRAM_CHUNK_ROWS = 500_000
+# Trigrams are three code points packed into one integer, 21 bits each
+CODE_POINT_BITS = 21
+COMBINING_MARKS = re.compile('[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]')
+INDEX_MANIFEST = 'manifest.json'
+INDEX_ARRAYS = ('title_ids', 'region_codes', 'is_original', 'title_bytes', 'title_offsets', 'trigram_counts',
+                'trigrams', 'posting_offsets', 'postings')
+
+
+def default_title_index_dir(akas_path):
+    """Return the directory of the title index kept next to the title.akas file."""
+    return akas_path + '.trigrams'
+
+
+def normalize_titles(titles):
+    """
+    Normalize titles for matching: decomposed diacritics removed, case folded and punctuation turned into spaces.
+
+    Args:
+    titles (iterable): The titles.
+
+    Returns:
+    pd.Series: The normalized titles, empty strings for missing titles.
+    """
+    titles = pd.Series(list(titles), dtype=object).fillna('').astype(str)
+    titles = titles.str.normalize('NFKD').str.replace(COMBINING_MARKS, '', regex=True).str.casefold()
+    return titles.str.replace(r'[\W_]+', ' ', regex=True).str.strip()
+
+
+def title_trigrams(normalized_titles):
+    """
+    Compute the distinct trigrams of every normalized title, vectorized over all the titles.
+
+    Titles are padded with two leading spaces and one trailing space, so that their beginnings weigh more and
+    short titles still have trigrams; the padded titles are concatenated into a single code point array.
+
+    Args:
+    normalized_titles (pd.Series): Titles returned by normalize_titles.
+
+    Returns:
+    tuple: Arrays of trigram keys and of title positions, one entry per distinct (title, trigram) pair, sorted by
+        title position.
+    """
+    padded = '  ' + normalized_titles + ' '
+    lengths = padded.str.len().to_numpy(np.int64)
+    counts = np.where(normalized_titles.str.len().to_numpy() > 0, lengths - 2, 0)
+    code_points = np.frombuffer(''.join(padded).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    trigram_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rows = np.repeat(np.arange(len(counts)), counts)
+    positions = np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(trigram_starts, counts)
+    keys = (code_points[positions] << (2 * CODE_POINT_BITS)) | (code_points[positions + 1] << CODE_POINT_BITS) | \
+        code_points[positions + 2]
+
+    # Keep every trigram once per title
+    order = np.lexsort((keys, rows))
+    keys, rows = keys[order], rows[order]
+    distinct = np.ones(len(keys), dtype=bool)
+    distinct[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+    return keys[distinct], rows[distinct]
+
+
+def build_title_index(akas_df, index_dir):
+    """
+    Build a trigram index over the titles of title.akas and save it to a directory of .npy files.
+
+    The akas are sorted by titleId, and every distinct trigram points to the sorted list (postings) of the akas
+    containing it, so a lookup only reads the postings of the trigrams of the query.
+
+    Args:
+    akas_df (pd.DataFrame): DataFrame of title.akas with the 'titleId', 'title', 'region' and 'isOriginalTitle'
+        columns.
+    index_dir (str): Directory of the index, created if needed.
+
+    Returns:
+    str: The directory of the index.
+    """
+    print(f'Building title index in: {index_dir} ...')
+    os.makedirs(index_dir, exist_ok=True)
+
+    akas_df = akas_df.dropna(subset=['titleId', 'title'])
+    title_ids = tconst_to_id(akas_df['titleId'])
+    order = np.argsort(title_ids, kind='stable')
+    akas_df, title_ids = akas_df.iloc[order], title_ids[order]
+    titles = akas_df['title'].astype(str)
+
+    region_codes, regions = pd.factorize(akas_df['region'])
+    encoded_titles = titles.str.encode('utf-8')
+    title_lengths = encoded_titles.str.len().to_numpy(np.int64)
+    is_original = pd.to_numeric(akas_df['isOriginalTitle'], errors='coerce').fillna(0).to_numpy() == 1
+
+    # Trigrams are extracted in chunks of titles, then grouped by trigram with one stable sort
+    chunk_keys, chunk_rows = [], []
+    for start in range(0, len(titles), TRIGRAM_CHUNK_ROWS):
+        keys, rows = title_trigrams(normalize_titles(titles.iloc[start:start + TRIGRAM_CHUNK_ROWS]))
+        chunk_keys.append(keys)
+        chunk_rows.append((rows + start).astype(np.int32))
+    keys = np.concatenate(chunk_keys) if chunk_keys else np.empty(0, dtype=np.int64)
+    rows = np.concatenate(chunk_rows) if chunk_rows else np.empty(0, dtype=np.int32)
+    order = np.argsort(keys, kind='stable')
+    keys, postings = keys[order], rows[order]
+    trigrams, first_postings = np.unique(keys, return_index=True)
+
+    arrays = {
+        'title_ids': title_ids.astype(np.int32),
+        'region_codes': region_codes.astype(np.int16),
+        'is_original': is_original,
+        'title_bytes': np.frombuffer(b''.join(encoded_titles), dtype=np.uint8),
+        'title_offsets': np.concatenate(([0], np.cumsum(title_lengths))),
+        'trigram_counts': np.bincount(rows, minlength=len(titles)).astype(np.int32),
+        'trigrams': trigrams,
+        'posting_offsets': np.append(first_postings, len(postings)).astype(np.int64),
+        'postings': postings
+    }
+    for name, values in arrays.items():
+        np.save(os.path.join(index_dir, f'{name}.npy'), values)
+    with open(os.path.join(index_dir, INDEX_MANIFEST), 'w') as file:
+        json.dump({'rows': len(titles), 'regions': [str(region) for region in regions]}, file)
+
+    return index_dir
+
+
+def load_title_index(akas_path, index_dir=None, akas_df=None, movies_df=None):
+    """
+    Load the memory-mapped title index, building it first if it is missing or older than the akas file.
+
+    Args:
+    akas_path (str): Path to the title.akas TSV file.
+    index_dir (str, optional): Directory of the index. Defaults to the akas path with '.trigrams' appended.
+    akas_df (pd.DataFrame, optional): The already loaded akas, used instead of reading the file when the index
+        has to be built.
+    movies_df (pd.DataFrame or MovieFacts, optional): Movies the searches are restricted to by default.
+
+    Returns:
+    TitleIndex: The index.
+    """
+    index_dir = index_dir or default_title_index_dir(akas_path)
+    manifest_path = os.path.join(index_dir, INDEX_MANIFEST)
+    if not os.path.exists(manifest_path) or os.path.getmtime(manifest_path) < os.path.getmtime(akas_path):
+        if akas_df is None:
+            print(f'Loading data from: {akas_path} ...')
+            akas_df = clean_data(pd.read_csv(akas_path, sep='\t', usecols=AKAS_COLUMNS, low_memory=False))
+        build_title_index(akas_df[AKAS_COLUMNS], index_dir)
+    return TitleIndex(index_dir, movies_df)
+
+
+def movie_lookup(movies_df):
+    """
+    Build the lookup from title id to movie used to restrict the title searches to the analysed movies.
+
+    Args:
+    movies_df (pd.DataFrame or MovieFacts): Analysis output with 'tconst', 'country' and 'composite_score'.
+
+    Returns:
+    tuple: The pd.Index of the movie title ids (first occurrence of every title) and the arrays of their countries
+        and composite scores.
+    """
+    if isinstance(movies_df, MovieFacts):
+        title_ids = movies_df.tconst
+        countries = movies_df.countries.take(movies_df.country_codes)
+        scores = movies_df.composite_score
+    else:
+        title_ids = tconst_to_id(movies_df['tconst'])
+        countries = movies_df['country'].to_numpy()
+        scores = movies_df['composite_score'].to_numpy()
+    first = ~pd.Index(title_ids).duplicated()
+    return pd.Index(title_ids[first]), countries[first], scores[first]
+
+
+class TitleIndex:
+    """
+    Trigram index over the titles of title.akas, memory-mapped from the directory written by build_title_index.
+
+    Args:
+    index_dir (str): Directory of the index.
+    movies_df (pd.DataFrame or MovieFacts, optional): Movies the searches are restricted to by default (see
+        attach_movies).
+    """
+
+    def __init__(self, index_dir, movies_df=None):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, INDEX_MANIFEST)) as file:
+            manifest = json.load(file)
+        self.regions = np.asarray(manifest['regions'] + [None], dtype=object)
+        for name in INDEX_ARRAYS:
+            setattr(self, name, np.load(os.path.join(index_dir, f'{name}.npy'), mmap_mode='r'))
+        self.movies = None
+        if movies_df is not None:
+            self.attach_movies(movies_df)
+
+    def attach_movies(self, movies_df):
+        """Build once the title id to movie lookup used by the searches called without movies_df."""
+        self.movies = movie_lookup(movies_df)
+
+    def __len__(self):
+        return len(self.title_ids)
+
+    def titles(self, rows):
+        """Decode the titles of the given akas rows."""
+        return [bytes(self.title_bytes[self.title_offsets[row]:self.title_offsets[row + 1]]).decode('utf-8')
+                for row in rows]
+
+    def original_titles(self, title_ids):
+        """Return the original title of every title id, None when the akas have none."""
+        starts = np.searchsorted(self.title_ids, title_ids, side='left')
+        ends = np.searchsorted(self.title_ids, title_ids, side='right')
+        originals = []
+        for start, end in zip(starts, ends):
+            rows = start + np.flatnonzero(self.is_original[start:end])
+            originals.append(self.titles(rows[:1])[0] if len(rows) else None)
+        return originals
+
+    def search(self, query, movies_df=None, limit=10, min_similarity=0.3):
+        """
+        Find the titles most similar to a (possibly localized or misspelled) query.
+
+        Candidates are the akas sharing enough trigrams with the normalized query to reach min_similarity, found
+        from the postings of its rarest trigrams only; their similarity is the Jaccard index of the trigram sets, and
+        every title keeps its best matching aka.
+
+        Args:
+        query (str): The title to look up.
+        movies_df (pd.DataFrame or MovieFacts, optional): Analysis output with 'tconst', 'country' and
+            'composite_score', e.g. the movies DataFrame of task 1. When given, only its movies are returned.
+            Defaults to the movies attached to the index, whose lookup is not rebuilt on every search.
+        limit (int): Maximum number of titles returned.
+        min_similarity (float): Minimum similarity of the returned titles, between 0 and 1.
+
+        Returns:
+        pd.DataFrame: DataFrame with 'tconst', 'title' (the matching aka), 'region', 'similarity' and
+            'original_title' columns, plus 'country' and 'composite_score' when searching among movies, sorted by
+            similarity.
+        """
+        query_trigrams = np.unique(title_trigrams(normalize_titles([query]))[0])
+        positions = np.searchsorted(self.trigrams, query_trigrams)
+        found = positions < len(self.trigrams)
+        found[found] = self.trigrams[positions[found]] == query_trigrams[found]
+        positions = positions[found]
+        postings = [self.postings[self.posting_offsets[position]:self.posting_offsets[position + 1]]
+                    for position in positions]
+
+        # Prefix filtering: a similarity of at least min_similarity needs min_shared trigrams in common with the
+        # query, so every match has one of the len(query_trigrams) - min_shared + 1 rarest query trigrams (the
+        # trigrams missing from the index being the rarest). Candidates are read from these postings only, and the
+        # other, more common trigrams are counted with binary searches of their sorted postings
+        min_shared = max(1, math.ceil(min_similarity * len(query_trigrams) - 1e-9))
+        prefix_size = max(0, len(query_trigrams) - min_shared + 1 - (len(query_trigrams) - len(positions)))
+        order = np.argsort([len(posting) for posting in postings], kind='stable')
+        prefix = [postings[i] for i in order[:prefix_size]]
+        rows, shared = np.unique(np.concatenate(prefix) if prefix else np.empty(0, dtype=np.int32),
+                                 return_counts=True)
+
+        # A title of n trigrams needs min_similarity * (len(query_trigrams) + n) / (1 + min_similarity) shared
+        # trigrams, so candidates that cannot reach it with the remaining trigrams are dropped before each search
+        needed = np.ceil(min_similarity * (len(query_trigrams) + self.trigram_counts[rows]) / (1 + min_similarity)
+                         - 1e-9)
+        remaining = len(order) - prefix_size
+        for i in order[prefix_size:]:
+            reachable = shared + remaining >= needed
+            rows, shared, needed = rows[reachable], shared[reachable], needed[reachable]
+            posting = postings[i]
+            hits = np.minimum(np.searchsorted(posting, rows), len(posting) - 1)
+            shared += posting[hits] == rows
+            remaining -= 1
+
+        similarity = shared / (len(query_trigrams) + self.trigram_counts[rows] - shared)
+        keep = similarity >= min_similarity
+        rows, similarity = rows[keep], similarity[keep]
+        title_ids = np.asarray(self.title_ids[rows], dtype=np.int64)
+
+        movies = self.movies if movies_df is None else movie_lookup(movies_df)
+        movie_rows = None
+        if movies is not None:
+            movie_ids, movie_countries, movie_scores = movies
+            movie_rows = movie_ids.get_indexer(title_ids)
+            in_movies = movie_rows >= 0
+            rows, similarity, title_ids, movie_rows = (rows[in_movies], similarity[in_movies],
+                                                       title_ids[in_movies], movie_rows[in_movies])
+
+        # Best aka of every title, then the best titles
+        order = np.lexsort((rows, -similarity))
+        _, best = np.unique(title_ids[order], return_index=True)
+        best = order[best]
+        best = best[np.lexsort((rows[best], -similarity[best]))][:limit]
+
+        result = pd.DataFrame({
+            'tconst': id_to_const(title_ids[best], 'tt') if len(best) else np.empty(0, dtype=object),
+            'title': self.titles(rows[best]),
+            'region': self.regions.take(np.asarray(self.region_codes[rows[best]], dtype=np.int64)),
+            'similarity': similarity[best],
+            'original_title': self.original_titles(title_ids[best])
+        })
+        if movie_rows is not None:
+            result['country'] = movie_countries[movie_rows[best]]
+            result['composite_score'] = movie_scores[movie_rows[best]]
+        return result
@@ -1,5 +1,24 @@
+import numpy as np
 import pandas as pd
 import os
+import re
+
+from functions.indicators import IndicatorTable
+
+# Professions listed in the primaryProfession column of name.basics, each assigned one bit of the profession mask
+PROFESSIONS = (
+    'actor', 'actress', 'director', 'writer', 'producer', 'composer', 'cinematographer', 'editor',
+    'production_designer', 'casting_director', 'art_director', 'costume_designer', 'make_up_department',
+    'soundtrack', 'music_department', 'camera_department', 'editorial_department', 'art_department',
+    'sound_department', 'special_effects', 'visual_effects', 'stunts', 'animation_department',
+    'casting_department', 'costume_department', 'location_management', 'transportation_department',
+    'script_department', 'assistant_director', 'production_manager', 'executive', 'manager', 'talent_agent',
+    'publicist', 'legal', 'music_artist', 'podcaster', 'archive_footage', 'archive_sound',
+    'electrical_department', 'miscellaneous'
+)
+PROFESSION_BITS = {profession: 1 << bit for bit, profession in enumerate(PROFESSIONS)}
+# Units accepted by parse_memory_size
+MEMORY_UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3, 'TB': 1024 ** 4}
 
 
 def load_data(file_path: str, header=0) -> pd.DataFrame:
@@ -39,18 +58,37 @@ def save_clean_data(df, output_path):
     df.to_csv(output_path, index=False)
 
 
+def parse_memory_size(size):
+    """
+    Convert a memory size such as 2147483648, '512MB' or '2GB' to a number of bytes.
+
+    Args:
+    size (int, float or str): The memory size.
+
+    Returns:
+    int: The number of bytes.
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMGT]?B?)\s*', str(size).upper())
+    if match is None:
+        raise ValueError(f"Invalid memory size: {size}")
+    return int(float(match.group(1)) * MEMORY_UNITS[match.group(2)])
+
+
 def filter_by_common_years(df1, df2, df1_year_column='startYear', df2_start_column=4):
     """
     Filter two DataFrames to only include data for the years that are present in both tables.
 
     Args:
     df1 (pd.DataFrame): First DataFrame containing a year column.
-    df2 (pd.DataFrame): Second DataFrame with years as column names starting from the fifth column.
+    df2 (pd.DataFrame or IndicatorTable): Second DataFrame with years as column names starting from the fifth column,
+        or the same data as an IndicatorTable.
     df1_year_column (str): The name of the year column in df1. Default is 'startYear'.
     df2_start_column (int): The index of the first year column in df2. Default is 4.
 
     Returns:
-    tuple: Filtered df1 and df2 DataFrames.
+    tuple: Filtered df1 and df2 DataFrames (df2 stays an IndicatorTable if given as one).
     """
 
     # Convert the year column in df1 to integers
@@ -61,8 +99,11 @@ def filter_by_common_years(df1, df2, df1_year_column='startYear', df2_start_colu
     min_year_df1, max_year_df1 = df1_years.min(), df1_years.max()
 
     # Extract the year range from df2 column names, ignoring the last column
-    df2_years = [int(col) for col in df2.columns[df2_start_column:-1] if col.isdigit()]
-    min_year_df2, max_year_df2 = min(df2_years), max(df2_years)
+    if isinstance(df2, IndicatorTable):
+        min_year_df2, max_year_df2 = df2.year_range()
+    else:
+        df2_years = [int(col) for col in df2.columns[df2_start_column:-1] if col.isdigit()]
+        min_year_df2, max_year_df2 = min(df2_years), max(df2_years)
 
     # Determine the common year range
     start_year = max(min_year_df1, min_year_df2)
@@ -75,6 +116,8 @@ def filter_by_common_years(df1, df2, df1_year_column='startYear', df2_start_colu
     filtered_df1 = df1[(df1[df1_year_column] >= start_year) & (df1[df1_year_column] <= end_year)]
 
     # Filter df2 to include only the columns in the common range, ignoring the last column
+    if isinstance(df2, IndicatorTable):
+        return filtered_df1, df2.slice_years(start_year, end_year)
     year_columns = [col for col in df2.columns[df2_start_column:-1] if start_year <= int(col) <= end_year]
     filtered_df2 = df2.loc[:, df2.columns[:df2_start_column].tolist() + year_columns]
 
@@ -85,6 +128,7 @@ def filter_by_user_year_range(df1, df2, user_start_year=None, user_end_year=None
                               df2_start_column=4):
     """
     Further filter two DataFrames based on a user-specified year range.
+    df2 may also be an IndicatorTable, which is then sliced without copying its values.
     """
     if user_start_year is None and user_end_year is None:
         return df1, df2
@@ -92,9 +136,12 @@ def filter_by_user_year_range(df1, df2, user_start_year=None, user_end_year=None
     # Extract the year range from df1 and df2 for current data
     min_year_df1 = df1[df1_year_column].min()
     max_year_df1 = df1[df1_year_column].max()
-    df2_years = [int(col) for col in df2.columns[df2_start_column:-1] if col.isdigit()]
-    min_year_df2 = min(df2_years)
-    max_year_df2 = max(df2_years)
+    if isinstance(df2, IndicatorTable):
+        min_year_df2, max_year_df2 = df2.year_range()
+    else:
+        df2_years = [int(col) for col in df2.columns[df2_start_column:-1] if col.isdigit()]
+        min_year_df2 = min(df2_years)
+        max_year_df2 = max(df2_years)
 
     # Determine the actual start and end years to filter
     start_year = max(min_year_df1, min_year_df2)
@@ -113,7 +160,85 @@ def filter_by_user_year_range(df1, df2, user_start_year=None, user_end_year=None
     filtered_df1 = df1[(df1[df1_year_column] >= start_year) & (df1[df1_year_column] <= end_year)]
 
     # Filter df2 to include only the columns in the new range, ignoring the last column
+    if isinstance(df2, IndicatorTable):
+        return filtered_df1, df2.slice_years(start_year, end_year)
     year_columns = [col for col in df2.columns[df2_start_column:-1] if start_year <= int(col) <= end_year]
     filtered_df2 = df2.loc[:, df2.columns[:df2_start_column].tolist() + year_columns]
 
     return filtered_df1, filtered_df2
+
+
+def profession_mask(*professions):
+    """
+    Combine the bits of the given professions into a single integer mask.
+
+    Args:
+    professions (str): Profession names as they appear in the primaryProfession column.
+
+    Returns:
+    int: Bitmask with the bit of every given profession set.
+    """
+    mask = 0
+    for profession in professions:
+        if profession not in PROFESSION_BITS:
+            raise ValueError(f"Unknown profession: {profession}")
+        mask |= PROFESSION_BITS[profession]
+    return mask
+
+
+def encode_professions(df, profession_column='primaryProfession', flag_column='professionFlags'):
+    """
+    Parse the comma-separated profession column once into a per-person integer bitmask column.
+
+    Every distinct profession string is parsed only once and the masks are broadcast back to the rows,
+    so later profession filters become vectorized bit tests on the integer column.
+
+    Args:
+    df (pd.DataFrame): DataFrame containing the profession column (e.g. name.basics).
+    profession_column (str): The column name containing comma-separated professions.
+    flag_column (str): The name of the integer bitmask column to add.
+
+    Returns:
+    pd.DataFrame: DataFrame with the added bitmask column.
+    """
+    codes, uniques = pd.factorize(df[profession_column])
+
+    unique_masks = np.zeros(len(uniques) + 1, dtype=np.int64)
+    for i, professions in enumerate(uniques):
+        for profession in str(professions).split(','):
+            unique_masks[i] |= PROFESSION_BITS.get(profession.strip().lower(), 0)
+
+    # Missing values get code -1, which points to the trailing empty mask
+    df[flag_column] = unique_masks[codes]
+
+    return df
+
+
+def has_profession(df, professions, flag_column='professionFlags'):
+    """
+    Test which rows have at least one of the given professions using the precomputed bitmask column.
+
+    Args:
+    df (pd.DataFrame): DataFrame containing the bitmask column produced by encode_professions.
+    professions (str or list): Profession name or list of profession names to test for.
+    flag_column (str): The name of the bitmask column. Joins leave it as floats when some rows have no match
+        (e.g. movies without a director); missing flags are treated as no profession.
+
+    Returns:
+    pd.Series: Boolean Series, True for rows with any of the given professions.
+    """
+    if isinstance(professions, str):
+        professions = [professions]
+    flags = df[flag_column].fillna(0).astype(np.int64)
+    return (flags & profession_mask(*professions)) != 0
+
+
+def load_names(file_path: str) -> pd.DataFrame:
+    """Load and clean name.basics, parsing primaryProfession once into the professionFlags bitmask column."""
+    names_df = clean_data(load_data(file_path))
+    return encode_professions(names_df)
+
+
+def load_indicator(file_path: str, header=2) -> IndicatorTable:
+    """Load a World Bank indicator CSV file (GDP, population) into a compact country x year IndicatorTable."""
+    return IndicatorTable.from_frame(clean_data(load_data(file_path, header=header)))
@@ -12,6 +12,7 @@ def main():
                         help='Path to directory with GDP and Population data')
     parser.add_argument('--start_year', type=int, help='Start year for the analysis period')
     parser.add_argument('--end_year', type=int, help='End year for the analysis period')
+    parser.add_argument('--max_memory', help="Memory budget of the analysis, e.g. '4GB'; frames are downcast near it")
 
     args = parser.parse_args()
 
@@ -22,6 +23,8 @@ def main():
         os.environ['START_YEAR'] = str(args.start_year)
     if args.end_year:
         os.environ['END_YEAR'] = str(args.end_year)
+    if args.max_memory:
+        os.environ['MAX_MEMORY'] = args.max_memory
 
     # Print environment variables for debugging
     print("MOVIE_DATA_PATH:", os.environ['MOVIE_DATA_PATH'])
@@ -9,9 +9,14 @@ setup(
         'numpy',
         'argparse'
     ],
+    extras_require={
+        'polars': ['polars', 'pyarrow'],
+        'duckdb': ['duckdb']
+    },
     entry_points={
         'console_scripts': [
-            'launch_analysis = launch_notebook:main'
+            'launch_analysis = launch_notebook:main',
+            'analysis_service = functions.service:main'
         ]
     },
 )
@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+import pandas as pd
+from functions.task2_functions import average_composite_score_by_country, weighted_average_composite_score_by_country
+from functions.bootstrap import bootstrap_country_scores
+
+
+class TestBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a random movies DataFrame for testing."""
+        rng = np.random.default_rng(0)
+        n_movies = 300
+        self.movies_df = pd.DataFrame({
+            'country': np.append(rng.choice(['US', 'FR', 'PL'], n_movies - 1), 'IS'),
+            'numVotes': rng.integers(1, 1000, n_movies),
+            'composite_score': rng.uniform(1, 10, n_movies)
+        })
+
+    def test_bootstrap_country_scores(self):
+        """Test the point estimates and the intervals of the bootstrap."""
+        result = bootstrap_country_scores(self.movies_df, n_replicates=500, n_workers=1, seed=1)
+        expected = average_composite_score_by_country(self.movies_df).reset_index(drop=True)
+
+        pd.testing.assert_frame_equal(result[['country', 'average composite score']], expected)
+        self.assertTrue((result['ci_lower'] <= result['average composite score']).all())
+        self.assertTrue((result['ci_upper'] >= result['average composite score']).all())
+        self.assertTrue((result['rank_lower'] <= result['rank_upper']).all())
+
+        single_movie = result[result['country'] == 'IS'].iloc[0]
+        self.assertEqual(single_movie['movies'], 1)
+        self.assertEqual(single_movie['ci_lower'], single_movie['ci_upper'])
+
+    def test_bootstrap_weighted(self):
+        """Test the weighted bootstrap point estimates."""
+        result = bootstrap_country_scores(self.movies_df, n_replicates=100, weighted=True, n_workers=1, seed=1)
+        expected = weighted_average_composite_score_by_country(self.movies_df).reset_index(drop=True)
+        np.testing.assert_allclose(result['weighted average composite score'],
+                                   expected['weighted average composite score'])
+
+    def test_bootstrap_reproducible_across_workers(self):
+        """Test that a seed gives the same intervals with one or several workers."""
+        single = bootstrap_country_scores(self.movies_df, n_replicates=600, n_workers=1, seed=7)
+        multiple = bootstrap_country_scores(self.movies_df, n_replicates=600, n_workers=2, seed=7)
+        pd.testing.assert_frame_equal(single, multiple)
+
+        # Weighted batches spread over the workers, which attach to the published movie and country arrays
+        single = bootstrap_country_scores(self.movies_df, n_replicates=60, weighted=True, n_workers=1, seed=3)
+        multiple = bootstrap_country_scores(self.movies_df, n_replicates=60, weighted=True, n_workers=2, seed=3,
+                                            max_memory=len(self.movies_df) * 48 * 14)
+        pd.testing.assert_frame_equal(single, multiple)
+
+    def test_bootstrap_memory_budget(self):
+        """Test that a small memory budget splits the replicates into smaller batches with the same intervals."""
+        expected = bootstrap_country_scores(self.movies_df, n_replicates=60, weighted=True, n_workers=1, seed=3)
+        result = bootstrap_country_scores(self.movies_df, n_replicates=60, weighted=True, n_workers=1, seed=3,
+                                          max_memory=len(self.movies_df) * 48 * 7)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+import pandas as pd
+from functions.careers import director_careers, career_peaks
+
+
+class TestCareers(unittest.TestCase):
+
+    def setUp(self):
+        """Set up mock data for testing."""
+        self.movies_directors_df = pd.DataFrame({
+            'tconst': [f'tt{i:07d}' for i in range(9)],
+            'nconst': ['nm02', 'nm01', 'nm01', 'nm02', 'nm01', 'nm01', 'nm03', 'nm01', 'nm02'],
+            'primaryName': ['B', 'A', 'A', 'B', 'A', 'A', 'C', 'A', 'B'],
+            'startYear': [2005.0, 2000.0, 2000.0, 2001.0, 2003.0, 2010.0, np.nan, 2004.0, 2003.0],
+            'composite_score': [6.0, 2.0, 4.0, 8.0, 9.0, 1.0, 5.0, 3.0, 7.0],
+            'numVotes': [60, 20, 40, 80, 90, 10, 50, 30, 70]
+        })
+
+    def naive_careers(self, window, min_periods):
+        """Compute the careers with a groupby and a loop over the years, for comparison."""
+        rows = []
+        movies_df = self.movies_directors_df.dropna(subset=['startYear'])
+        for director, group in movies_df.groupby('nconst'):
+            for year in sorted(group['startYear'].unique()):
+                in_window = group[(group['startYear'] > year - window) & (group['startYear'] <= year)]
+                rows.append({
+                    'nconst': director,
+                    'year': int(year),
+                    'rolling_movies': len(in_window),
+                    'rolling_mean_score': in_window['composite_score'].mean() if len(in_window) >= min_periods
+                    else np.nan,
+                    'cumulative_votes': float(group.loc[group['startYear'] <= year, 'numVotes'].sum())
+                })
+        return pd.DataFrame(rows)
+
+    def test_director_careers(self):
+        """Test the rolling and cumulative statistics against a naive computation."""
+        for window, min_periods in [(1, 1), (3, 1), (3, 2), (20, 1)]:
+            careers = director_careers(self.movies_directors_df, window=window, min_periods=min_periods)
+            expected = self.naive_careers(window, min_periods)
+            pd.testing.assert_frame_equal(careers[expected.columns], expected, check_dtype=False)
+
+        careers = director_careers(self.movies_directors_df, window=3)
+        first_row = careers.iloc[0]
+        self.assertEqual((first_row['nconst'], first_row['primaryName'], first_row['movies']), ('nm01', 'A', 2))
+        self.assertEqual(careers['window_start_year'].tolist(), [2000, 2003, 2003, 2010, 2001, 2001, 2003])
+        self.assertEqual(careers['cumulative_movies'].tolist(), [2, 3, 4, 5, 1, 2, 3])
+
+        with self.assertRaises(ValueError):
+            director_careers(self.movies_directors_df, window=0)
+
+    def test_career_peaks(self):
+        """Test the peak windows of the directors."""
+        peaks = career_peaks(director_careers(self.movies_directors_df, window=2))
+        self.assertEqual(peaks['nconst'].tolist(), ['nm01', 'nm02'])
+        self.assertEqual(peaks.loc[0, ['peak_score', 'peak_start_year', 'peak_end_year']].tolist(), [9.0, 2003, 2003])
+        self.assertEqual(peaks.loc[1, ['peak_score', 'peak_start_year', 'peak_end_year']].tolist(), [8.0, 2001, 2001])
+        self.assertEqual(peaks['total_movies'].tolist(), [5, 3])
+        self.assertEqual(peaks['total_votes'].tolist(), [190.0, 210.0])
+        self.assertEqual(peaks['active_years'].tolist(), [4, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
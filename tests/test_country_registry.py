@@ -0,0 +1,58 @@
+import unittest
+import pandas as pd
+from functions.country_registry import CountryRegistry
+from functions.task2_functions import get_countries_and_clean_orders, filter_countries_with_reference
+
+
+class TestCountryRegistry(unittest.TestCase):
+
+    def setUp(self):
+        """Set up mock country codes for testing."""
+        self.country_codes_df = pd.DataFrame({
+            'name': ['United States of America', 'France', 'Poland', 'Poland (duplicate)'],
+            'alpha-2': ['US', 'FR', 'PL', 'PL'],
+            'alpha-3': ['USA', 'FRA', 'POL', 'POX'],
+            'region': ['Americas', 'Europe', 'Europe', 'Europe']
+        })
+        self.registry = CountryRegistry(self.country_codes_df)
+
+        self.votes_df = pd.DataFrame({
+            'country': ['US', 'XWG', 'FR', 'PL', 'SUHH', 'XWG'],
+            'number of votes': [600, 500, 400, 300, 200, 100]
+        })
+
+    def test_map(self):
+        """Test mapping codes between registry columns."""
+        mapped, unmatched = self.registry.map(['PL', 'XX', 'US', 'XX'], 'alpha-2', 'alpha-3')
+        self.assertEqual(mapped.tolist(), ['POL', None, 'USA', None])
+        self.assertEqual(unmatched, ['XX'])
+
+        mapped, _ = self.registry.map(['FRA'], 'alpha-3', 'name')
+        self.assertEqual(mapped.tolist(), ['France'])
+        self.assertEqual(self.registry.contains(['FR', 'XX'], 'alpha-2').tolist(), [True, False])
+
+    def test_get_countries_and_clean_orders(self):
+        """Test that mapping with the registry matches the merge-based version."""
+        expected, expected_missing = get_countries_and_clean_orders(
+            self.votes_df, self.country_codes_df.drop_duplicates('alpha-2'), 'country', 'alpha-2',
+            ['name', 'number of votes'])
+        result, missing = get_countries_and_clean_orders(
+            self.votes_df, self.registry, 'country', 'alpha-2', ['name', 'number of votes'])
+
+        pd.testing.assert_frame_equal(result, expected)
+        self.assertEqual(missing, expected_missing)
+
+    def test_filter_countries_with_reference(self):
+        """Test filtering with the registry instead of the reference DataFrame."""
+        gdp_df = pd.DataFrame({
+            'Country Name': ['France', 'World', 'Poland'],
+            'Country Code': ['FRA', 'WLD', 'POL'],
+            '2023': [20000, 100000, 7000]
+        })
+        expected = filter_countries_with_reference(gdp_df, 'Country Code', self.country_codes_df, 'alpha-3')
+        result = filter_countries_with_reference(gdp_df, 'Country Code', self.registry, 'alpha-3')
+        pd.testing.assert_frame_equal(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
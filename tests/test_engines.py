@@ -0,0 +1,159 @@
+import unittest
+import numpy as np
+import pandas as pd
+from functions.engines import ENGINES, available_engines, resolve_engine, join, group_statistics
+from functions.task1_functions import prepare_data, quality_of_movies_by_country
+from functions.task2_functions import (
+    total_votes_by_country,
+    average_composite_score_by_country,
+    weighted_average_composite_score_by_country
+)
+from functions.task3_functions import prepare_movies_directors, rank_directors, custom_ranking
+
+# Engines compared with pandas; the ones not installed are skipped
+OTHER_ENGINES = [engine for engine in ENGINES if engine != 'pandas']
+
+
+class TestEngines(unittest.TestCase):
+
+    def setUp(self):
+        """Set up mock data for testing."""
+        tconsts = [f'tt{i:07d}' for i in range(1, 9)]
+        self.basics = pd.DataFrame({
+            'tconst': tconsts,
+            'titleType': ['movie'] * 7 + ['short'],
+            'primaryTitle': [f'Title {i}' for i in range(8)],
+            'startYear': [2000 + i for i in range(8)]
+        })
+        self.ratings = pd.DataFrame({
+            'tconst': tconsts[:7],
+            'averageRating': [5.0, 6.5, 7.0, 8.2, 4.1, 9.0, 6.0],
+            'numVotes': [100, 2000, 300, 4000, 50, 600, 700]
+        })
+        self.akas = pd.DataFrame({
+            'titleId': tconsts + tconsts[:3],
+            'title': [f'Title {i}' for i in range(8)] + [f'Alt {i}' for i in range(3)],
+            'region': ['US', 'FR', pd.NA, 'PL', 'US', 'FR', 'PL', 'US', 'DE', 'FR', 'IT'],
+            'isOriginalTitle': [1] * 8 + [0] * 3
+        })
+        self.crew = pd.DataFrame({
+            'tconst': tconsts,
+            'directors': ['nm01', 'nm02', 'nm01', 'nm03', pd.NA, 'nm02', 'nm01', 'nm03']
+        })
+        self.names = pd.DataFrame({
+            'nconst': ['nm01', 'nm02', 'nm03'],
+            'primaryName': ['Director A', 'Director B', 'Director C']
+        })
+
+    def engines(self):
+        for engine in OTHER_ENGINES:
+            if engine not in available_engines():
+                print(f"Skipping the {engine} engine: not installed")
+                continue
+            yield engine
+
+    def test_resolve_engine(self):
+        """Test engine resolution."""
+        self.assertEqual(resolve_engine('pandas'), 'pandas')
+        with self.assertRaises(ValueError):
+            resolve_engine('spark')
+
+    def test_join(self):
+        """Test that joins match pandas.merge, with duplicate, missing and unmatched keys."""
+        left = pd.DataFrame({'key': ['a', 'b', None, 'c', 'a'], 'value': [1, 2, 3, 4, 5]})
+        right = pd.DataFrame({'key': ['a', None, 'b', 'd'], 'value': [1.5, 2.5, 3.5, 4.5], 'other': list('wxyz')})
+        duplicated_right = pd.DataFrame({'key': ['a', None, 'a'], 'other': list('xyz')})
+        for engine in self.engines():
+            with self.subTest(engine=engine, how='many-to-many'):
+                pd.testing.assert_frame_equal(
+                    join(left, duplicated_right, 'key', engine=engine).sort_values(['value', 'other'],
+                                                                                   ignore_index=True),
+                    left.merge(duplicated_right, on='key').sort_values(['value', 'other'], ignore_index=True))
+            for how in ['inner', 'left', 'right']:
+                with self.subTest(engine=engine, how=how):
+                    if how != 'inner':
+                        pd.testing.assert_frame_equal(join(left, duplicated_right, 'key', how=how, engine=engine),
+                                                      left.merge(duplicated_right, on='key', how=how))
+                    pd.testing.assert_frame_equal(join(left, right, 'key', how=how, engine=engine),
+                                                  left.merge(right, on='key', how=how))
+                    pd.testing.assert_frame_equal(
+                        join(left, right.rename(columns={'key': 'code'}), 'key', 'code', how=how, engine=engine),
+                        left.merge(right.rename(columns={'key': 'code'}), left_on='key', right_on='code', how=how))
+
+    def test_join_nullable_columns(self):
+        """Test that nullable integer columns keep their dtype when a join leaves them with missing values."""
+        left = pd.DataFrame({'key': ['a', 'b'], 'value': pd.array([1, 2], dtype='Int64')})
+        right = pd.DataFrame({'key': ['a', 'c'], 'other': pd.array([5, None], dtype='Int64')})
+        for engine in self.engines():
+            for how in ['inner', 'left', 'right']:
+                with self.subTest(engine=engine, how=how):
+                    pd.testing.assert_frame_equal(join(left, right, 'key', how=how, engine=engine),
+                                                  left.merge(right, on='key', how=how))
+
+    def test_join_categorical_keys(self):
+        """Test that categorical keys are joined on their values and keep their categories."""
+        categories = pd.CategoricalDtype(['a', 'b', 'c', 'd'])
+        left = pd.DataFrame({'key': pd.Series(['a', 'b', 'c', 'a'], dtype=categories), 'value': [1, 2, 3, 4]})
+        right = pd.DataFrame({'key': pd.Series(['a', 'c', 'd'], dtype=categories), 'other': [1.5, 2.5, 3.5]})
+        for engine in self.engines():
+            for how in ['inner', 'left']:
+                with self.subTest(engine=engine, how=how):
+                    pd.testing.assert_frame_equal(join(left, right, 'key', how=how, engine=engine),
+                                                  left.merge(right, on='key', how=how))
+
+    def test_group_statistics(self):
+        """Test grouped statistics, skipping missing values and groups."""
+        df = pd.DataFrame({'group': ['b', 'a', None, 'b', 'a'], 'value': [1.0, np.nan, 3.0, 4.0, 2.0],
+                           'weight': [1, 2, 3, 3, 1]})
+        for engine in ['pandas'] + list(self.engines()):
+            with self.subTest(engine=engine):
+                result = group_statistics(df, 'group', 'value', ['sum', 'mean', 'size', 'count',
+                                                                 ('weighted_mean', 'weight')], engine)
+                self.assertEqual(result['group'].tolist(), ['a', 'b'])
+                self.assertEqual(result['sum'].tolist(), [2.0, 5.0])
+                self.assertEqual(result['mean'].tolist(), [2.0, 2.5])
+                self.assertEqual(result['size'].tolist(), [2, 2])
+                self.assertEqual(result['count'].tolist(), [1, 2])
+                # As np.average, the missing value of group 'a' leaves it without weighted mean
+                self.assertTrue(np.isnan(result['weighted_mean'].iloc[0]))
+                self.assertEqual(result['weighted_mean'].iloc[1], 13.0 / 4)
+
+    def test_weighted_mean_missing_scores(self):
+        """Test that a country with a missing score has no weighted average on any engine, as with np.average."""
+        movies_df = pd.DataFrame({'country': ['US', 'US', 'FR'], 'composite_score': [1.0, np.nan, 2.0],
+                                  'numVotes': [1, 2, 3]})
+        expected = weighted_average_composite_score_by_country(movies_df)
+        self.assertTrue(expected.set_index('country').loc['US'].isna().all())
+        for engine in self.engines():
+            with self.subTest(engine=engine):
+                pd.testing.assert_frame_equal(weighted_average_composite_score_by_country(movies_df, engine),
+                                              expected)
+
+    def test_task_functions(self):
+        """Test that every task function gives the pandas output on the other engines."""
+        prepared_df = prepare_data(self.basics, self.ratings, self.akas)
+        _, movies_df = quality_of_movies_by_country(prepared_df, [3])
+        movies_directors_df = prepare_movies_directors(self.crew, self.names, movies_df)
+
+        for engine in self.engines():
+            with self.subTest(engine=engine):
+                pd.testing.assert_frame_equal(prepare_data(self.basics, self.ratings, self.akas, engine), prepared_df)
+                pd.testing.assert_frame_equal(quality_of_movies_by_country(prepared_df, [3], engine)[1], movies_df)
+                pd.testing.assert_frame_equal(prepare_movies_directors(self.crew, self.names, movies_df, engine),
+                                              movies_directors_df)
+
+                for function in [total_votes_by_country, average_composite_score_by_country,
+                                 weighted_average_composite_score_by_country]:
+                    pd.testing.assert_frame_equal(function(movies_df, engine), function(movies_df))
+
+                for aggregation in ['mean', 'sum']:
+                    pd.testing.assert_frame_equal(
+                        rank_directors(movies_directors_df, 'primaryName', 'composite_score', aggregation, engine),
+                        rank_directors(movies_directors_df, 'primaryName', 'composite_score', aggregation))
+                pd.testing.assert_frame_equal(
+                    custom_ranking(movies_directors_df.copy(), 'primaryName', 'averageRating', engine=engine),
+                    custom_ranking(movies_directors_df.copy(), 'primaryName', 'averageRating'))
+
+
+if __name__ == '__main__':
+    unittest.main()
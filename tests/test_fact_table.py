@@ -0,0 +1,105 @@
+import unittest
+import numpy as np
+import pandas as pd
+from functions.fact_table import MovieFacts
+from functions.utilities import encode_professions
+from functions.task1_functions import quality_of_movies_by_country
+from functions.task2_functions import (
+    total_votes_by_country,
+    average_composite_score_by_country,
+    weighted_average_composite_score_by_country
+)
+from functions.task3_functions import (
+    prepare_movies_directors,
+    rank_directors,
+    custom_ranking,
+    rank_director_actors,
+    director_leaderboard
+)
+
+
+class TestMovieFacts(unittest.TestCase):
+
+    def setUp(self):
+        """Set up mock data for testing."""
+        self.movies_df = pd.DataFrame({
+            'tconst': ['tt0000004', 'tt0000001', 'tt0000003', 'tt0000002', 'tt0000005'],
+            'titleType': ['movie'] * 5,
+            'startYear': [2001.0, 2000.0, np.nan, 2003.0, 2004.0],
+            'averageRating': [8.5, 7.0, 6.0, 4.5, 9.0],
+            'numVotes': [4000, 1000, 3000, 2000, 500],
+            'composite_score': [1205.95, 304.9, 904.2, 603.15, 156.3],
+            'country': ['US', 'FR', 'US', 'PL', 'FR'],
+            'isOriginalTitle': [1] * 5
+        })
+        self.crew = pd.DataFrame({
+            'tconst': ['tt0000001', 'tt0000002', 'tt0000003', 'tt0000004', 'tt0000005', 'tt0000009'],
+            'directors': ['nm01', 'nm02', 'nm01', 'nm03', 'nm99', 'nm02']
+        })
+        self.names = encode_professions(pd.DataFrame({
+            'nconst': ['nm01', 'nm02', 'nm03', 'nm04'],
+            'primaryName': ['Director A', 'Director B', 'Director C', 'Director D'],
+            'primaryProfession': ['actor,director', 'director', 'director,actor', 'writer']
+        }))
+        self.facts = MovieFacts.from_movies(self.movies_df, self.crew, self.names)
+        self.movies_directors_df = prepare_movies_directors(self.crew, self.names, self.movies_df)
+
+    def test_facts(self):
+        """Test the narrow columns and the director offsets."""
+        self.assertEqual(self.facts.tconst.dtype, np.int32)
+        self.assertEqual(self.facts.tconst.tolist(), [4, 1, 3, 2, 5])
+        self.assertEqual(self.facts.year.tolist(), [2001, 2000, -1, 2003, 2004])
+        self.assertEqual(self.facts.director_offsets.tolist(), [0, 1, 2, 3, 4, 4])
+        self.assertEqual(self.facts.directors['nconst'].tolist(), ['nm01', 'nm02', 'nm03'])
+        pd.testing.assert_frame_equal(self.facts.to_frame(['tconst', 'startYear', 'country']),
+                                      self.movies_df[['tconst', 'startYear', 'country']])
+
+    def test_co_directed_movies(self):
+        """Test that co-directed movies are left without director on both paths, giving the same rankings."""
+        crew = self.crew.assign(directors=['nm01,nm02', 'nm02', 'nm01', 'nm03,nm99', 'nm99', 'nm02'])
+        facts = MovieFacts.from_movies(self.movies_df, crew, self.names)
+        movies_directors_df = prepare_movies_directors(crew, self.names, self.movies_df)
+        rows = facts.director_rows(['tconst', 'nconst'])
+        self.assertEqual(rows.values.tolist(), [['tt0000003', 'nm01'], ['tt0000002', 'nm02']])
+        self.assertEqual(rows.values.tolist(), movies_directors_df[['tconst', 'nconst']].values.tolist())
+
+        for aggregation in ['mean', 'sum']:
+            pd.testing.assert_frame_equal(rank_directors(facts, 'primaryName', 'composite_score', aggregation),
+                                          rank_directors(movies_directors_df, 'primaryName', 'composite_score',
+                                                         aggregation))
+
+    def test_filter_years(self):
+        """Test that filtering the facts by year keeps the movies a startYear filter keeps."""
+        for start_year, end_year in [(2001, None), (None, 2002), (2001, 2003)]:
+            with self.subTest(start_year=start_year, end_year=end_year):
+                expected = self.movies_directors_df
+                if start_year is not None:
+                    expected = expected[expected['startYear'] >= start_year]
+                if end_year is not None:
+                    expected = expected[expected['startYear'] <= end_year]
+                rows = self.facts.filter_years(start_year, end_year).director_rows(['tconst', 'nconst'])
+                self.assertEqual(rows.values.tolist(), expected[['tconst', 'nconst']].values.tolist())
+
+    def test_task_functions(self):
+        """Test that the task functions give the same results from the facts as from the DataFrames."""
+        self.assertEqual(quality_of_movies_by_country(self.facts, [2, 5])[0], {2: {'US': 1, 'FR': 1},
+                                                                                     5: {'US': 2, 'FR': 2, 'PL': 1}})
+        for function in [total_votes_by_country, average_composite_score_by_country,
+                         weighted_average_composite_score_by_country]:
+            pd.testing.assert_frame_equal(function(self.facts), function(self.movies_df))
+
+        for aggregation in ['mean', 'sum']:
+            pd.testing.assert_frame_equal(rank_directors(self.facts, 'primaryName', 'composite_score', aggregation),
+                                          rank_directors(self.movies_directors_df, 'primaryName', 'composite_score',
+                                                         aggregation))
+        for score_column in ['averageRating', 'composite_score']:
+            pd.testing.assert_frame_equal(custom_ranking(self.facts, 'primaryName', score_column),
+                                          custom_ranking(self.movies_directors_df.copy(), 'primaryName',
+                                                         score_column))
+        pd.testing.assert_frame_equal(rank_director_actors(self.facts, 'primaryName', 'averageRating'),
+                                      rank_director_actors(self.movies_directors_df, 'primaryName', 'averageRating'))
+        pd.testing.assert_frame_equal(director_leaderboard(self.facts), director_leaderboard(self.movies_directors_df))
+
+
+if __name__ == '__main__':
+    unittest.main()
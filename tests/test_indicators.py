@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import pandas as pd
+from functions.indicators import IndicatorTable, gdp_per_population
+from functions.utilities import filter_by_common_years, filter_by_user_year_range
+from functions.task2_functions import filter_countries_with_reference, calculate_gdp_per_population
+
+
+class TestIndicatorTable(unittest.TestCase):
+
+    def setUp(self):
+        """Set up mock World Bank data for testing."""
+        self.gdp_df = pd.DataFrame({
+            'Country Name': ['United States', 'France', 'Poland'],
+            'Country Code': ['USA', 'FRA', 'POL'],
+            'Indicator Name': ['GDP'] * 3,
+            'Indicator Code': ['NY.GDP.MKTP.CD'] * 3,
+            '2021': [13000.0, 18000.0, 6000.0],
+            '2022': [14000.0, 19000.0, np.nan],
+            '2023': [15000.0, 20000.0, 7000.0],
+            'Unnamed: 7': [np.nan] * 3
+        })
+        self.population_df = self.gdp_df.copy()
+        self.population_df[['2021', '2022', '2023']] = [[300, 300, 300], [400, 400, 400], [35, 35, 35]]
+        self.population_df = self.population_df.iloc[[2, 0, 1]]
+
+        self.gdp = IndicatorTable.from_frame(self.gdp_df)
+        self.population = IndicatorTable.from_frame(self.population_df)
+
+    def test_from_frame(self):
+        """Test building the country x year array."""
+        self.assertEqual(self.gdp.values.shape, (3, 3))
+        self.assertEqual(self.gdp.year_range(), (2021, 2023))
+        self.assertEqual(self.gdp.value('FRA', 2022), 19000.0)
+        self.assertEqual(self.gdp.value('FRA', '2023'), 20000.0)
+        self.assertTrue(np.isnan(self.gdp.value('POL', 2022)))
+        with self.assertRaises(KeyError):
+            self.gdp.column(2024)
+
+    def test_slice_years(self):
+        """Test year range slicing without copying."""
+        sliced = self.gdp.slice_years(2022, 2030)
+        self.assertEqual(sliced.year_range(), (2022, 2023))
+        self.assertTrue(np.shares_memory(sliced.values, self.gdp.values))
+        with self.assertRaises(ValueError):
+            self.gdp.slice_years(1990, 2000)
+
+    def test_year_filters(self):
+        """Test the utilities year filters on an indicator table."""
+        movies_df = pd.DataFrame({'startYear': [2020, 2022, 2023, 2024]})
+        filtered_movies, filtered_gdp = filter_by_common_years(movies_df, self.gdp)
+        self.assertEqual(filtered_movies['startYear'].tolist(), [2022, 2023])
+        self.assertEqual(filtered_gdp.year_range(), (2021, 2023))
+
+        filtered_movies, filtered_gdp = filter_by_user_year_range(filtered_movies, filtered_gdp, 2023)
+        self.assertEqual(filtered_movies['startYear'].tolist(), [2023])
+        self.assertEqual(filtered_gdp.year_range(), (2023, 2023))
+
+    def test_filter_countries_with_reference(self):
+        """Test filtering an indicator table with the reference country codes."""
+        reference_df = pd.DataFrame({'alpha-3': ['USA', 'FRA']})
+        expected = filter_countries_with_reference(self.gdp_df, 'Country Code', reference_df, 'alpha-3', '2023')
+        result = filter_countries_with_reference(self.gdp, 'Country Code', reference_df, 'alpha-3', '2023')
+        pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+    def test_gdp_per_population(self):
+        """Test that GDP per population from tables matches the DataFrame version."""
+        expected = calculate_gdp_per_population(self.gdp_df, self.population_df, '2023')
+        result = gdp_per_population(self.gdp, self.population, 2023)
+        pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+        result = calculate_gdp_per_population(self.gdp, self.population, '2023')
+        self.assertEqual(result['index'].tolist(), ['Poland', 'United States', 'France'])
+
+    def test_gdp_per_population_missing_values(self):
+        """Test that a country without population or without a value for the year gets NaN on both paths."""
+        population_df = self.population_df[self.population_df['Country Code'] != 'FRA']
+        result = calculate_gdp_per_population(self.gdp_df, population_df, '2022')
+        self.assertEqual(result['index'].tolist(), ['United States', 'France', 'Poland'])
+        self.assertEqual(result['gdp_per_population'].isna().tolist(), [False, True, True])
+
+        tables_result = calculate_gdp_per_population(self.gdp, IndicatorTable.from_frame(population_df), '2022')
+        pd.testing.assert_frame_equal(tables_result.reset_index(drop=True), result.reset_index(drop=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from functions.utilities import clean_data, load_data
+from functions.task1_functions import prepare_data, quality_of_movies_by_country
+from functions.task2_functions import total_votes_by_country
+from functions.task3_functions import prepare_movies_directors, rank_directors
+from functions.lazy import Predicate, scan, scan_movies
+
+
+class TestLazy(unittest.TestCase):
+
+    def setUp(self):
+        """Write small IMDb files for testing."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = self.temp_dir.name
+        tconsts = [f'tt{i:07d}' for i in range(1, 13)]
+
+        basics = pd.DataFrame({
+            'tconst': tconsts,
+            'titleType': ['movie'] * 10 + ['short'] * 2,
+            'primaryTitle': [f'Title {i}' for i in range(12)],
+            'startYear': [2000 + i for i in range(11)] + ['\\N'],
+            'genres': ['Drama'] * 11 + ['\\N']
+        })
+        ratings = pd.DataFrame({
+            'tconst': tconsts,
+            'averageRating': [5.0 + i * 0.3 for i in range(12)],
+            'numVotes': [100 * (i + 1) for i in range(12)]
+        })
+        akas = pd.DataFrame({
+            'titleId': tconsts + tconsts[:4],
+            'ordering': [1] * 12 + [2] * 4,
+            'title': [f'Title {i}' for i in range(12)] + [f'Alt {i}' for i in range(4)],
+            'region': ['US', 'FR', '\\N', 'PL'] * 3 + ['DE', 'FR', 'IT', 'US'],
+            'isOriginalTitle': [1] * 12 + [0] * 4
+        })
+        crew = pd.DataFrame({
+            'tconst': tconsts,
+            'directors': ['nm0000001', 'nm0000002', 'nm0000001', 'nm0000003'] * 3
+        })
+        names = pd.DataFrame({
+            'nconst': ['nm0000001', 'nm0000002', 'nm0000003'],
+            'primaryName': ['Director A', 'Director B', 'Director C'],
+            'primaryProfession': ['director', 'actor,director', 'director']
+        })
+
+        for name, df in [('title.basics', basics), ('title.ratings', ratings), ('title.akas', akas),
+                         ('title.crew', crew), ('name.basics', names)]:
+            df.to_csv(self.path(name), sep='\t', index=False)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.data_dir, f'{name}.tsv')
+
+    def eager_movies(self, start_year, end_year):
+        basics = clean_data(load_data(self.path('title.basics')))
+        years = pd.to_numeric(basics['startYear'], errors='coerce')
+        basics = basics[(years >= start_year) & (years <= end_year)]
+        movies_df = prepare_data(basics, clean_data(load_data(self.path('title.ratings'))),
+                                 clean_data(load_data(self.path('title.akas'))))
+        return quality_of_movies_by_country(movies_df, [5])[1]
+
+    def test_predicate(self):
+        """Test predicate masks, with missing values never matching."""
+        df = pd.DataFrame({'startYear': ['2001', pd.NA, '2005'], 'region': ['US', 'FR', pd.NA]})
+        self.assertEqual(Predicate('startYear', '>=', 2003).mask(df).tolist(), [False, False, True])
+        self.assertEqual(Predicate('region', 'in', ['FR']).mask(df).tolist(), [False, True, False])
+        with self.assertRaises(ValueError):
+            Predicate('region', '~', 'US')
+
+    def test_pushdown(self):
+        """Test that filters reach the basics reader and only the needed columns are read."""
+        plan = scan_movies(self.data_dir).filter_years(2002, 2008).quality_of_movies_by_country([5]) \
+            .country_aggregation('total_votes')
+        optimized = plan.explain()
+
+        basics_line = next(line for line in optimized.splitlines() if 'title.basics' in line)
+        self.assertIn("titleType == 'movie'", basics_line)
+        self.assertIn('startYear >= 2002', basics_line)
+        self.assertIn("columns=['tconst']", basics_line)
+        self.assertNotIn('ordering', optimized)
+        self.assertNotIn('Filter', optimized)
+
+    def test_country_aggregation(self):
+        """Test that the lazy country table matches the eager pipeline."""
+        expected = total_votes_by_country(self.eager_movies(2002, 2008))
+        result = scan_movies(self.data_dir).filter_years(2002, 2008).quality_of_movies_by_country([5]) \
+            .country_aggregation('total_votes').collect()
+        pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+    def test_filter_kept_above_country_task(self):
+        """Test that a filter on an akas column is applied after the countries are filled from the other akas."""
+        akas = clean_data(load_data(self.path('title.akas')))
+        akas['types'] = akas['isOriginalTitle'].map({1: 'original', 0: 'imdbDisplay'})
+        akas.to_csv(self.path('title.akas'), sep='\t', index=False, na_rep='\\N')
+
+        plan = scan_movies(self.data_dir).filter_years(2002, 2008).quality_of_movies_by_country([5]) \
+            .filter('types', '==', 'original')
+        self.assertIn("Filter [types == 'original']", plan.explain())
+        expected = self.eager_movies(2002, 2008)
+        expected = expected[expected['types'] == 'original']
+        self.assertIn('IT', expected['country'].tolist())
+        result = plan.select(['tconst', 'country', 'composite_score']).collect()
+        pd.testing.assert_frame_equal(result.reset_index(drop=True),
+                                      expected[['tconst', 'country', 'composite_score']].reset_index(drop=True))
+
+    def test_filter_kept_above_join(self):
+        """Test that a filter on the joined side of a left join is applied after the join."""
+        plan = scan_movies(self.data_dir).filter('region', '==', 'FR')
+        self.assertIn("Filter [region == 'FR']", plan.explain())
+        result = plan.select(['tconst', 'region']).collect()
+        self.assertEqual(sorted(result['tconst'].unique()), ['tt0000002', 'tt0000006', 'tt0000010'])
+        self.assertEqual(result.columns.tolist(), ['tconst', 'region'])
+
+    def test_rank_directors(self):
+        """Test that the lazy director ranking matches the eager pipeline."""
+        movies_df = self.eager_movies(2000, 2010)
+        movies_directors_df = prepare_movies_directors(clean_data(load_data(self.path('title.crew'))),
+                                                       clean_data(load_data(self.path('name.basics'))), movies_df)
+        expected = rank_directors(movies_directors_df, 'primaryName', 'composite_score', 'sum')
+
+        movies = scan_movies(self.data_dir).filter_years(2000, 2010).quality_of_movies_by_country([5])
+        plan = movies.prepare_movies_directors(scan(self.path('title.crew')), scan(self.path('name.basics'))) \
+            .rank_directors('primaryName', 'composite_score', 'sum')
+        self.assertNotIn('primaryProfession', plan.explain())
+        pd.testing.assert_frame_equal(plan.collect(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from functions.memory_budget import MemoryBudget, downcast_frame, frame_bytes, spill_frame, load_spilled_frame
+from functions.pipeline import IMDB_FILES, GDP_FILE, POPULATION_FILE, COUNTRY_CODES_FILE, prepare_analysis
+from functions.task3_functions import rank_directors
+from functions.parallel import parallel_rank_directors
+
+
+class TestMemoryBudget(unittest.TestCase):
+
+    def setUp(self):
+        """Set up mock data for testing."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.movies_df = pd.DataFrame({
+            'tconst': [f'tt{i:07d}' for i in range(8)],
+            'numVotes': np.arange(8, dtype=np.int64) * 1000,
+            'composite_score': np.linspace(1.0, 8.0, 8),
+            'country': ['US', 'FR', 'US', 'PL', 'US', 'FR', np.nan, 'US']
+        })
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.temp_dir.cleanup()
+
+    def test_downcast_frame(self):
+        """Test downcasting scores, votes and low-cardinality text."""
+        downcast_df = downcast_frame(self.movies_df)
+        self.assertEqual(downcast_df['composite_score'].dtype, np.float32)
+        self.assertEqual(downcast_df['numVotes'].dtype, np.int16)
+        self.assertIsInstance(downcast_df['country'].dtype, pd.CategoricalDtype)
+        self.assertEqual(downcast_df['tconst'].dtype, object)
+        self.assertLess(frame_bytes(downcast_df), frame_bytes(self.movies_df))
+
+    def test_spill_frame(self):
+        """Test writing and reading back a frame from the columnar spill directory."""
+        movies_df = self.movies_df.assign(region=downcast_frame(self.movies_df)['country'])
+        path = os.path.join(self.temp_dir.name, 'movies')
+        spill_frame(movies_df, path)
+
+        pd.testing.assert_frame_equal(load_spilled_frame(path), movies_df)
+        pd.testing.assert_frame_equal(load_spilled_frame(path, ['tconst', 'numVotes']),
+                                      movies_df[['tconst', 'numVotes']])
+
+    def test_track_and_release(self):
+        """Test downcasting once the budget is nearly used, then spilling released frames."""
+        budget = MemoryBudget(frame_bytes(self.movies_df) * 2, spill_dir=self.temp_dir.name)
+        self.assertIs(budget.track('movies', self.movies_df), self.movies_df)
+        self.assertFalse(budget.downcast)
+
+        budget.track('copy', self.movies_df.copy())
+        self.assertTrue(budget.downcast)
+        self.assertEqual(budget.get('movies')['composite_score'].dtype, np.float32)
+
+        budget.release('copy')
+        self.assertEqual(budget.spilled, {})
+        self.assertIsNone(budget.spill_dir)
+
+        budget.release('movies', spill=True)
+        self.assertNotIn('movies', budget.frames)
+        pd.testing.assert_frame_equal(budget.load('movies'), downcast_frame(self.movies_df))
+        spill_dir = budget.spill_dir
+        self.assertEqual(os.path.dirname(spill_dir), self.temp_dir.name)
+        budget.cleanup()
+        self.assertEqual(budget.spilled, {})
+        self.assertFalse(os.path.exists(spill_dir))
+
+    def test_cleanup_on_exit(self):
+        """Test that leaving a with block removes the spill directory."""
+        with MemoryBudget('1GB', spill_dir=self.temp_dir.name) as budget:
+            budget.track('movies', self.movies_df)
+            budget.release('movies', spill=True)
+            spill_dir = budget.spill_dir
+            self.assertTrue(os.path.isdir(spill_dir))
+        self.assertFalse(os.path.exists(spill_dir))
+
+    def write_analysis_files(self):
+        tconsts = [f'tt{i:07d}' for i in range(1, 7)]
+        frames = {
+            'basics': pd.DataFrame({'tconst': tconsts, 'titleType': ['movie'] * 6,
+                                    'startYear': [2000, 2001, 2001, 2002, 2003, '\\N']}),
+            'ratings': pd.DataFrame({'tconst': tconsts, 'averageRating': [5.0, 6.0, 7.5, 8.0, 9.0, 4.0],
+                                     'numVotes': [100, 200, 300, 400, 500, 600]}),
+            'akas': pd.DataFrame({'titleId': tconsts, 'title': list('ABCDEF'),
+                                  'region': ['US', 'FR', 'US', 'PL', '\\N', 'US'], 'isOriginalTitle': [1] * 6}),
+            'crew': pd.DataFrame({'tconst': tconsts, 'directors': ['nm01', 'nm02', 'nm01', 'nm03', 'nm02', 'nm01']}),
+            'names': pd.DataFrame({'nconst': ['nm01', 'nm02', 'nm03', 'nm04'], 'primaryName': ['A', 'B', 'C', 'D'],
+                                   'primaryProfession': ['director', 'actor,director', 'director', 'actor']})
+        }
+        for name, df in frames.items():
+            df.to_csv(os.path.join(self.temp_dir.name, IMDB_FILES[name]), sep='\t', index=False)
+
+        indicator = pd.DataFrame({'Country Name': ['France', 'Poland'], 'Country Code': ['FRA', 'POL'],
+                                  'Indicator Name': ['x', 'x'], 'Indicator Code': ['x', 'x'],
+                                  '2000': [1.0, 2.0], '2001': [1.5, 2.5], '2002': [2.0, 3.0], 'Unnamed: 7': [None] * 2})
+        for file_name in [GDP_FILE, POPULATION_FILE]:
+            with open(os.path.join(self.temp_dir.name, file_name), 'w') as file:
+                file.write('"Data Source","World Development Indicators",\n\n"Last Updated Date","2024-06-28",\n\n')
+                indicator.to_csv(file, index=False)
+        pd.DataFrame({'name': ['France', 'Poland'], 'alpha-2': ['FR', 'PL'], 'alpha-3': ['FRA', 'POL']}).to_csv(
+            os.path.join(self.temp_dir.name, COUNTRY_CODES_FILE), index=False)
+
+    def test_prepare_analysis_with_budget(self):
+        """Test that the analysis completes under a tiny budget with the same ranking."""
+        self.write_analysis_files()
+        expected = prepare_analysis(self.temp_dir.name, self.temp_dir.name, [2])
+        # The tasks read the narrow movie facts, the wide movies frame is not kept
+        self.assertNotIn('movies_df', expected)
+        # Only the directors of the crew are read from name.basics
+        self.assertEqual(sorted(expected['names']['nconst']), ['nm01', 'nm02', 'nm03'])
+        data = prepare_analysis(self.temp_dir.name, self.temp_dir.name, [2], max_memory='1KB')
+
+        budget = data['memory_budget']
+        self.assertTrue(budget.downcast)
+        for name in ['akas', 'basics', 'crew', 'names', 'ratings', 'prepared_df', 'movies_df']:
+            self.assertNotIn(name, data)
+        # The raw frames are dropped, not spilled, as no later stage reads them back
+        self.assertEqual(budget.spilled, {})
+        self.assertIsNone(budget.spill_dir)
+        self.assertEqual(data['country_counts'], expected['country_counts'])
+        self.assertEqual(data['title_index'].search('C')['tconst'].tolist(), ['tt0000003'])
+
+        result = rank_directors(data['movie_facts'], 'primaryName', 'averageRating')
+        expected_ranking = rank_directors(expected['movie_facts'], 'primaryName', 'averageRating')
+        self.assertEqual(result['primaryName'].tolist(), expected_ranking['primaryName'].tolist())
+        np.testing.assert_allclose(result['aggregated_score'], expected_ranking['aggregated_score'], rtol=1e-6)
+
+    def test_prepare_analysis_shared_frames(self):
+        """Test publishing the movies and the movie-director rows once for the parallel aggregations."""
+        self.write_analysis_files()
+        data = prepare_analysis(self.temp_dir.name, self.temp_dir.name, [2], n_workers=2)
+        self.assertEqual(len(data['shared_movies']), len(data['movie_facts']))
+        result = parallel_rank_directors(data['shared_directors'], 'primaryName', 'averageRating',
+                                         n_workers=data['n_workers'])
+        expected = rank_directors(data['movie_facts'], 'primaryName', 'averageRating')
+        pd.testing.assert_frame_equal(result, expected)
+        for frame in data['shared_frames']:
+            frame.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import threading
+import unittest
+import pandas as pd
+from functions.merge_audit import MergeAudit, MergeFanOutError, MergeFanOutWarning, active_audit
+from functions.task1_functions import prepare_data, quality_of_movies_by_country
+from functions.task3_functions import prepare_movies_directors
+
+
+class TestMergeAudit(unittest.TestCase):
+
+    def setUp(self):
+        """Set up mock data for testing."""
+        tconsts = ['tt0000001', 'tt0000002', 'tt0000003']
+        self.basics = pd.DataFrame({'tconst': tconsts, 'titleType': ['movie'] * 3})
+        self.ratings = pd.DataFrame({'tconst': tconsts, 'averageRating': [5.0, 6.0, 7.0], 'numVotes': [10, 20, 30]})
+        self.akas = pd.DataFrame({
+            'titleId': tconsts + ['tt0000001'] * 3,
+            'title': ['A', 'B', 'C', 'A1', 'A2', 'A3'],
+            'region': ['US', 'FR', 'PL', 'DE', 'IT', 'ES'],
+            'isOriginalTitle': [1, 1, 1, 0, 0, 0]
+        })
+        self.crew = pd.DataFrame({'tconst': tconsts, 'directors': ['nm01', 'nm02', 'nm01']})
+        self.names = pd.DataFrame({'nconst': ['nm01', 'nm02'], 'primaryName': ['Director A', 'Director B']})
+
+    def test_records(self):
+        """Test the records of the joins of the task functions."""
+        with MergeAudit() as audit:
+            self.assertIs(active_audit(), audit)
+            _, movies_df = quality_of_movies_by_country(prepare_data(self.basics, self.ratings, self.akas), [2])
+            prepare_movies_directors(self.crew, self.names, movies_df)
+        self.assertIsNone(active_audit())
+
+        records = audit.to_frame().set_index('label')
+        self.assertEqual(records.index.tolist(), ['basics x ratings', 'basics x akas', 'movies x countries',
+                                                  'crew x names', 'directors x movies'])
+        self.assertTrue((records['predicted_rows'] == records['output_rows']).all())
+        self.assertEqual(records.loc['basics x akas', 'output_rows'], 6)
+        self.assertEqual(records.loc['basics x akas', 'fan_out'], 2.0)
+        self.assertEqual(records.loc['basics x akas', 'right_key_duplication'], 2.0)
+        self.assertTrue(records.loc['basics x akas', 'strategy'].endswith('hash join, one-to-many'))
+        self.assertTrue(records.loc['crew x names', 'strategy'].endswith('hash join, many-to-one'))
+        self.assertTrue((records['output_bytes'] > 0).all())
+
+    def test_concurrent_audits(self):
+        """Test that audits entered by concurrent threads only record their own joins."""
+        barrier = threading.Barrier(2)
+        audits = {}
+
+        def audited(name, function):
+            with MergeAudit() as audit:
+                barrier.wait()
+                function()
+                barrier.wait()
+            audits[name] = audit
+
+        threads = [
+            threading.Thread(target=audited, args=('data', lambda: prepare_data(self.basics, self.ratings,
+                                                                                 self.akas))),
+            threading.Thread(target=audited, args=('directors', lambda: prepare_movies_directors(
+                self.crew, self.names, self.basics)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([record['label'] for record in audits['data'].records], ['basics x ratings', 'basics x akas'])
+        self.assertEqual([record['label'] for record in audits['directors'].records],
+                         ['crew x names', 'directors x movies'])
+        self.assertIsNone(active_audit())
+
+    def test_fan_out_threshold(self):
+        """Test raising before, or warning about, a join above the fan-out threshold."""
+        with MergeAudit(max_fan_out=1.5, action='raise') as audit:
+            with self.assertRaises(MergeFanOutError):
+                prepare_data(self.basics, self.ratings, self.akas)
+        self.assertNotIn('output_rows', audit.records[-1])
+
+        with MergeAudit(max_fan_out=1.5, action='warn'):
+            with self.assertWarns(MergeFanOutWarning):
+                merged_df = prepare_data(self.basics, self.ratings, self.akas)
+        self.assertEqual(len(merged_df), 6)
+
+        with self.assertRaises(ValueError):
+            MergeAudit(action='ignore')
+
+
+if __name__ == '__main__':
+    unittest.main()
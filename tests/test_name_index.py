@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from functions.name_index import build_name_index, load_name_index, lookup_names, load_director_names, find_newlines
+
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small name.basics file for testing."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.names_path = os.path.join(self.temp_dir.name, 'name.basics.tsv')
+        with open(self.names_path, 'w', newline='\n') as names_file:
+            names_file.write('nconst\tprimaryName\tbirthYear\tdeathYear\tprimaryProfession\tknownForTitles\n')
+            names_file.write('nm0000003\tDirector C\t1950\t\\N\tdirector\ttt000003\n')
+            names_file.write('nm0000001\tDirector A\t1960\t\\N\tactor,director\ttt000001\n')
+            names_file.write('nm0000010\tActor Z\t1970\t2000\tactor\t\\N\n')
+            names_file.write('nm0000002\tDirector B\t1980\t\\N\tdirector,writer\ttt000002\n')
+
+        self.crew_df = pd.DataFrame({
+            'tconst': ['tt000001', 'tt000002', 'tt000003'],
+            'directors': ['nm0000001', 'nm0000002,nm0000003', pd.NA]
+        })
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.temp_dir.cleanup()
+
+    def test_build_name_index(self):
+        """Test building the sorted index over the names file."""
+        index_path = build_name_index(self.names_path)
+        index = load_name_index(self.names_path, index_path)
+        self.assertEqual(index['id'].tolist(), [1, 2, 3, 10])
+        with open(self.names_path, 'rb') as names_file:
+            content = names_file.read()
+        first = index[0]
+        self.assertTrue(content[first['offset']:first['offset'] + first['length']].startswith(b'nm0000001\t'))
+
+    def test_find_newlines(self):
+        """Test scanning for newlines in chunks smaller than the lines."""
+        data = np.memmap(self.names_path, dtype=np.uint8, mode='r')
+        expected = np.flatnonzero(np.asarray(data) == ord('\n'))
+        for chunk_bytes in [1, 7, 64, len(data)]:
+            np.testing.assert_array_equal(find_newlines(data, chunk_bytes), expected)
+
+    def test_lookup_names(self):
+        """Test fetching only the requested records."""
+        result = lookup_names(self.names_path, ['nm0000010', 'nm0000001', 'nm9999999'])
+        self.assertEqual(result['nconst'].tolist(), ['nm0000001', 'nm0000010'])
+        self.assertEqual(result['primaryName'].tolist(), ['Director A', 'Actor Z'])
+        self.assertTrue(pd.isna(result['knownForTitles'].iloc[1]))
+
+    def test_load_director_names(self):
+        """Test loading names of the crew directors only."""
+        result = load_director_names(self.crew_df, self.names_path)
+        self.assertEqual(sorted(result['nconst'].tolist()), ['nm0000001', 'nm0000002', 'nm0000003'])
+        self.assertIn('professionFlags', result.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
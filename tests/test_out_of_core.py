@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from functions.utilities import clean_data, load_data
+from functions.task1_functions import prepare_data, quality_of_movies_by_country
+from functions.task3_functions import prepare_movies_directors, rank_directors, custom_ranking
+from functions.out_of_core import (
+    partition_ids,
+    partition_file,
+    load_partition,
+    quality_of_movies_by_country_out_of_core,
+    prepare_movies_directors_out_of_core,
+    rank_directors_out_of_core,
+    custom_ranking_out_of_core
+)
+
+
+class TestOutOfCore(unittest.TestCase):
+
+    def setUp(self):
+        """Write small IMDb files for testing."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.paths = {}
+        tconsts = [f'tt{i:07d}' for i in range(1, 13)]
+
+        basics = pd.DataFrame({
+            'tconst': tconsts,
+            'titleType': ['movie'] * 10 + ['short'] * 2,
+            'primaryTitle': [f'Title {i}' for i in range(12)],
+            'startYear': [2000 + i for i in range(12)],
+            'genres': ['Drama'] * 11 + ['\\N']
+        })
+        ratings = pd.DataFrame({
+            'tconst': tconsts,
+            'averageRating': [5.0 + i * 0.3 for i in range(12)],
+            'numVotes': [100 * (i + 1) for i in range(12)]
+        })
+        akas = pd.DataFrame({
+            'titleId': tconsts + tconsts[:4],
+            'ordering': [1] * 12 + [2] * 4,
+            'title': [f'Title {i}' for i in range(12)] + [f'Alt {i}' for i in range(4)],
+            'region': ['US', 'FR', '\\N', 'PL'] * 3 + ['DE', 'FR', 'IT', 'US'],
+            'isOriginalTitle': [1] * 12 + [0] * 4
+        })
+        crew = pd.DataFrame({
+            'tconst': tconsts,
+            'directors': ['nm0000001', 'nm0000002', 'nm0000001', 'nm0000003'] * 3
+        })
+        names = pd.DataFrame({
+            'nconst': ['nm0000001', 'nm0000002', 'nm0000003'],
+            'primaryName': ['Director A', 'Director B', 'Director C'],
+            'primaryProfession': ['director', 'actor,director', 'director']
+        })
+
+        for name, df in [('title.basics', basics), ('title.ratings', ratings), ('title.akas', akas),
+                         ('title.crew', crew), ('name.basics', names)]:
+            self.paths[name] = os.path.join(self.temp_dir.name, f'{name}.tsv')
+            df.to_csv(self.paths[name], sep='\t', index=False)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.temp_dir.cleanup()
+
+    def load(self, name):
+        return clean_data(load_data(self.paths[name]))
+
+    def test_partition_file(self):
+        """Test that partitioning keeps every row exactly once, grouped by title."""
+        output_dir = os.path.join(self.temp_dir.name, 'parts')
+        os.makedirs(output_dir)
+        paths = partition_file(self.paths['title.akas'], 'titleId', 3, output_dir, chunksize=5)
+        parts = [load_partition(path) for path in paths]
+        self.assertEqual(sum(len(part) for part in parts), 16)
+        for partition, part in enumerate(parts):
+            self.assertTrue((partition_ids(part['titleId'], 3) == partition).all())
+
+    def test_quality_of_movies_by_country_out_of_core(self):
+        """Test that the out-of-core task 1 pipeline matches the in-memory one."""
+        expected_counts, expected_movies = quality_of_movies_by_country(
+            prepare_data(self.load('title.basics'), self.load('title.ratings'), self.load('title.akas')), [3, 5])
+
+        counts, movies_parts = quality_of_movies_by_country_out_of_core(
+            self.paths['title.basics'], self.paths['title.ratings'], self.paths['title.akas'], [3, 5],
+            os.path.join(self.temp_dir.name, 'movies'), max_memory=2000, work_dir=self.temp_dir.name)
+        self.assertGreater(len(movies_parts), 1)
+
+        self.assertEqual(counts, expected_counts)
+        movies_df = pd.concat([load_partition(path) for path in movies_parts if path is not None])
+        movies_df = movies_df.sort_values(by='composite_score', ascending=False)
+        self.assertEqual(movies_df['tconst'].tolist(), expected_movies['tconst'].tolist())
+        self.assertEqual(movies_df['country'].tolist(), expected_movies['country'].tolist())
+
+    def test_director_rankings_from_movie_partitions(self):
+        """Test joining the directors with the movie partitions of the out-of-core task 1 pipeline."""
+        _, movies_df = quality_of_movies_by_country(
+            prepare_data(self.load('title.basics'), self.load('title.ratings'), self.load('title.akas')), [3])
+        movies_directors_df = prepare_movies_directors(self.load('title.crew'), self.load('name.basics'), movies_df)
+
+        _, movies_parts = quality_of_movies_by_country_out_of_core(
+            self.paths['title.basics'], self.paths['title.ratings'], self.paths['title.akas'], [3],
+            os.path.join(self.temp_dir.name, 'movies'), max_memory=2000, work_dir=self.temp_dir.name)
+        partition_paths = prepare_movies_directors_out_of_core(
+            self.paths['title.crew'], self.paths['name.basics'], movies_parts,
+            os.path.join(self.temp_dir.name, 'directors'), max_memory=500)
+        self.assertGreater(len(partition_paths), 1)
+
+        for aggregation in ['mean', 'sum']:
+            expected = rank_directors(movies_directors_df, 'primaryName', 'composite_score', aggregation)
+            result = rank_directors_out_of_core(partition_paths, 'primaryName', 'composite_score', aggregation)
+            pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_director_rankings_out_of_core(self):
+        """Test that the out-of-core director rankings match the in-memory ones."""
+        _, movies_df = quality_of_movies_by_country(
+            prepare_data(self.load('title.basics'), self.load('title.ratings'), self.load('title.akas')), [3])
+        movies_directors_df = prepare_movies_directors(self.load('title.crew'), self.load('name.basics'), movies_df)
+
+        partition_paths = prepare_movies_directors_out_of_core(
+            self.paths['title.crew'], self.paths['name.basics'], movies_df,
+            os.path.join(self.temp_dir.name, 'directors'), max_memory=500)
+        self.assertGreater(len(partition_paths), 1)
+
+        for aggregation in ['mean', 'sum']:
+            expected = rank_directors(movies_directors_df, 'primaryName', 'composite_score', aggregation)
+            result = rank_directors_out_of_core(partition_paths, 'primaryName', 'composite_score', aggregation)
+            pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+        expected = custom_ranking(movies_directors_df.copy(), 'primaryName', 'composite_score', 7.0, 3.0)
+        result = custom_ranking_out_of_core(partition_paths, 'primaryName', 'composite_score', 7.0, 3.0)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    def test_rank_directors_out_of_core_missing_scores(self):
+        """Test that movies without a rating do not pull down the out-of-core mean."""
+        ratings = self.load('title.ratings')
+        ratings[~ratings['tconst'].isin(['tt0000002', 'tt0000003', 'tt0000005'])].to_csv(
+            self.paths['title.ratings'], sep='\t', index=False)
+        _, movies_df = quality_of_movies_by_country(
+            prepare_data(self.load('title.basics'), self.load('title.ratings'), self.load('title.akas')), [3])
+        self.assertTrue(movies_df['composite_score'].isna().any())
+        movies_directors_df = prepare_movies_directors(self.load('title.crew'), self.load('name.basics'), movies_df)
+
+        partition_paths = prepare_movies_directors_out_of_core(
+            self.paths['title.crew'], self.paths['name.basics'], movies_df,
+            os.path.join(self.temp_dir.name, 'directors'), max_memory=500)
+
+        for aggregation in ['mean', 'sum']:
+            expected = rank_directors(movies_directors_df, 'primaryName', 'composite_score', aggregation)
+            result = rank_directors_out_of_core(partition_paths, 'primaryName', 'composite_score', aggregation)
+            pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
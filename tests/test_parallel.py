@@ -0,0 +1,107 @@
+import unittest
+import numpy as np
+import pandas as pd
+from functions.task2_functions import (
+    total_votes_by_country,
+    average_composite_score_by_country,
+    weighted_average_composite_score_by_country
+)
+from functions.task3_functions import rank_directors, custom_ranking
+from functions.parallel import (
+    split_shards,
+    worker_pool,
+    parallel_country_tables,
+    parallel_total_votes_by_country,
+    parallel_average_composite_score_by_country,
+    parallel_weighted_average_composite_score_by_country,
+    parallel_rank_directors,
+    parallel_custom_ranking
+)
+
+
+class TestParallelAggregation(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a random movies DataFrame for testing."""
+        rng = np.random.default_rng(0)
+        n_movies = 1000
+        self.movies_df = pd.DataFrame({
+            'tconst': [f'tt{i:07d}' for i in range(n_movies)],
+            'country': rng.choice(['US', 'FR', 'PL', 'DE', 'IT', 'JP'], n_movies),
+            'numVotes': rng.integers(1, 10000, n_movies),
+            'director': rng.choice([f'Director {i}' for i in range(50)], n_movies)
+        })
+        self.movies_df['composite_score'] = rng.uniform(1, 10, n_movies) * 0.7 + self.movies_df['numVotes'] * 0.3
+
+    def test_split_shards(self):
+        """Test splitting a DataFrame into row shards."""
+        shards = split_shards(self.movies_df, 3)
+        self.assertEqual(len(shards), 3)
+        pd.testing.assert_frame_equal(pd.concat(shards), self.movies_df)
+        self.assertEqual(len(split_shards(self.movies_df.head(2), 4)), 2)
+
+    def test_parallel_country_tables(self):
+        """Test that the parallel country tables match the single-process ones."""
+        for parallel_function, function in [
+            (parallel_total_votes_by_country, total_votes_by_country),
+            (parallel_average_composite_score_by_country, average_composite_score_by_country),
+            (parallel_weighted_average_composite_score_by_country, weighted_average_composite_score_by_country)
+        ]:
+            expected = function(self.movies_df).reset_index(drop=True)
+            result = parallel_function(self.movies_df, n_workers=2).reset_index(drop=True)
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_parallel_country_tables_single_pass(self):
+        """Test computing the three country tables from one aggregation pass."""
+        tables = parallel_country_tables(self.movies_df, n_workers=2)
+        for table, function in zip(tables, [total_votes_by_country, average_composite_score_by_country,
+                                            weighted_average_composite_score_by_country]):
+            pd.testing.assert_frame_equal(table.reset_index(drop=True), function(self.movies_df).reset_index(drop=True))
+
+    def test_parallel_country_tables_missing_scores(self):
+        """Test that the parallel country tables skip or propagate missing scores as the single-process ones."""
+        movies_df = self.movies_df.copy()
+        movies_df.loc[movies_df['country'] == 'US', 'composite_score'] = np.nan
+        movies_df.loc[movies_df[movies_df['country'] == 'FR'].index[0], 'composite_score'] = np.nan
+        for parallel_function, function in [
+            (parallel_average_composite_score_by_country, average_composite_score_by_country),
+            (parallel_weighted_average_composite_score_by_country, weighted_average_composite_score_by_country)
+        ]:
+            expected = function(movies_df).reset_index(drop=True)
+            result = parallel_function(movies_df, n_workers=2).reset_index(drop=True)
+            pd.testing.assert_frame_equal(result, expected)
+        weighted = parallel_weighted_average_composite_score_by_country(movies_df, n_workers=2).set_index('country')
+        self.assertTrue(weighted.loc[['US', 'FR']].isna().all().all())
+
+    def test_worker_pool_reused(self):
+        """Test that the parallel calls share one process pool per number of workers."""
+        pool = worker_pool(2)
+        parallel_custom_ranking(self.movies_df, 'director', 'composite_score', n_workers=2)
+        parallel_total_votes_by_country(self.movies_df, n_workers=2)
+        self.assertIs(worker_pool(2), pool)
+
+    def test_parallel_rank_directors(self):
+        """Test that the parallel director rankings match the single-process ones."""
+        for aggregation in ['mean', 'sum']:
+            expected = rank_directors(self.movies_df, 'director', 'composite_score', aggregation)
+            result = parallel_rank_directors(self.movies_df, 'director', 'composite_score', aggregation, n_workers=2)
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_parallel_rank_directors_missing_scores(self):
+        """Test that movies without a score do not pull down the parallel mean."""
+        movies_df = self.movies_df.copy()
+        movies_df.loc[::3, 'composite_score'] = np.nan
+        for aggregation in ['mean', 'sum']:
+            expected = rank_directors(movies_df, 'director', 'composite_score', aggregation)
+            result = parallel_rank_directors(movies_df, 'director', 'composite_score', aggregation, n_workers=2)
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_parallel_custom_ranking(self):
+        """Test that the parallel custom ranking matches the single-process one."""
+        result = parallel_custom_ranking(self.movies_df, 'director', 'composite_score', 7.0, 3.0, n_workers=2)
+        expected = custom_ranking(self.movies_df.copy(), 'director', 'composite_score', 7.0, 3.0)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
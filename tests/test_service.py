@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+from unittest import mock
+import pandas as pd
+from functions.pipeline import IMDB_FILES, publish_analysis_frames
+from functions.fact_table import MovieFacts
+from functions.country_registry import CountryRegistry
+from functions.indicators import IndicatorTable
+from functions.service import AnalysisService, UnknownQueryError, make_handler, QUERIES
+
+
+class TestAnalysisService(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a service over mock data."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.basics_path = os.path.join(self.temp_dir.name, IMDB_FILES['basics'])
+        with open(self.basics_path, 'w') as basics_file:
+            basics_file.write('tconst\n')
+
+        self.loads = 0
+        self.service = AnalysisService(self.temp_dir.name, self.temp_dir.name, loader=self.mock_loader)
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.temp_dir.cleanup()
+
+    def mock_loader(self, movie_data_dir, gdp_pop_data_dir):
+        self.loads += 1
+        movies_df = pd.DataFrame({
+            'tconst': ['tt0000001', 'tt0000002', 'tt0000003'],
+            'startYear': [2000, 2005, 2010],
+            'numVotes': [1000, 500, 700],
+            'composite_score': [7.5, 8.0, 6.5],
+            'country': ['US', 'US', 'FR']
+        })
+        crew_df = pd.DataFrame({'tconst': movies_df['tconst'], 'directors': ['nm01', 'nm02', 'nm01']})
+        names_df = pd.DataFrame({'nconst': ['nm01', 'nm02'], 'primaryName': ['Director A', 'Director B'],
+                                 'primaryProfession': ['actor,director', 'director']})
+        movie_facts = MovieFacts.from_movies(movies_df.assign(averageRating=[7.0, 8.0, 6.0]), crew_df, names_df)
+        gdp_df = pd.DataFrame({'Country Name': ['France', 'Poland'], 'Country Code': ['FRA', 'POL'],
+                               'Indicator Name': ['GDP'] * 2, 'Indicator Code': ['NY.GDP.MKTP.CD'] * 2,
+                               '2022': [200.0, 70.0], '2023': [210.0, 75.0]})
+        population_df = gdp_df.assign(**{'2022': [2.0, 1.0], '2023': [3.0, 1.0]})
+        country_registry = CountryRegistry(pd.DataFrame({'name': ['France'], 'alpha-2': ['FR'], 'alpha-3': ['FRA']}))
+        return {'movie_facts': movie_facts, 'gdp': IndicatorTable.from_frame(gdp_df),
+                'population': IndicatorTable.from_frame(population_df), 'country_registry': country_registry}
+
+    def test_query(self):
+        """Test answering queries with year ranges from the resident data."""
+        result = self.service.query('total_votes_by_country')
+        self.assertEqual(result, [{'country': 'US', 'number of votes': 1500},
+                                  {'country': 'FR', 'number of votes': 700}])
+
+        result = self.service.query('total_votes_by_country', {'start_year': '2004'})
+        self.assertEqual(result, [{'country': 'FR', 'number of votes': 700},
+                                  {'country': 'US', 'number of votes': 500}])
+
+        result = self.service.query('rank_directors', {'aggregation': 'sum', 'limit': '1'})
+        self.assertEqual(result[0]['primaryName'], 'Director A')
+        self.assertEqual(len(result), 1)
+
+        result = self.service.query('rank_directors', {'aggregation': 'sum', 'end_year': '2005'})
+        self.assertEqual([row['primaryName'] for row in result], ['Director B', 'Director A'])
+
+        result = self.service.query('gdp_per_population', {'year': '2023'})
+        self.assertEqual(result, [{'index': 'France', 'gdp_per_population': 70.0}])
+
+        with self.assertRaises(UnknownQueryError):
+            self.service.query('unknown')
+        for name, params in [('search_titles', {}), ('rank_directors', {'director_column': 'foo'}),
+                             ('director_leaderboard', {'score_column': 'foo'}),
+                             ('gdp_per_population', {'year': '1990'})]:
+            with self.subTest(name=name, params=params), self.assertRaises(ValueError):
+                self.service.query(name, params)
+        self.assertEqual(self.loads, 1)
+
+    def test_parallel_queries(self):
+        """Test that the queries run on the published frames answer as the single-process ones."""
+        service = AnalysisService(self.temp_dir.name, self.temp_dir.name,
+                                  loader=lambda *dirs: publish_analysis_frames(self.mock_loader(*dirs), 2))
+        self.assertEqual(service.data['shared_movies'].column_names, ['country', 'numVotes', 'composite_score'])
+        for name, params in [('total_votes_by_country', {}), ('average_composite_score_by_country', {}),
+                             ('weighted_average_composite_score_by_country', {}),
+                             ('rank_directors', {'aggregation': 'sum'}), ('custom_ranking', {}),
+                             ('rank_directors', {'aggregation': 'sum', 'end_year': '2005'}),
+                             ('rank_directors', {'limit': '1'})]:
+            with self.subTest(name=name, params=params):
+                self.assertEqual(service.query(name, params), self.service.query(name, params))
+
+    def test_concurrent_queries(self):
+        """Test that a slow query does not block cached queries."""
+        started, release = threading.Event(), threading.Event()
+
+        def slow_query(data, params):
+            started.set()
+            release.wait(5)
+            return {'slow': True}
+
+        self.service.query('total_votes_by_country')
+        with mock.patch.dict(QUERIES, {'slow': slow_query}):
+            thread = threading.Thread(target=self.service.query, args=('slow',))
+            thread.start()
+            self.assertTrue(started.wait(5))
+            # Answered from the cache while the slow query runs
+            self.assertEqual(len(self.service.query('total_votes_by_country')), 2)
+            release.set()
+            thread.join()
+            self.assertEqual(self.service.query('slow'), {'slow': True})
+
+    def test_cache_size(self):
+        """Test that only the most recently used query results are cached."""
+        service = AnalysisService(self.temp_dir.name, self.temp_dir.name, loader=self.mock_loader, cache_size=2)
+        service.query('total_votes_by_country')
+        service.query('average_composite_score_by_country')
+        service.query('total_votes_by_country')
+        service.query('country_counts')
+        self.assertEqual([name for name, _ in service.cache], ['total_votes_by_country', 'country_counts'])
+
+    def test_reload_if_changed(self):
+        """Test that the data is reloaded only when the files change."""
+        self.service.query('total_votes_by_country')
+        self.assertFalse(self.service.reload_if_changed())
+
+        os.utime(self.basics_path, (0, 0))
+        self.assertTrue(self.service.reload_if_changed())
+        self.assertEqual(self.loads, 2)
+        self.assertEqual(self.service.cache, {})
+
+    def test_http_query(self):
+        """Test answering queries over HTTP."""
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(self.service))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/query/country_counts?top_orders=1,2'
+            with urlopen(url) as response:
+                payload = json.loads(response.read())
+            self.assertEqual(payload['result'], {'1': {'US': 1}, '2': {'US': 2}})
+
+            failing_query = mock.Mock(side_effect=RuntimeError('failed'))
+            paths = [('/query/unknown', 404), ('/query/search_titles', 400),
+                     ('/query/rank_directors?director_column=foo', 400), ('/query/gdp_per_population?year=1990', 400),
+                     ('/query/failing', 500)]
+            with mock.patch.dict(QUERIES, {'failing': failing_query}):
+                for path, status in paths:
+                    with self.assertRaises(HTTPError) as error:
+                        urlopen(f'http://127.0.0.1:{server.server_address[1]}{path}')
+                    self.assertEqual(error.exception.code, status)
+                    self.assertIn('error', json.loads(error.exception.read()))
+                    error.exception.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
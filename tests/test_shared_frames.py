@@ -0,0 +1,90 @@
+import unittest
+import numpy as np
+import pandas as pd
+from functions.shared_frames import publish_frame, attach_frame, release_frame, frame_categories, PublishedFrame
+from functions.parallel import parallel_rank_directors, parallel_total_votes_by_country
+from functions.task2_functions import total_votes_by_country
+from functions.task3_functions import rank_directors
+
+
+class TestSharedFrames(unittest.TestCase):
+
+    def setUp(self):
+        """Set up mock data and publish it in shared memory."""
+        self.movies_df = pd.DataFrame({
+            'tconst': ['tt0000001', 'tt0000002', 'tt0000003', 'tt0000004'],
+            'country': ['US', 'FR', None, 'US'],
+            'numVotes': [1000, 500, 700, 300],
+            'composite_score': [7.5, 8.0, 6.5, 9.0],
+            'isOriginalTitle': pd.array([1, 1, pd.NA, 1], dtype='Int64'),
+            'director': ['Director A', 'Director B', 'Director A', 'Director Ż']
+        })
+        self.handle, self.segments = publish_frame(self.movies_df)
+
+    def tearDown(self):
+        """Free the shared memory segments."""
+        release_frame(self.segments, unlink=True)
+
+    def test_attach_frame(self):
+        """Test that an attached frame has the published values and is read-only."""
+        attached, segments = attach_frame(self.handle)
+        try:
+            self.assertEqual(attached['tconst'].tolist(), self.movies_df['tconst'].tolist())
+            self.assertEqual(attached['director'].tolist(), self.movies_df['director'].tolist())
+            self.assertTrue(pd.isna(attached['country'].iloc[2]))
+            self.assertTrue(np.isnan(attached['isOriginalTitle'].iloc[2]))
+            np.testing.assert_array_equal(attached['numVotes'].to_numpy(), self.movies_df['numVotes'].to_numpy())
+            self.assertFalse(attached['numVotes'].to_numpy().flags.writeable)
+        finally:
+            del attached
+            release_frame(segments)
+
+    def test_attach_frame_slice(self):
+        """Test attaching to a slice of rows and a subset of columns."""
+        attached, segments = attach_frame(self.handle[['country', 'numVotes']], 1, 3)
+        try:
+            self.assertEqual(attached.columns.tolist(), ['country', 'numVotes'])
+            self.assertEqual(attached['numVotes'].tolist(), [500, 700])
+        finally:
+            del attached
+            release_frame(segments)
+
+    def test_attach_frame_codes(self):
+        """Test attaching string columns as their codes, labelled back with the decoded categories."""
+        attached, segments = attach_frame(self.handle[['country', 'numVotes']], decode_categories=False)
+        try:
+            codes = attached['country'].to_numpy()
+            self.assertEqual(codes[2], -1)
+            categories = frame_categories(self.handle, 'country')
+            self.assertEqual(categories.take(codes[[0, 1, 3]]).tolist(), ['US', 'FR', 'US'])
+            self.assertIsNone(frame_categories(self.handle, 'numVotes'))
+        finally:
+            del attached, codes
+            release_frame(segments)
+
+    def test_published_frame(self):
+        """Test that a published frame stays attachable until its owner is released."""
+        owner = PublishedFrame(self.movies_df)
+        handle = owner.handle
+        attached, segments = attach_frame(handle)
+        self.assertEqual(attached['numVotes'].tolist(), self.movies_df['numVotes'].tolist())
+        del attached
+        release_frame(segments)
+
+        del owner
+        with self.assertRaises(FileNotFoundError):
+            attach_frame(handle)
+
+    def test_parallel_aggregation_on_handle(self):
+        """Test running the parallel aggregations on a published frame."""
+        result = parallel_total_votes_by_country(self.handle, n_workers=2).reset_index(drop=True)
+        expected = total_votes_by_country(self.movies_df).reset_index(drop=True)
+        pd.testing.assert_frame_equal(result, expected)
+
+        result = parallel_rank_directors(self.handle, 'director', 'composite_score', 'sum', n_workers=2)
+        expected = rank_directors(self.movies_df, 'director', 'composite_score', 'sum')
+        pd.testing.assert_frame_equal(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 import pandas as pd
 from functions.task2_functions import (
     total_votes_by_country,
@@ -8,7 +9,8 @@ from functions.task2_functions import (
     filter_countries_with_reference,
     get_countries_and_clean_orders,
     calculate_gdp_per_population,
-    compute_hegemony
+    compute_hegemony,
+    compute_all_hegemonies
 )
 
 
@@ -145,6 +147,30 @@ class TestTask2Functions(unittest.TestCase):
         result = compute_hegemony(df1, df2, 'label1', 'label2')
         pd.testing.assert_frame_equal(result, expected_result)
 
+    def test_compute_all_hegemonies(self):
+        """Test computing hegemony rankings and correlations for every pair of rankings."""
+        rankings = {
+            'votes': pd.DataFrame({'country': ['US', 'FR', 'UK'], 'rank': [1, 2, 3]}),
+            'gdp': pd.DataFrame({'country': ['FR', 'US', 'UK', 'PL'], 'rank': [1, 2, 3, 4]}),
+            'pop': pd.DataFrame({'country': ['PL', 'UK', 'US'], 'rank': [1, 2, 3]})
+        }
+
+        with patch('builtins.print') as mock_print:
+            summary_df, hegemonies = compute_all_hegemonies(rankings)
+            mock_print.assert_not_called()
+
+        self.assertEqual(list(hegemonies), [('votes', 'gdp'), ('votes', 'pop'), ('gdp', 'pop')])
+        for (label1, label2), hegemony_df in hegemonies.items():
+            with patch('builtins.print'):
+                expected = compute_hegemony(rankings[label1], rankings[label2], label1, label2)
+            pd.testing.assert_frame_equal(hegemony_df, expected)
+
+        votes_gdp = summary_df.iloc[0]
+        self.assertEqual(votes_gdp['countries'], 3)
+        self.assertAlmostEqual(votes_gdp['spearman'], 0.5)
+        self.assertAlmostEqual(votes_gdp['kendall'], 1 / 3)
+        self.assertAlmostEqual(summary_df.iloc[2]['spearman'], -1.0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,14 @@
 import unittest
+import numpy as np
 import pandas as pd
-from functions.task3_functions import prepare_movies_directors, rank_directors, custom_ranking
+from functions.utilities import encode_professions
+from functions.task3_functions import (
+    prepare_movies_directors,
+    rank_directors,
+    custom_ranking,
+    rank_director_actors,
+    director_leaderboard
+)
 
 
 class TestMovieDirectorFunctions(unittest.TestCase):
@@ -106,6 +114,101 @@ class TestMovieDirectorFunctions(unittest.TestCase):
         with self.assertRaises(TypeError):
             custom_ranking(self.movies_scores_df, 'director', 'score', good_threshold='invalid', bad_threshold=5.0)
 
+    def test_director_leaderboard(self):
+        """Test building all director rankings in a single pass."""
+        movies_directors_df = pd.DataFrame({
+            'nconst': ['nm01', 'nm02', 'nm01', 'nm02', 'nm03'],
+            'primaryName': ['Same Name', 'Same Name', 'Same Name', 'Same Name', 'Other Name'],
+            'primaryProfession': ['director,actor', 'director', 'director,actor', 'director', 'actress,director'],
+            'score': [7.5, 8.0, 6.5, 7.0, 9.0]
+        })
+
+        result = director_leaderboard(movies_directors_df, 'score', good_threshold=8.0, bad_threshold=5.0)
+
+        self.assertEqual(result['nconst'].tolist(), ['nm03', 'nm02', 'nm01'])
+        self.assertEqual(result['total_movies'].tolist(), [1, 2, 2])
+        self.assertEqual(result['mean_score'].tolist(), [9.0, 7.5, 7.0])
+        self.assertEqual(result['mean_rank'].tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(result['sum_score'].tolist(), [9.0, 15.0, 14.0])
+        self.assertEqual(result['sum_rank'].tolist(), [3.0, 1.0, 2.0])
+        self.assertEqual(result['custom_score'].tolist(), [12.0, 10.0, 8.0])
+        self.assertEqual(result['custom_rank'].tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(result['is_actor'].tolist(), [False, False, True])
+        self.assertEqual(result['actor_custom_rank'].tolist()[2], 1.0)
+        self.assertTrue(result['actor_custom_rank'].iloc[:2].isna().all())
+
+    def test_director_leaderboard_actor_ranking(self):
+        """Test that the actor ranking of the leaderboard matches rank_director_actors."""
+        movies_directors_df = pd.DataFrame({
+            'tconst': ['tt01', 'tt02', 'tt03', 'tt04', 'tt05'],
+            'nconst': ['nm01', 'nm02', 'nm01', 'nm03', 'nm04'],
+            'primaryProfession': ['director,actor', 'actor', 'director,actor', 'actor,writer', 'director'],
+            'composite_score': [300.0, 900.0, 500.0, 100.0, 1000.0]
+        })
+
+        result = director_leaderboard(movies_directors_df)
+        expected = rank_director_actors(movies_directors_df.copy(), 'nconst', 'composite_score')
+        actors = result.dropna(subset=['actor_custom_rank']).sort_values('actor_custom_rank', kind='stable')
+        self.assertEqual(actors['nconst'].tolist(), expected['nconst'].tolist())
+        self.assertEqual(actors['actor_custom_score'].tolist(), expected['custom_score'].tolist())
+        self.assertEqual(actors['actor_custom_rank'].tolist(), expected['rank'].tolist())
+        self.assertTrue(pd.isna(result.set_index('nconst').loc['nm04', 'actor_custom_score']))
+
+    def test_actor_rankings_with_movies_without_director(self):
+        """Test the actor rankings on prepared data where a movie has no director, leaving the flags as floats."""
+        names_df = encode_professions(self.names_df.assign(
+            primaryProfession=['actor,director', 'director', 'actor']))
+        movies_df = self.movies_df.assign(averageRating=[7.5, 8.0, 9.0, 6.0])
+        movies_directors_df = prepare_movies_directors(self.crew_df, names_df, movies_df)
+        self.assertEqual(movies_directors_df['professionFlags'].dtype, 'float64')
+
+        result = rank_director_actors(movies_directors_df, 'primaryName', 'averageRating')
+        self.assertEqual(result['primaryName'].tolist(), ['Director C Name', 'Director A Name'])
+        leaderboard = director_leaderboard(movies_directors_df, 'averageRating')
+        self.assertEqual(leaderboard.set_index('nconst')['is_actor'].to_dict(),
+                         {'Director A': True, 'Director B': False, 'Director C': True})
+
+    def test_top_k_rankings(self):
+        """Test keeping only the best directors, with ties at the boundary, pagination and a minimum of movies."""
+        movies_directors_df = pd.DataFrame({
+            'tconst': [f'tt00000{i}' for i in range(8)],
+            'director': ['A', 'B', 'C', 'D', 'E', 'E', 'F', 'F'],
+            'score': [9.0, 8.0, 8.0, 7.0, 6.0, 7.0, 5.0, 4.0]
+        })
+
+        result = rank_directors(movies_directors_df, 'director', 'score', top_k=2)
+        self.assertEqual(result['director'].tolist(), ['A', 'B', 'C'])
+        self.assertEqual(result['rank'].tolist(), [1.0, 2.0, 2.0])
+
+        full = rank_directors(movies_directors_df, 'director', 'score', aggregation='sum')
+        result = rank_directors(movies_directors_df, 'director', 'score', aggregation='sum', offset=1, limit=2)
+        pd.testing.assert_frame_equal(result, full.iloc[1:3].reset_index(drop=True))
+
+        result = rank_directors(movies_directors_df, 'director', 'score', top_k=1, min_movies=2)
+        self.assertEqual(result[['director', 'rank']].values.tolist(), [['E', 1.0]])
+
+        result = custom_ranking(movies_directors_df.copy(), 'director', 'score', top_k=3)
+        full = custom_ranking(movies_directors_df.copy(), 'director', 'score')
+        self.assertEqual(result['director'].tolist(), ['A', 'B', 'C', 'E'])
+        pd.testing.assert_frame_equal(result, full[full['rank'] <= 3].reset_index(drop=True), check_like=True)
+        self.assertTrue(rank_directors(movies_directors_df, 'director', 'score', top_k=0).empty)
+
+    def test_ranking_pages_with_missing_scores(self):
+        """Test that every page, including those reaching the directors without a score, slices the full ranking."""
+        movies_directors_df = pd.DataFrame({
+            'tconst': [f'tt00000{i}' for i in range(6)],
+            'director': ['A', 'B', 'C', 'D', 'E', 'F'],
+            'score': [7.0, np.nan, 9.0, 8.0, np.nan, 8.0]
+        })
+
+        full = rank_directors(movies_directors_df, 'director', 'score')
+        self.assertEqual(full['director'].tolist(), ['C', 'D', 'F', 'A', 'B', 'E'])
+        for offset, limit in [(0, 2), (2, 2), (3, 3), (4, 10), (0, 10)]:
+            result = rank_directors(movies_directors_df, 'director', 'score', offset=offset, limit=limit)
+            pd.testing.assert_frame_equal(result, full.iloc[offset:offset + limit].reset_index(drop=True))
+        result = rank_directors(movies_directors_df, 'director', 'score', top_k=5)
+        pd.testing.assert_frame_equal(result, full)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from functions.title_index import normalize_titles, title_trigrams, build_title_index, load_title_index, TitleIndex
+
+
+class TestTitleIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Write a small title.akas file for testing."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.akas_path = os.path.join(self.temp_dir.name, 'title.akas.tsv')
+        pd.DataFrame({
+            'titleId': ['tt0000003', 'tt0000001', 'tt0000001', 'tt0000002', 'tt0000002', 'tt0000004'],
+            'ordering': [1, 1, 2, 1, 2, 1],
+            'title': ['Amélie', 'The Godfather', 'Il Padrino', 'Seven Samurai', 'Shichinin no samurai', '\\N'],
+            'region': ['FR', '\\N', 'IT', 'US', 'JP', 'US'],
+            'isOriginalTitle': [1, 1, 0, 0, 1, 1]
+        }).to_csv(self.akas_path, sep='\t', index=False)
+
+        self.movies_df = pd.DataFrame({
+            'tconst': ['tt0000001', 'tt0000003'],
+            'country': ['US', 'FR'],
+            'composite_score': [9.5, 8.0]
+        })
+
+    def tearDown(self):
+        """Remove the temporary files."""
+        self.temp_dir.cleanup()
+
+    def test_normalize_titles(self):
+        """Test removing diacritics, case and punctuation."""
+        self.assertEqual(normalize_titles(['Amélie', 'LÉON: The Professional', None, 'Straße']).tolist(),
+                         ['amelie', 'leon the professional', '', 'strasse'])
+
+    def test_title_trigrams(self):
+        """Test the distinct trigrams of every title."""
+        keys, rows = title_trigrams(normalize_titles(['aaa', '', 'ab']))
+        self.assertEqual(rows.tolist(), [0, 0, 0, 0, 2, 2, 2])
+        self.assertEqual(len(set(zip(keys.tolist(), rows.tolist()))), len(keys))
+
+    def test_search(self):
+        """Test ranked fuzzy lookups of localized and misspelled titles."""
+        index = load_title_index(self.akas_path)
+        self.assertEqual(len(index), 5)
+        self.assertTrue(os.path.exists(os.path.join(self.akas_path + '.trigrams', 'manifest.json')))
+
+        result = index.search('the godfater', limit=3)
+        self.assertEqual(result.loc[0, ['tconst', 'title', 'original_title']].tolist(),
+                         ['tt0000001', 'The Godfather', 'The Godfather'])
+        self.assertTrue(pd.isna(result.loc[0, 'region']))
+
+        result = index.search('AMELIE')
+        self.assertEqual(result.loc[0, ['tconst', 'title', 'region', 'similarity']].tolist(),
+                         ['tt0000003', 'Amélie', 'FR', 1.0])
+
+        result = index.search('samurai', min_similarity=0.2)
+        self.assertEqual(result['tconst'].tolist(), ['tt0000002'])
+        self.assertEqual(result.loc[0, ['title', 'region', 'original_title']].tolist(),
+                         ['Seven Samurai', 'US', 'Shichinin no samurai'])
+
+        result = index.search('il padrino', self.movies_df)
+        self.assertEqual(result.loc[0, ['tconst', 'title', 'original_title', 'country', 'composite_score']].tolist(),
+                         ['tt0000001', 'Il Padrino', 'The Godfather', 'US', 9.5])
+        self.assertTrue(index.search('samurai', self.movies_df, min_similarity=0.2).empty)
+        self.assertTrue(index.search('???').empty)
+
+    def test_search_matches_all_akas(self):
+        """Test that the candidates of the rarest query trigrams find every aka similar enough to the query."""
+        rng = np.random.default_rng(0)
+        words = np.array(['the', 'love', 'story', 'dark', 'city', 'night', 'king', 'samurai', 'padrino', 'amelie'])
+        titles = [' '.join(rng.choice(words, rng.integers(1, 5))) for _ in range(300)]
+        akas_df = pd.DataFrame({'titleId': [f'tt{row:07d}' for row in range(len(titles))], 'title': titles,
+                                'region': 'US', 'isOriginalTitle': 1})
+        index_dir = os.path.join(self.temp_dir.name, 'trigrams')
+        build_title_index(akas_df, index_dir)
+        index = TitleIndex(index_dir)
+
+        keys, rows = title_trigrams(normalize_titles(titles))
+        title_sets = [set(keys[rows == row].tolist()) for row in range(len(titles))]
+        for query in ['the love story', 'dark citty', 'king', 'samurai night of the padrino']:
+            query_set = set(title_trigrams(normalize_titles([query]))[0].tolist())
+            similarities = pd.Series([len(query_set & title_set) / len(query_set | title_set)
+                                      for title_set in title_sets])
+            for min_similarity in [0.1, 0.3, 0.6]:
+                result = index.search(query, limit=len(titles), min_similarity=min_similarity)
+                expected = similarities[similarities >= min_similarity]
+                self.assertEqual(sorted(result['tconst']), sorted(akas_df['titleId'][expected.index]))
+                np.testing.assert_allclose(result.set_index('tconst')['similarity'].sort_index(),
+                                           expected.set_axis(akas_df['titleId'][expected.index]).sort_index())
+
+    def test_search_attached_movies(self):
+        """Test restricting the searches to the movies attached to the index."""
+        index = load_title_index(self.akas_path, movies_df=self.movies_df)
+        expected = index.search('il padrino', self.movies_df)
+        pd.testing.assert_frame_equal(index.search('il padrino'), expected)
+        self.assertTrue(index.search('samurai', min_similarity=0.2).empty)
+
+        index.attach_movies(pd.concat([self.movies_df, self.movies_df.assign(country='IT')]))
+        self.assertEqual(index.search('il padrino').loc[0, 'country'], 'US')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,16 @@
 import unittest
 from unittest.mock import patch, mock_open
+import numpy as np
 import pandas as pd
-from functions.utilities import load_data, clean_data, save_clean_data
+from functions.utilities import (
+    load_data,
+    clean_data,
+    save_clean_data,
+    encode_professions,
+    has_profession,
+    profession_mask,
+    parse_memory_size
+)
 
 
 class TestUtilities(unittest.TestCase):
@@ -64,6 +73,33 @@ class TestUtilities(unittest.TestCase):
         save_clean_data(df, output_path)
         mock_to_csv.assert_called_once_with(output_path, index=False)
 
+    def test_encode_professions(self):
+        """Test parsing professions into a bitmask column."""
+        df = pd.DataFrame({
+            'nconst': ['nm01', 'nm02', 'nm03', 'nm04'],
+            'primaryProfession': ['actor,director', 'actress,writer', pd.NA, 'director']
+        })
+        result = encode_professions(df)
+        self.assertEqual(result['professionFlags'].tolist(), [
+            profession_mask('actor', 'director'), profession_mask('actress', 'writer'), 0, profession_mask('director')
+        ])
+        self.assertEqual(has_profession(result, 'actor').tolist(), [True, False, False, False])
+        self.assertEqual(has_profession(result, ['actor', 'actress']).tolist(), [True, True, False, False])
+        with self.assertRaises(ValueError):
+            profession_mask('astronaut')
+
+        # Flags left as floats with missing values by a join
+        joined = pd.DataFrame({'professionFlags': [float(profession_mask('actor')), np.nan]})
+        self.assertEqual(has_profession(joined, 'actor').tolist(), [True, False])
+
+    def test_parse_memory_size(self):
+        """Test parsing memory sizes."""
+        self.assertEqual(parse_memory_size('512MB'), 512 * 1024 ** 2)
+        self.assertEqual(parse_memory_size('2 gb'), 2 * 1024 ** 3)
+        self.assertEqual(parse_memory_size(1000), 1000)
+        with self.assertRaises(ValueError):
+            parse_memory_size('a lot')
+
 
 if __name__ == '__main__':
     unittest.main(argv=[''], exit=False)